@@ -0,0 +1,6 @@
+"""
+Benchmarks de la API del restaurante.
+Se ejecutan contra SQLite local, sin servicios externos:
+
+    python -m benchmarks.bench_serializers
+"""
@@ -0,0 +1,66 @@
+"""
+Benchmark de compresión de respuestas: CPU frente a bytes transferidos
+para distintos niveles de gzip y brotli, sobre las respuestas reales de
+/api/pedidos/, /api/users/ y /api/mesas/.
+
+    python -m benchmarks.bench_compression [--pedidos 5000] [--mbps 2]
+
+La columna "total ms" suma el tiempo de compresión y el de transferencia
+estimado con un enlace de --mbps megabits/s (Wi-Fi débil de las tablets).
+"""
+
+import argparse
+
+from benchmarks.seed import seed_restaurante
+from benchmarks.utils import medir, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pedidos', type=int, default=5000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--mbps', type=float, default=2.0)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_restaurante(pedidos=args.pedidos, usuarios=args.usuarios)
+
+    from django.contrib.auth.models import Group, User
+    from rest_framework.test import APIClient
+    from config.middleware import DEFAULT_COMPRESSION, brotli, compress
+
+    admin = User.objects.create_user('bench-admin', password='bench')
+    admin.groups.add(Group.objects.get(name='Administradores'))
+    client = APIClient()
+    client.force_authenticate(admin)
+
+    variantes = [('identity', None)]
+    variantes += [('gzip', nivel) for nivel in (1, 4, 6, 9)]
+    if brotli is not None:
+        variantes += [('br', calidad) for calidad in (1, 4, 6, 11)]
+    else:
+        print('brotli no está instalado: solo se mide gzip')
+
+    bytes_por_ms = args.mbps * 1_000_000 / 8 / 1000
+    for url in ('/api/pedidos/', '/api/users/', '/api/mesas/'):
+        contenido = client.get(url).content
+        print(f'\n{url} ({len(contenido) / 1024:.0f} KiB sin comprimir)')
+        print(f'{"codificación":<14} {"KiB":>8} {"ratio":>6} {"cpu ms":>8} {"total ms":>9}')
+        for encoding, nivel in variantes:
+            if encoding == 'identity':
+                tamano, cpu = len(contenido), 0.0
+            else:
+                clave = 'BROTLI_QUALITY' if encoding == 'br' else 'GZIP_LEVEL'
+                config = {**DEFAULT_COMPRESSION, clave: nivel}
+                tamano = len(compress(contenido, encoding, config))
+                cpu = medir(lambda: compress(contenido, encoding, config), args.repeticiones) * 1000
+            etiqueta = encoding if nivel is None else f'{encoding}-{nivel}'
+            print(
+                f'{etiqueta:<14} {tamano / 1024:>8.1f} {len(contenido) / tamano:>6.1f} '
+                f'{cpu:>8.2f} {cpu + tamano / bytes_por_ms:>9.1f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark de codificación JSON: JSONRenderer de DRF frente a
+restaurant.renderers.FastJSONRenderer, sobre listados reales de
+PedidoSerializer y UserSerializer y sobre la respuesta de estadísticas
+(Decimal y fechas sin serializar).
+
+    python -m benchmarks.bench_renderers [--pedidos 5000]
+"""
+
+import argparse
+import datetime
+import io
+import json
+from decimal import Decimal
+
+from benchmarks.seed import seed_restaurante
+from benchmarks.utils import medir, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pedidos', type=int, default=5000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_restaurante(pedidos=args.pedidos, usuarios=args.usuarios)
+
+    from django.contrib.auth.models import User
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+    from restaurant import renderers
+    from restaurant.models import Pedido
+    from restaurant.serializers import PedidoSerializer
+    from users.serializers import UserSerializer
+
+    estadisticas = [
+        {'estado': 'pagado', 'cantidad': i, 'total': Decimal('1234.50') + i,
+         'fecha': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456)}
+        for i in range(args.pedidos)
+    ]
+    payloads = [
+        ('PedidoSerializer', PedidoSerializer(Pedido.objects.select_related('mesa'), many=True).data),
+        ('UserSerializer', UserSerializer(User.objects.prefetch_related('groups'), many=True).data),
+        ('estadisticas', estadisticas),
+    ]
+
+    print(f'orjson instalado: {renderers.orjson is not None}')
+    print(f'{"payload":<18} {"KiB":>7} {"drf ms":>8} {"rápido ms":>10} {"mejora":>7}  salida idéntica')
+    for nombre, data in payloads:
+        drf = JSONRenderer().render(data)
+        rapido = renderers.FastJSONRenderer().render(data)
+        t_drf = medir(lambda: JSONRenderer().render(data), args.repeticiones)
+        t_rapido = medir(lambda: renderers.FastJSONRenderer().render(data), args.repeticiones)
+        print(
+            f'{nombre:<18} {len(drf) / 1024:>7.0f} {t_drf * 1000:>8.2f} {t_rapido * 1000:>10.2f} '
+            f'{t_drf / t_rapido:>6.1f}x  {drf == rapido}'
+        )
+
+    # Cuerpo de petición típico: un lote de pedidos
+    contenido = JSONRenderer().render(payloads[0][1][:200])
+    t_drf = medir(lambda: JSONParser().parse(io.BytesIO(contenido)), args.repeticiones)
+    t_rapido = medir(lambda: renderers.FastJSONParser().parse(io.BytesIO(contenido)), args.repeticiones)
+    assert json.loads(contenido) == renderers.FastJSONParser().parse(io.BytesIO(contenido))
+    print(f'{"parser (pedidos)":<18} {len(contenido) / 1024:>7.0f} {t_drf * 1000:>8.2f} '
+          f'{t_rapido * 1000:>10.2f} {t_drf / t_rapido:>6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
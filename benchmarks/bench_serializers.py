@@ -0,0 +1,57 @@
+"""
+Microbenchmark de serialización de listados: serializadores de DRF frente
+a los serializadores rápidos de restaurant.fast.
+
+    python -m benchmarks.bench_serializers [--pedidos 5000]
+
+Además de filas/segundo comprueba que el JSON de ambos caminos es idéntico.
+"""
+
+import argparse
+
+from benchmarks.seed import seed_restaurante
+from benchmarks.utils import medir, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mesas', type=int, default=50)
+    parser.add_argument('--pedidos', type=int, default=5000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    seed_restaurante(args.mesas, args.pedidos, args.usuarios)
+
+    from django.contrib.auth.models import User
+    from rest_framework.renderers import JSONRenderer
+    from restaurant.fast import FastMesaSerializer, FastPedidoSerializer, FastUserSerializer
+    from restaurant.models import Mesa, Pedido
+    from restaurant.serializers import MesaSerializer, PedidoSerializer
+    from users.serializers import UserSerializer
+
+    casos = [
+        ('Mesa', Mesa.objects.all(), MesaSerializer, FastMesaSerializer),
+        ('Pedido', Pedido.objects.all(), PedidoSerializer, FastPedidoSerializer),
+        ('User', User.objects.all(), UserSerializer, FastUserSerializer),
+    ]
+    renderer = JSONRenderer()
+
+    print(f'{"modelo":<8} {"filas":>7} {"drf filas/s":>13} {"rápido filas/s":>15} {"mejora":>7}  json idéntico')
+    for nombre, queryset, drf, rapido in casos:
+        filas = queryset.count()
+        t_drf = medir(lambda: renderer.render(drf(queryset.all(), many=True).data), args.repeticiones)
+        t_rapido = medir(lambda: renderer.render(rapido().serializar(queryset.all())), args.repeticiones)
+        identico = (
+            renderer.render(drf(queryset.all(), many=True).data) ==
+            renderer.render(rapido().serializar(queryset.all()))
+        )
+        print(
+            f'{nombre:<8} {filas:>7} {filas / t_drf:>13.0f} {filas / t_rapido:>15.0f} '
+            f'{t_drf / t_rapido:>6.1f}x  {identico}'
+        )
+
+
+if __name__ == '__main__':
+    main()
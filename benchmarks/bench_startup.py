@@ -0,0 +1,120 @@
+"""
+Benchmark de arranque en frío: cuánto tarda un proceso nuevo en tener la
+aplicación WSGI cargada (django.setup(), apps, modelos y urlconf) y qué
+módulos dominan el tiempo de importación (python -X importtime).
+
+    python -m benchmarks.bench_startup [--repeticiones 10] [--top 12] [--muestras-importacion 5]
+
+Cada perfil se mide en procesos nuevos con las variables de entorno
+indicadas. Por defecto se comparan el perfil completo y el de solo API
+(API_ONLY=1), ambos con SQLite para no depender de MySQL.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+# Lo que hace un worker antes de atender la primera petición
+ARRANQUE = (
+    "from config.wsgi import application\n"
+    "from django.urls import get_resolver\n"
+    "get_resolver().url_patterns\n"
+)
+
+# El arranque no abre la base: basta una ruta, el fichero no llega a crearse
+BASE_SQLITE = str(Path(tempfile.gettempdir()) / 'bench_startup.sqlite3')
+
+PERFILES = {
+    'completo': {'DB_ENGINE': 'sqlite', 'SQLITE_NAME': BASE_SQLITE, 'API_ONLY': '0'},
+    'api': {'DB_ENGINE': 'sqlite', 'SQLITE_NAME': BASE_SQLITE, 'API_ONLY': '1'},
+}
+
+
+def _entorno(variables):
+    entorno = {**os.environ, **variables}
+    entorno.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    return entorno
+
+
+def arranque_en_frio(perfiles, repeticiones):
+    """
+    Segundos (mediana y mínimo) hasta tener la aplicación cargada, en procesos
+    nuevos: {perfil: (mediana, mínimo)}. Los perfiles se alternan en cada
+    repetición para que el ruido de la máquina afecte a todos por igual.
+    """
+    tiempos = defaultdict(list)
+    for _ in range(repeticiones):
+        for perfil in perfiles:
+            inicio = time.perf_counter()
+            subprocess.run(
+                [sys.executable, '-c', ARRANQUE], cwd=RAIZ, env=_entorno(PERFILES[perfil]),
+                check=True, stdout=subprocess.DEVNULL,
+            )
+            tiempos[perfil].append(time.perf_counter() - inicio)
+    return {perfil: (statistics.median(t), min(t)) for perfil, t in tiempos.items()}
+
+
+def tiempos_importacion(variables, repeticiones=5):
+    """
+    Ejecuta el arranque con -X importtime y se queda con la ejecución más
+    rápida. Retorna (microsegundos totales, número de módulos,
+    {paquete raíz: microsegundos propios}).
+    """
+    mejor = None
+    for _ in range(repeticiones):
+        resultado = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', ARRANQUE], cwd=RAIZ,
+            env=_entorno(variables), check=True, capture_output=True, text=True,
+        )
+        por_paquete = defaultdict(int)
+        total = modulos = 0
+        for linea in resultado.stderr.splitlines():
+            if not linea.startswith('import time:') or 'self [us]' in linea:
+                continue
+            propio, _, nombre = linea[len('import time:'):].split('|')
+            propio = int(propio)
+            total += propio
+            modulos += 1
+            por_paquete[nombre.strip().split('.')[0]] += propio
+        if mejor is None or total < mejor[0]:
+            mejor = (total, modulos, por_paquete)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--top', type=int, default=12, help='Paquetes a mostrar por tiempo de importación.')
+    parser.add_argument('--muestras-importacion', type=int, default=5,
+                        help='Ejecuciones con -X importtime (se muestra la más rápida).')
+    parser.add_argument('--perfil', action='append', choices=sorted(PERFILES),
+                        help='Perfiles a medir (por defecto, todos).')
+    args = parser.parse_args()
+
+    perfiles = args.perfil or list(PERFILES)
+    importaciones = {}
+    print(f'{"perfil":<10} {"arranque p50 ms":>16} {"mín ms":>8} {"import ms":>10} {"módulos":>8}')
+    arranques = arranque_en_frio(perfiles, args.repeticiones)
+    for perfil in perfiles:
+        mediana, minimo = arranques[perfil]
+        total, modulos, por_paquete = tiempos_importacion(PERFILES[perfil], args.muestras_importacion)
+        importaciones[perfil] = por_paquete
+        print(f'{perfil:<10} {mediana * 1000:>16.1f} {minimo * 1000:>8.1f} {total / 1000:>10.1f} {modulos:>8}')
+
+    for perfil in perfiles:
+        print(f'\n{perfil}: paquetes con más tiempo de importación propio')
+        mayores = sorted(importaciones[perfil].items(), key=lambda item: item[1], reverse=True)
+        for paquete, microsegundos in mayores[:args.top]:
+            print(f'  {paquete:<24} {microsegundos / 1000:>8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,394 @@
+"""
+Suite de carga de la API: ejecuta en proceso (django.test.Client) cada
+endpoint de restaurant/urls.py y users/urls.py y reporta throughput,
+latencias p50/p95/p99 y número de consultas SQL por petición en JSON.
+
+    python -m benchmarks.run --iteraciones 50
+    python -m benchmarks.run --db bench.sqlite3 --sin-seed --concurrencia 8
+    python -m benchmarks.run --guardar-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerancia 0.25
+
+Con --baseline la ejecución falla (código de salida 1) si algún endpoint
+empeora su p95 más allá de la tolerancia o hace más consultas SQL.
+El modo concurrente necesita una base en fichero (--db).
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+
+class Escenario:
+    """
+    Petición a un endpoint. `datos(ctx, i)` construye el cuerpo y
+    `url(ctx, i)` la ruta de la iteración i; `preparar(ctx, n)` crea de
+    antemano los objetos que consumen las iteraciones (p. ej. para DELETE).
+    """
+
+    def __init__(self, nombre, metodo, url, rol='admin', datos=None, esperado=200, preparar=None):
+        self.nombre = nombre
+        self.metodo = metodo
+        self.url = url if callable(url) else (lambda ctx, i, url=url: url)
+        self.rol = rol
+        self.datos = datos
+        self.esperado = esperado
+        self.preparar = preparar
+
+    def ejecutar(self, clientes, ctx, i):
+        cliente = clientes[self.rol]
+        datos = self.datos(ctx, i) if self.datos else None
+        respuesta = getattr(cliente, self.metodo)(self.url(ctx, i), datos, format='json')
+        return respuesta.status_code == self.esperado
+
+
+def _crear_mesas(ctx, n):
+    from restaurant.models import Mesa
+    inicio = ctx['numero'](n)
+    ctx['mesas_borrables'] = [
+        m.id for m in Mesa.objects.bulk_create([
+            Mesa(sucursal_id=ctx['sucursal_id'], numero=inicio + i, capacidad=2) for i in range(n)
+        ])
+    ]
+
+
+def _crear_pedidos(clave):
+    def preparar(ctx, n):
+        from restaurant.models import Pedido
+        ctx[clave] = [
+            p.id for p in Pedido.objects.bulk_create([
+                Pedido(mesa_id=ctx['mesa_id'], sucursal_id=ctx['sucursal_id'], descripcion='borrar', total=1)
+                for _ in range(n)
+            ])
+        ]
+    return preparar
+
+
+def _crear_usuarios(ctx, n):
+    from django.contrib.auth.models import Group, User
+    from restaurant.models import Membresia
+    base = f'borrar{time.time_ns()}-'
+    ctx['usuarios_borrables'] = [
+        u.id for u in User.objects.bulk_create([User(username=f'{base}{i}') for i in range(n)])
+    ]
+    # El admin solo ve (y puede borrar) usuarios de su sucursal
+    group_id = Group.objects.get(name='Empleados').id
+    Membresia.objects.bulk_create([
+        Membresia(user_id=user_id, sucursal_id=ctx['sucursal_id'], group_id=group_id)
+        for user_id in ctx['usuarios_borrables']
+    ])
+
+
+def _hace_un_minuto(ctx, i):
+    """Escenario delta: ?since= de hace un minuto, como una tablet que se reconecta."""
+    from urllib.parse import quote
+    from django.utils import timezone
+
+    return f'/api/sala/?since={quote((timezone.now() - timedelta(minutes=1)).isoformat())}'
+
+
+def _unico(ctx):
+    return next(ctx['contador'])
+
+
+ESCENARIOS = [
+    # users/urls.py
+    Escenario('user-register', 'post', '/api/users/register/', rol='anonimo', esperado=201, datos=lambda ctx, i: {
+        'username': f'nuevo{ctx["sufijo"]}-{_unico(ctx)}', 'email': 'nuevo@test.com',
+        'password': 'Password123!x', 'password_confirm': 'Password123!x',
+        'first_name': 'Juan', 'last_name': 'Pérez',
+    }),
+    Escenario('user-login', 'post', '/api/users/login/', rol='anonimo', datos=lambda ctx, i: {
+        'username': ctx['empleado'].username, 'password': ctx['password'],
+    }),
+    Escenario('user-logout', 'post', '/api/users/logout/', rol='empleado'),
+    Escenario('user-list', 'get', '/api/users/'),
+    Escenario('user-current', 'get', '/api/users/me/', rol='empleado'),
+    Escenario('user-change-password', 'post', '/api/users/change-password/', rol='cambio', datos=lambda ctx, i: {
+        'old_password': ctx['password'], 'new_password': ctx['password'],
+    }),
+    Escenario('user-detail', 'get', lambda ctx, i: f'/api/users/{ctx["empleado"].id}/'),
+    Escenario('user-detail-update', 'patch', lambda ctx, i: f'/api/users/{ctx["empleado"].id}/',
+              datos=lambda ctx, i: {'first_name': f'Ana{i}'}),
+    Escenario('user-detail-delete', 'delete', lambda ctx, i: f'/api/users/{ctx["usuarios_borrables"][i]}/',
+              esperado=204, preparar=_crear_usuarios),
+    Escenario('group-list', 'get', '/api/users/groups/', rol='empleado'),
+    Escenario('user-assign-group', 'post', lambda ctx, i: f'/api/users/{ctx["empleado"].id}/assign-group/',
+              datos=lambda ctx, i: {'group_name': 'Empleados'}),
+    # restaurant/urls.py
+    Escenario('api-root', 'get', '/api/', rol='empleado'),
+    Escenario('mesa-list', 'get', '/api/mesas/', rol='empleado'),
+    Escenario('mesa-create', 'post', '/api/mesas/create/', rol='empleado', esperado=201,
+              datos=lambda ctx, i: {'numero': ctx['numero'](1), 'capacidad': 4}),
+    Escenario('mesa-detail', 'get', lambda ctx, i: f'/api/mesas/{ctx["mesa_id"]}/', rol='empleado'),
+    Escenario('mesa-update', 'patch', lambda ctx, i: f'/api/mesas/{ctx["mesa_id"]}/update/', rol='empleado',
+              datos=lambda ctx, i: {'capacidad': 2 + i % 6}),
+    Escenario('mesa-delete', 'delete', lambda ctx, i: f'/api/mesas/{ctx["mesas_borrables"][i]}/delete/',
+              esperado=204, preparar=_crear_mesas),
+    Escenario('mesa-pedidos', 'get', lambda ctx, i: f'/api/mesas/{ctx["mesa_id"]}/pedidos/', rol='empleado'),
+    Escenario('sala', 'get', '/api/sala/', rol='empleado'),
+    Escenario('sala-delta', 'get', _hace_un_minuto, rol='empleado'),
+    Escenario('producto-list', 'get', '/api/productos/', rol='empleado'),
+    Escenario('producto-mas-vendidos', 'get', '/api/productos/mas-vendidos/', rol='empleado'),
+    Escenario('pedido-list', 'get', '/api/pedidos/', rol='empleado'),
+    Escenario('pedido-buscar', 'get', '/api/pedidos/buscar/?q=pizza%20marg', rol='empleado'),
+    Escenario('pedido-create', 'post', '/api/pedidos/create/', rol='empleado', esperado=201,
+              datos=lambda ctx, i: {'mesa': ctx['mesa_id'], 'descripcion': '2 pizzas', 'total': '25.50'}),
+    Escenario('pedido-create-items', 'post', '/api/pedidos/create/', rol='empleado', esperado=201,
+              datos=lambda ctx, i: {'mesa': ctx['mesa_id'], 'items': [
+                  {'producto': producto, 'cantidad': 1 + i % 3} for producto in ctx['producto_ids'][:3]
+              ]}),
+    Escenario('pedido-detail', 'get', lambda ctx, i: f'/api/pedidos/{ctx["pedido_id"]}/', rol='empleado'),
+    Escenario('pedido-update', 'patch', lambda ctx, i: f'/api/pedidos/{ctx["pedido_id"]}/', rol='empleado',
+              datos=lambda ctx, i: {'estado': 'servido'}),
+    Escenario('pedido-delete', 'delete', lambda ctx, i: f'/api/pedidos/{ctx["pedidos_borrables"][i]}/delete/',
+              esperado=204, preparar=_crear_pedidos('pedidos_borrables')),
+    Escenario('pedido-viewset-list', 'get', '/api/pedidos-viewset/', rol='empleado'),
+    Escenario('pedido-viewset-create', 'post', '/api/pedidos-viewset/', rol='empleado', esperado=201,
+              datos=lambda ctx, i: {'mesa': ctx['mesa_id'], 'descripcion': '1 café', 'total': '1.50'}),
+    Escenario('pedido-viewset-detail', 'get', lambda ctx, i: f'/api/pedidos-viewset/{ctx["pedido_id"]}/',
+              rol='empleado'),
+    Escenario('pedido-viewset-update', 'patch', lambda ctx, i: f'/api/pedidos-viewset/{ctx["pedido_id"]}/',
+              rol='empleado', datos=lambda ctx, i: {'estado': 'en_preparacion'}),
+    Escenario('pedido-viewset-delete', 'delete',
+              lambda ctx, i: f'/api/pedidos-viewset/{ctx["pedidos_viewset_borrables"][i]}/',
+              esperado=204, preparar=_crear_pedidos('pedidos_viewset_borrables')),
+]
+
+
+def percentil(valores, p):
+    """Percentil por rango más cercano sobre una lista ordenada."""
+    if not valores:
+        return None
+    indice = max(0, min(len(valores) - 1, round(p / 100 * len(valores) + 0.5) - 1))
+    return valores[indice]
+
+
+def preparar_contexto():
+    """Crea los usuarios con token y los objetos de referencia de los escenarios."""
+    from django.contrib.auth.models import Group, User
+    from rest_framework.authtoken.models import Token
+    from rest_framework.test import APIClient
+    from restaurant.models import Membresia, Mesa, Pedido
+    from benchmarks.seed import PASSWORD, obtener_productos, obtener_sucursales
+
+    mesa = Mesa.objects.order_by('?').first() or Mesa.objects.create(
+        sucursal=obtener_sucursales(1)[0], numero=10**6, capacidad=4
+    )
+    sufijo = time.time_ns()
+    usuarios = {}
+    for rol, grupo in (('admin', 'Administradores'), ('empleado', 'Empleados'), ('cambio', 'Empleados')):
+        user = User.objects.create_user(f'bench-{rol}-{sufijo}', password=PASSWORD)
+        group = Group.objects.get(name=grupo)
+        user.groups.add(group)
+        Membresia.objects.create(user=user, sucursal_id=mesa.sucursal_id, group=group)
+        usuarios[rol] = user
+
+    pedido = Pedido.objects.filter(mesa=mesa).first() or Pedido.objects.create(
+        mesa=mesa, descripcion='1 café', total=1
+    )
+    lock = threading.Lock()
+    siguiente_numero = [(Mesa.objects.order_by('-numero').values_list('numero', flat=True).first() or 0) + 1]
+
+    def numero(n):
+        # Reserva n números de mesa consecutivos (seguro entre hilos)
+        with lock:
+            inicio = siguiente_numero[0]
+            siguiente_numero[0] += n
+        return inicio
+
+    ctx = {
+        'password': PASSWORD,
+        'empleado': usuarios['empleado'],
+        'mesa_id': mesa.id,
+        'sucursal_id': mesa.sucursal_id,
+        'pedido_id': pedido.id,
+        'producto_ids': [producto.id for producto in obtener_productos()],
+        'numero': numero,
+        'sufijo': sufijo,
+        'contador': itertools.count(),
+    }
+    tokens = {rol: Token.objects.create(user=user).key for rol, user in usuarios.items()}
+
+    def clientes():
+        resultado = {'anonimo': APIClient()}
+        for rol, key in tokens.items():
+            resultado[rol] = APIClient()
+            resultado[rol].credentials(HTTP_AUTHORIZATION=f'Token {key}')
+        return resultado
+
+    return ctx, clientes
+
+
+def contar_consultas(escenario, clientes, ctx, i):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as consultas:
+        ok = escenario.ejecutar(clientes, ctx, i)
+    return len(consultas.captured_queries), ok
+
+
+def medir_escenario(escenario, ctx, crear_clientes, iteraciones, concurrencia):
+    from django.db import connection
+
+    # Iteración 0: calentamiento y conteo de consultas (fuera de la medición)
+    if escenario.preparar:
+        escenario.preparar(ctx, iteraciones + 1)
+    consultas, ok = contar_consultas(escenario, crear_clientes(), ctx, 0)
+    errores = 0 if ok else 1
+
+    latencias = []
+    lock = threading.Lock()
+    indices = iter(range(1, iteraciones + 1))
+
+    def trabajador():
+        nonlocal errores
+        clientes = crear_clientes()
+        try:
+            while True:
+                with lock:
+                    i = next(indices, None)
+                if i is None:
+                    return
+                inicio = time.perf_counter()
+                ok = escenario.ejecutar(clientes, ctx, i)
+                duracion = time.perf_counter() - inicio
+                with lock:
+                    latencias.append(duracion)
+                    errores += 0 if ok else 1
+        finally:
+            if concurrencia > 1:
+                connection.close()
+
+    inicio = time.perf_counter()
+    if concurrencia > 1:
+        with ThreadPoolExecutor(concurrencia) as pool:
+            for futuro in [pool.submit(trabajador) for _ in range(concurrencia)]:
+                futuro.result()
+    else:
+        trabajador()
+    total = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        'peticiones': len(latencias),
+        'errores': errores,
+        'throughput_rps': round(len(latencias) / total, 2) if total else None,
+        'p50_ms': round(percentil(latencias, 50) * 1000, 3),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 3),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 3),
+        'consultas': consultas,
+    }
+
+
+def comparar(resultados, baseline, tolerancia):
+    """Retorna la lista de regresiones respecto a `baseline`."""
+    regresiones = []
+    for nombre, actual in resultados['endpoints'].items():
+        anterior = baseline.get('endpoints', {}).get(nombre)
+        if anterior is None:
+            continue
+        if actual['p95_ms'] > anterior['p95_ms'] * (1 + tolerancia):
+            regresiones.append(
+                f'{nombre}: p95 {anterior["p95_ms"]} ms -> {actual["p95_ms"]} ms '
+                f'(tolerancia {tolerancia:.0%})'
+            )
+        if actual['consultas'] > anterior['consultas']:
+            regresiones.append(
+                f'{nombre}: consultas SQL {anterior["consultas"]} -> {actual["consultas"]}'
+            )
+        if actual['errores'] > anterior.get('errores', 0):
+            regresiones.append(f'{nombre}: errores {anterior.get("errores", 0)} -> {actual["errores"]}')
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='Fichero SQLite (por defecto, en memoria).')
+    parser.add_argument('--sin-seed', action='store_true', help='No generar datos (usar los de --db).')
+    parser.add_argument('--mesas', type=int, default=100)
+    parser.add_argument('--pedidos', type=int, default=5000)
+    parser.add_argument('--usuarios', type=int, default=500)
+    parser.add_argument('--iteraciones', type=int, default=30, help='Peticiones medidas por endpoint.')
+    parser.add_argument('--concurrencia', type=int, default=1, help='Hilos simultáneos por endpoint.')
+    parser.add_argument('--solo', help='Endpoints a ejecutar, separados por comas.')
+    parser.add_argument('--salida', help='Fichero donde escribir el JSON de resultados.')
+    parser.add_argument('--baseline', help='JSON de referencia contra el que comparar.')
+    parser.add_argument('--guardar-baseline', help='Guarda los resultados como nueva referencia.')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Empeoramiento de p95 permitido.')
+    args = parser.parse_args()
+
+    if args.concurrencia > 1 and not args.db:
+        parser.error('el modo concurrente necesita --db (SQLite en memoria no se comparte entre hilos)')
+    if args.db:
+        os.environ['BENCH_DB'] = args.db
+
+    from benchmarks.utils import setup_django
+    setup_django()
+    import django
+
+    if not args.sin_seed:
+        from benchmarks.seed import seed_restaurante
+        seed_restaurante(args.mesas, args.pedidos, args.usuarios)
+
+    ctx, crear_clientes = preparar_contexto()
+    escenarios = ESCENARIOS
+    if args.solo:
+        solo = set(args.solo.split(','))
+        escenarios = [e for e in ESCENARIOS if e.nombre in solo]
+
+    resultados = {
+        'meta': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'iteraciones': args.iteraciones,
+            'concurrencia': args.concurrencia,
+            'datos': {'mesas': args.mesas, 'pedidos': args.pedidos, 'usuarios': args.usuarios},
+        },
+        'endpoints': {},
+    }
+    for escenario in escenarios:
+        medida = medir_escenario(escenario, ctx, crear_clientes, args.iteraciones, args.concurrencia)
+        resultados['endpoints'][escenario.nombre] = medida
+        print(
+            f'{escenario.nombre:<24} {medida["throughput_rps"]:>9.1f} req/s  '
+            f'p50 {medida["p50_ms"]:>8.2f}  p95 {medida["p95_ms"]:>8.2f}  p99 {medida["p99_ms"]:>8.2f} ms  '
+            f'{medida["consultas"]:>3} consultas  {medida["errores"]} errores',
+            file=sys.stderr,
+        )
+
+    salida = json.dumps(resultados, indent=2, ensure_ascii=False)
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            f.write(salida)
+    else:
+        print(salida)
+    if args.guardar_baseline:
+        with open(args.guardar_baseline, 'w') as f:
+            f.write(salida)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for clave in ('concurrencia', 'datos'):
+            if baseline.get('meta', {}).get(clave) != resultados['meta'][clave]:
+                print(f'Aviso: el baseline usa otro valor de {clave!r}; la comparación puede no ser válida.',
+                      file=sys.stderr)
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        if regresiones:
+            print('\n*** REGRESIONES DE RENDIMIENTO ***', file=sys.stderr)
+            for regresion in regresiones:
+                print(f'  - {regresion}', file=sys.stderr)
+            sys.exit(1)
+        print('Sin regresiones respecto al baseline.', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Generador de datos para los benchmarks.
+
+    python -m benchmarks.seed --db bench.sqlite3 --mesas 2000 --pedidos 1000000 --usuarios 5000 --sucursales 4
+
+Crea mesas, pedidos con sus líneas y usuarios repartidos entre sucursales y entre los
+grupos 'Administradores' y 'Empleados' con bulk_create por lotes. Con --db los datos quedan en un
+fichero SQLite reutilizable por benchmarks.run (--db).
+"""
+
+import argparse
+import os
+import random
+import time
+from decimal import Decimal
+
+# Contraseña de todos los usuarios generados (el hash se calcula una sola vez)
+PASSWORD = 'Bench-Pass-2024!'
+
+# Carta de los pedidos generados: nombre y precio
+PLATOS = {
+    'Pizza margarita': Decimal('11.50'), 'Lasaña': Decimal('12.00'),
+    'Ensalada césar': Decimal('8.75'), 'Paella': Decimal('15.90'),
+    'Tortilla': Decimal('7.20'), 'Hamburguesa': Decimal('10.40'),
+    'Agua': Decimal('1.50'), 'Refresco': Decimal('2.30'),
+    'Café': Decimal('1.80'), 'Tarta de queso': Decimal('5.60'),
+}
+
+
+def obtener_productos():
+    """Retorna los productos de PLATOS, creando los que falten."""
+    from restaurant.models import Producto
+
+    existentes = {p.nombre: p for p in Producto.objects.filter(nombre__in=PLATOS)}
+    Producto.objects.bulk_create(
+        [Producto(nombre=nombre, precio=precio) for nombre, precio in PLATOS.items() if nombre not in existentes],
+        ignore_conflicts=True,
+    )
+    return list(Producto.objects.filter(nombre__in=PLATOS).order_by('pk'))
+
+
+def obtener_sucursales(n):
+    """Retorna las `n` primeras sucursales activas, creando las que falten."""
+    from restaurant.models import Sucursal
+
+    sucursales = list(Sucursal.objects.filter(activa=True).order_by('pk')[:n])
+    for i in range(len(sucursales), n):
+        sucursales.append(Sucursal.objects.create(nombre=f'Sucursal {i + 1}', codigo=f'sucursal-{i + 1}'))
+    return sucursales
+
+
+def seed_restaurante(mesas=50, pedidos=5000, usuarios=200, admins=0.1,
+                     semilla=1, batch_size=5000, progreso=None, sucursales=1):
+    """
+    Crea `mesas`, `pedidos` (con sus líneas) y `usuarios` (una fracción
+    `admins` en 'Administradores', el resto en 'Empleados') con bulk_create,
+    repartidos entre `sucursales` sucursales. `progreso(mensaje)` recibe
+    avisos de avance.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import Group, User
+    from restaurant.models import Membresia, Mesa, Pedido, PedidoItem
+    from restaurant.search import motor, reindexar_pedidos
+
+    rnd = random.Random(semilla)
+    avisar = progreso or (lambda mensaje: None)
+    estados_mesa = [e for e, _ in Mesa.ESTADO_CHOICES]
+    estados_pedido = [e for e, _ in Pedido.ESTADO_CHOICES]
+
+    lista_sucursales = obtener_sucursales(sucursales)
+    primer_numero = (Mesa.objects.order_by('-numero').values_list('numero', flat=True).first() or 0) + 1
+    lista_mesas = Mesa.objects.bulk_create([
+        Mesa(
+            sucursal=lista_sucursales[i % len(lista_sucursales)], numero=primer_numero + i,
+            capacidad=rnd.randint(2, 8), estado=rnd.choice(estados_mesa),
+        )
+        for i in range(mesas)
+    ], batch_size=batch_size)
+    avisar(f'{len(lista_mesas)} mesas en {len(lista_sucursales)} sucursales')
+
+    # bulk_create no pasa por Pedido.save(): la sucursal se copia de la mesa aquí
+    mesas_sucursal = (
+        [(mesa.id, mesa.sucursal_id) for mesa in lista_mesas] or
+        list(Mesa.objects.values_list('id', 'sucursal_id'))
+    )
+    productos = obtener_productos()
+    ultimo_pedido = Pedido.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    siguiente_id = ultimo_pedido
+    creados = 0
+    while creados < pedidos:
+        lote = min(batch_size, pedidos - creados)
+        lineas = [
+            [(rnd.choice(productos), rnd.randint(1, 4)) for _ in range(rnd.randint(1, 4))]
+            for _ in range(lote)
+        ]
+        Pedido.objects.bulk_create([
+            Pedido(
+                mesa_id=mesa_id,
+                sucursal_id=sucursal_id,
+                descripcion=', '.join(f'{cantidad} {producto.nombre}' for producto, cantidad in items),
+                # El mismo total que calcularía restaurant.sales a partir de las líneas
+                total=sum(cantidad * producto.precio for producto, cantidad in items),
+                estado=rnd.choice(estados_pedido),
+            )
+            for items, (mesa_id, sucursal_id) in zip(lineas, (rnd.choice(mesas_sucursal) for _ in range(lote)))
+        ])
+        # MySQL no devuelve los ids de bulk_create: se leen en orden de inserción
+        ids = list(
+            Pedido.objects.filter(pk__gt=siguiente_id).order_by('pk').values_list('pk', flat=True)[:lote]
+        )
+        siguiente_id = ids[-1]
+        PedidoItem.objects.bulk_create([
+            PedidoItem(pedido_id=pedido_id, producto=producto, cantidad=cantidad, precio_unitario=producto.precio)
+            for pedido_id, items in zip(ids, lineas)
+            for producto, cantidad in items
+        ], batch_size=batch_size)
+        creados += lote
+        avisar(f'{creados} pedidos')
+    if creados and motor(Pedido.objects.db) == 'indice':
+        # bulk_create no emite post_save: el índice de búsqueda se construye aparte
+        reindexar_pedidos(Pedido.objects.filter(pk__gt=ultimo_pedido), batch_size=batch_size)
+        avisar('índice de búsqueda de pedidos')
+
+    grupos = {g.name: g.id for g in Group.objects.filter(name__in=['Administradores', 'Empleados'])}
+    password = make_password(PASSWORD)
+    prefijo = f'bench{User.objects.count()}-'
+    through = User.groups.through
+    creados = 0
+    while creados < usuarios:
+        lote = min(batch_size, usuarios - creados)
+        nuevos = User.objects.bulk_create([
+            User(
+                username=f'{prefijo}{creados + i}', email=f'{prefijo}{creados + i}@test.com',
+                first_name='Ana', last_name='Pérez', password=password,
+            )
+            for i in range(lote)
+        ])
+        if grupos:
+            asignados = [
+                (user.id, grupos['Administradores' if rnd.random() < admins else 'Empleados'])
+                for user in nuevos
+            ]
+            through.objects.bulk_create([
+                through(user_id=user_id, group_id=group_id) for user_id, group_id in asignados
+            ])
+            Membresia.objects.bulk_create([
+                Membresia(user_id=user_id, group_id=group_id, sucursal=rnd.choice(lista_sucursales))
+                for user_id, group_id in asignados
+            ])
+        creados += lote
+        avisar(f'{creados} usuarios')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='Fichero SQLite (por defecto, en memoria).')
+    parser.add_argument('--mesas', type=int, default=1000)
+    parser.add_argument('--pedidos', type=int, default=100000)
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--admins', type=float, default=0.1, help='Fracción de administradores.')
+    parser.add_argument('--sucursales', type=int, default=1)
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.db:
+        os.environ['BENCH_DB'] = args.db
+    from benchmarks.utils import setup_django
+    setup_django()
+
+    inicio = time.perf_counter()
+    seed_restaurante(
+        args.mesas, args.pedidos, args.usuarios, admins=args.admins, semilla=args.semilla,
+        sucursales=args.sucursales,
+        progreso=lambda mensaje: print(f'  {mensaje}', flush=True),
+    )
+    print(f'Datos generados en {time.perf_counter() - inicio:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
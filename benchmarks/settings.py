@@ -0,0 +1,45 @@
+"""
+Settings para benchmarks: igual que config.settings pero con SQLite local.
+BENCH_DB permite usar un fichero en lugar de una base en memoria.
+BENCH_REPLICA_DB añade un segundo fichero SQLite como réplica de lectura
+(ver config/db_router.py); la réplica no se sincroniza sola, hay que migrarla
+y copiarle los datos (p. ej. copiando el fichero de BENCH_DB).
+"""
+
+import os
+
+from config.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DB', ':memory:'),
+        # Espera en lugar de fallar con "database is locked" en el modo concurrente
+        'OPTIONS': {'timeout': 30},
+    }
+}
+
+if os.environ.get('BENCH_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['BENCH_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+REPLICA_ROUTING = {**REPLICA_ROUTING, 'REPLICAS': [alias for alias in DATABASES if alias != 'default']}  # noqa: F405
+
+# Un solo proceso: la caché local no cuenta consultas de la caché en base
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# El access log no se mezcla con el informe; ACCESS_LOG_FILE lo activa
+if not os.environ.get('ACCESS_LOG_FILE'):
+    LOGGING = {**LOGGING, 'loggers': {  # noqa: F405
+        **LOGGING['loggers'],  # noqa: F405
+        'access': {'handlers': [], 'level': 'CRITICAL', 'propagate': False},
+    }}
+
+# El escenario user-login repite el login desde la misma IP
+REST_FRAMEWORK = {**REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'login': None}}  # noqa: F405
+
+DEBUG = False
+SILENCED_SYSTEM_CHECKS = ['restaurant.W001']
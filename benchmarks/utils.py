@@ -0,0 +1,25 @@
+"""
+Utilidades comunes de los benchmarks.
+"""
+
+import os
+import time
+
+
+def setup_django():
+    """Inicializa Django con benchmarks.settings y aplica las migraciones."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def medir(funcion, repeticiones=5):
+    """Ejecuta `funcion` varias veces y retorna el mejor tiempo en segundos."""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
@@ -0,0 +1,172 @@
+"""
+Enrutado de lecturas a réplicas de la base de datos.
+
+Las peticiones con método seguro (GET, HEAD, OPTIONS) leen de una réplica;
+el resto usan el primario durante toda la petición. Tras una escritura, las
+lecturas del mismo usuario van al primario durante STICKY_SECONDS para que
+vea sus propios cambios aunque la réplica tenga retraso. La marca se guarda en
+la caché de Django, que comparten todos los workers (CACHES, ver
+restaurant/checks.py). Una réplica que no
+acepta conexiones se descarta durante RETRY_SECONDS y sus lecturas van a
+otra réplica o al primario.
+
+Fuera de una petición (comandos, shell) todo va al primario salvo dentro de
+en_replica(), pensado para consultas de informes.
+"""
+
+import contextvars
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+DEFAULT_REPLICA_ROUTING = {
+    # Alias de DATABASES que son réplicas de 'default'
+    'REPLICAS': [],
+    # Segundos que un usuario lee del primario tras escribir
+    'STICKY_SECONDS': 5,
+    # Segundos que se descarta una réplica tras un fallo de conexión
+    'RETRY_SECONDS': 30,
+    # Apps que siempre leen del primario: tokens y sesiones recién creados,
+    # tipos de contenido y la caché en base (CACHE_BACKEND=db). Los usuarios y
+    # grupos (auth) se leen de la réplica como el resto; tras escribir, la
+    # lectura del primario de STICKY_SECONDS cubre al propio usuario.
+    'PRIMARY_APPS': ['authtoken', 'sessions', 'contenttypes', 'django_cache'],
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_estado = contextvars.ContextVar('replica_routing', default=None)
+
+# alias -> instante hasta el que la réplica se considera caída
+_caidas = {}
+
+
+def get_replica_settings():
+    return {**DEFAULT_REPLICA_ROUTING, **getattr(settings, 'REPLICA_ROUTING', {})}
+
+
+class _Estado:
+    """Decisión de enrutado de la petición (o bloque) en curso."""
+
+    __slots__ = ('request', 'primario', 'sticky', 'replica')
+
+    def __init__(self, request=None, primario=False):
+        self.request = request
+        self.primario = primario
+        self.sticky = None
+        self.replica = None
+
+
+def _clave_sticky(user_id):
+    return f'replica_routing:sticky:{user_id}'
+
+
+def marcar_escritura(user_id, config=None):
+    """Hace que las lecturas de `user_id` vayan al primario durante STICKY_SECONDS."""
+    config = config or get_replica_settings()
+    if config['STICKY_SECONDS'] > 0:
+        cache.set(_clave_sticky(user_id), True, config['STICKY_SECONDS'])
+
+
+def replica_disponible(alias, config):
+    """Comprueba (y recuerda) si la réplica acepta conexiones."""
+    if _caidas.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        _caidas[alias] = time.monotonic() + config['RETRY_SECONDS']
+        return False
+    _caidas.pop(alias, None)
+    return True
+
+
+def elegir_replica(config):
+    """Retorna una réplica disponible al azar, o None si no hay ninguna."""
+    candidatas = list(config['REPLICAS'])
+    random.shuffle(candidatas)
+    for alias in candidatas:
+        if replica_disponible(alias, config):
+            return alias
+    return None
+
+
+@contextmanager
+def en_replica():
+    """Lee de una réplica dentro del bloque (consultas de informes fuera de peticiones)."""
+    token = _estado.set(_Estado())
+    try:
+        yield
+    finally:
+        _estado.reset(token)
+
+
+@contextmanager
+def en_primario():
+    """Lee del primario dentro del bloque, aunque sea una petición de lectura."""
+    token = _estado.set(_Estado(primario=True))
+    try:
+        yield
+    finally:
+        _estado.reset(token)
+
+
+@contextmanager
+def enrutar_peticion(request):
+    """Fija el enrutado de lecturas durante una petición (ver ReplicaRoutingMiddleware)."""
+    token = _estado.set(_Estado(request, primario=request.method not in SAFE_METHODS))
+    try:
+        yield
+    finally:
+        _estado.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Router de base de datos: escrituras al primario y lecturas a réplicas
+    según el estado fijado por ReplicaRoutingMiddleware o en_replica().
+    """
+
+    def __init__(self):
+        self.config = get_replica_settings()
+        self.primary_apps = set(self.config['PRIMARY_APPS'])
+        self.aliases = {DEFAULT_DB_ALIAS, *self.config['REPLICAS']}
+
+    def _sticky(self, estado):
+        if estado.sticky is not None:
+            return estado.sticky
+        # DRF autentica dentro de la vista y deja el usuario en la HttpRequest
+        user = getattr(estado.request, 'user', None)
+        if user is None or not user.is_authenticated:
+            # Aún no autenticado: se vuelve a comprobar en la siguiente consulta
+            return False
+        estado.sticky = bool(cache.get(_clave_sticky(user.pk)))
+        return estado.sticky
+
+    def db_for_read(self, model, **hints):
+        if not self.config['REPLICAS'] or model._meta.app_label in self.primary_apps:
+            return DEFAULT_DB_ALIAS
+        estado = _estado.get()
+        if estado is None or estado.primario:
+            return DEFAULT_DB_ALIAS
+        if estado.request is not None and self._sticky(estado):
+            return DEFAULT_DB_ALIAS
+        if estado.replica is None:
+            # Una réplica por petición para que sus lecturas sean coherentes
+            estado.replica = elegir_replica(self.config) or DEFAULT_DB_ALIAS
+        return estado.replica
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._state.db in self.aliases and obj2._state.db in self.aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return None
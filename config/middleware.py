@@ -0,0 +1,210 @@
+"""
+Middleware del proyecto.
+"""
+
+import gzip
+import io
+import random
+import string
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from .db_router import enrutar_peticion, get_replica_settings, marcar_escritura, SAFE_METHODS
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+DEFAULT_COMPRESSION = {
+    # Respuestas más pequeñas que esto (en bytes) no se comprimen
+    'MIN_SIZE': 1024,
+    # Nivel de gzip (1-9) y calidad de brotli (0-11)
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 4,
+    # Codificaciones ofrecidas, por orden de preferencia ante empate
+    'ENCODINGS': ['br', 'gzip'],
+    # Relleno aleatorio en la cabecera gzip (mitigación de BREACH, como GZipMiddleware)
+    'MAX_RANDOM_BYTES': 100,
+}
+
+
+def get_compression_settings():
+    return {**DEFAULT_COMPRESSION, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+
+
+def parse_accept_encoding(header):
+    """Convierte 'gzip;q=0.8, br' en {'gzip': 0.8, 'br': 1.0}."""
+    aceptadas = {}
+    for parte in header.split(','):
+        nombre, _, parametros = parte.partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        aceptadas[nombre] = calidad
+    return aceptadas
+
+
+def choose_encoding(header, disponibles):
+    """
+    Elige la codificación de `disponibles` con mayor q en Accept-Encoding.
+    Ante empate gana el orden de `disponibles`. None si ninguna es aceptable.
+    """
+    aceptadas = parse_accept_encoding(header)
+    comodin = aceptadas.get('*', 0.0)
+    mejor, mejor_calidad = None, 0.0
+    for encoding in disponibles:
+        calidad = aceptadas.get(encoding, comodin)
+        if calidad > mejor_calidad:
+            mejor, mejor_calidad = encoding, calidad
+    return mejor
+
+
+class _Compresor:
+    """Interfaz común de compresión incremental para gzip y brotli."""
+
+    def __init__(self, encoding, config):
+        self.buffer = io.BytesIO()
+        if encoding == 'br':
+            self.brotli = brotli.Compressor(quality=config['BROTLI_QUALITY'])
+            self.gzip = None
+        else:
+            self.brotli = None
+            filename = None
+            if config['MAX_RANDOM_BYTES']:
+                filename = ''.join(random.choices(
+                    string.printable, k=random.randint(1, config['MAX_RANDOM_BYTES'])
+                )).encode('latin-1')
+            self.gzip = gzip.GzipFile(
+                filename=filename, mode='wb', compresslevel=config['GZIP_LEVEL'],
+                fileobj=self.buffer, mtime=0,
+            )
+
+    def _leer(self):
+        datos = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return datos
+
+    def comprimir(self, datos):
+        if self.brotli is not None:
+            return self.brotli.process(datos)
+        self.gzip.write(datos)
+        return self._leer()
+
+    def terminar(self):
+        if self.brotli is not None:
+            return self.brotli.finish()
+        self.gzip.close()
+        return self._leer()
+
+
+def compress(datos, encoding, config):
+    compresor = _Compresor(encoding, config)
+    return compresor.comprimir(datos) + compresor.terminar()
+
+
+def compress_sequence(secuencia, encoding, config):
+    compresor = _Compresor(encoding, config)
+    for fragmento in secuencia:
+        datos = compresor.comprimir(fragmento)
+        if datos:
+            yield datos
+    yield compresor.terminar()
+
+
+async def compress_async_sequence(secuencia, encoding, config):
+    compresor = _Compresor(encoding, config)
+    async for fragmento in secuencia:
+        datos = compresor.comprimir(fragmento)
+        if datos:
+            yield datos
+    yield compresor.terminar()
+
+
+class CompressionMiddleware:
+    """
+    Comprime las respuestas con brotli (si está instalado) o gzip según
+    Accept-Encoding, respetando los valores q del cliente.
+    Sustituye a django.middleware.gzip.GZipMiddleware; se configura con
+    RESPONSE_COMPRESSION en settings (ver DEFAULT_COMPRESSION).
+    Admite respuestas en streaming, síncronas y asíncronas.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_compression_settings()
+        self.encodings = [
+            encoding for encoding in self.config['ENCODINGS']
+            if encoding == 'gzip' or (encoding == 'br' and brotli is not None)
+        ]
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.config['MIN_SIZE']:
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compress_async_sequence(
+                    response.streaming_content, encoding, self.config
+                )
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, encoding, self.config
+                )
+            # El tamaño comprimido no se conoce hasta terminar el stream
+            del response.headers['Content-Length']
+        else:
+            comprimido = compress(response.content, encoding, self.config)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        # Un ETag fuerte deja de ser válido para el cuerpo comprimido
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Fija el enrutado de lecturas de cada petición (ver config/db_router.py)
+    y, tras una escritura de un usuario autenticado, lo fija al primario
+    durante unos segundos (read-your-writes).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = get_replica_settings()
+
+    def __call__(self, request):
+        with enrutar_peticion(request):
+            response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 500:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                marcar_escritura(user.pk, self.config)
+        return response
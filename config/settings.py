@@ -5,6 +5,8 @@ Django settings for Restaurant API project.
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-dev-key-change-in-production')
@@ -13,6 +15,11 @@ DEBUG = os.environ.get('DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = ['*']
 
+# Perfil solo API (API_ONLY=1): sin admin, sesiones, mensajes, estáticos ni
+# plantillas. Los clientes se autentican con token, así que los workers que
+# solo sirven la API arrancan más rápido (ver benchmarks/bench_startup.py).
+API_ONLY = os.environ.get('API_ONLY', '0') == '1'
+
 # Application definition
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -27,10 +34,28 @@ INSTALLED_APPS = [
     # Local apps
     'users',
     'restaurant',
+    'monitoring',
+    'tasks',
 ]
+if API_ONLY:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS
+        if app not in (
+            'django.contrib.admin',
+            'django.contrib.sessions',
+            'django.contrib.messages',
+            'django.contrib.staticfiles',
+        )
+    ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'config.middleware.ReplicaRoutingMiddleware',
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.AccessLogMiddleware',
+    'monitoring.profiling.ProfilingMiddleware',
+    # Antes que cualquier middleware que lea o modifique el cuerpo de la respuesta
+    'config.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -38,10 +63,114 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
+if API_ONLY:
+    # Sin sesiones no hay CSRF que comprobar; DRF asigna request.user al autenticar
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware not in (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.middleware.csrf.CsrfViewMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+        )
+    ]
+
+# Compresión de respuestas (ver config/middleware.py)
+RESPONSE_COMPRESSION = {
+    'MIN_SIZE': int(os.environ.get('COMPRESSION_MIN_SIZE', '1024')),
+    'GZIP_LEVEL': int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6')),
+    'BROTLI_QUALITY': int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4')),
+}
+
+# Logging: access log estructurado (JSON) escrito por un hilo de fondo
+# desde una cola acotada (ver monitoring/logging.py).
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'monitoring.logging.JSONFormatter',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'access': {
+            'class': 'monitoring.logging.AsyncHandler',
+            'formatter': 'json',
+            'filename': os.environ.get('ACCESS_LOG_FILE') or None,
+            'maxsize': int(os.environ.get('ACCESS_LOG_QUEUE_SIZE', '10000')),
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': 'WARNING',
+    },
+    'loggers': {
+        'access': {
+            'handlers': ['access'],
+            'level': os.environ.get('ACCESS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'tasks': {
+            'level': 'INFO',
+        },
+        'restaurant.eventos': {
+            'level': 'INFO',
+        },
+    },
+}
+
+# Métricas (ver monitoring/metrics.py). Con varios workers, METRICS_DIR debe
+# apuntar a un directorio compartido por todos los procesos.
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Perfilado de peticiones (ver monitoring/profiling.py). Desactivado por defecto.
+PROFILING = {
+    'ENABLED': os.environ.get('PROFILING_ENABLED', '0') == '1',
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', '0.01')),
+    'SLOW_THRESHOLD': float(os.environ.get('PROFILING_SLOW_THRESHOLD', '1.0')),
+    'DIR': os.environ.get('PROFILING_DIR', str(BASE_DIR / 'profiles')),
+    'MAX_PROFILES': int(os.environ.get('PROFILING_MAX_PROFILES', '100')),
+}
+
+# Idempotency-Key en la creación de pedidos (ver restaurant/idempotency.py)
+IDEMPOTENCY = {
+    'TTL': int(os.environ.get('IDEMPOTENCY_TTL', str(24 * 60 * 60))),
+    'LOCK_TIMEOUT': int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', '60')),
+}
+
+# Búsqueda de pedidos: 'auto' (FULLTEXT en MySQL, índice propio en el resto),
+# 'fulltext' o 'indice' (ver restaurant/search.py)
+SEARCH = {
+    'BACKEND': os.environ.get('SEARCH_BACKEND', 'auto'),
+}
+
+# Tabla de permisos en memoria (ver restaurant/policy.py)
+POLICY = {
+    'CHECK_INTERVAL': int(os.environ.get('POLICY_CHECK_INTERVAL', '5')),
+}
+
+# Estado de la sala (ver restaurant/floor.py)
+FLOOR = {
+    'DELTA_MARGIN_SECONDS': int(os.environ.get('FLOOR_DELTA_MARGIN_SECONDS', '5')),
+}
+
+# Cola de tareas en segundo plano (ver tasks/registry.py y el comando procesar_tareas)
+TASKS = {
+    'EAGER': os.environ.get('TASKS_EAGER', '0') == '1',
+    'LOCK_TIMEOUT': int(os.environ.get('TASKS_LOCK_TIMEOUT', '300')),
+    'POLL_INTERVAL': float(os.environ.get('TASKS_POLL_INTERVAL', '1.0')),
+}
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'no-reply@restaurant.local')
 
 ROOT_URLCONF = 'config.urls'
 
-TEMPLATES = [
+TEMPLATES = [] if API_ONLY else [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
@@ -74,6 +203,74 @@ DATABASES = {
     }
 }
 
+# DB_ENGINE=sqlite: SQLite local para tests y desarrollo, sin MySQL.
+# No se admite una base en memoria: cada conexión (cada hilo del servidor, el
+# worker de tareas...) tendría la suya, vacía y sin migrar. Los tests crean su
+# propia base en memoria sea cual sea SQLITE_NAME.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'mysql')
+if DB_ENGINE == 'sqlite':
+    SQLITE_NAME = os.environ.get('SQLITE_NAME', str(BASE_DIR / 'db.sqlite3'))
+    if SQLITE_NAME == ':memory:' or 'mode=memory' in SQLITE_NAME:
+        raise ImproperlyConfigured(
+            'SQLITE_NAME no puede ser una base en memoria: cada conexión tendría '
+            'la suya. Use un fichero, p. ej. SQLITE_NAME=/tmp/restaurant.sqlite3.'
+        )
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': SQLITE_NAME,
+            # Espera en lugar de fallar con "database is locked" con varios hilos
+            'OPTIONS': {'timeout': 30},
+        }
+    }
+
+# Réplicas de lectura: MYSQL_REPLICA_HOSTS=host1,host2 (ver config/db_router.py)
+_REPLICA_HOSTS = [
+    host.strip() for host in os.environ.get('MYSQL_REPLICA_HOSTS', '').split(',')
+    if host.strip() and DB_ENGINE == 'mysql'
+]
+DATABASES.update({
+    f'replica_{i}': {**DATABASES['default'], 'HOST': host, 'TEST': {'MIRROR': 'default'}}
+    for i, host in enumerate(_REPLICA_HOSTS, 1)
+})
+
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+
+REPLICA_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias.startswith('replica_')],
+    'STICKY_SECONDS': int(os.environ.get('REPLICA_STICKY_SECONDS', '5')),
+    'RETRY_SECONDS': int(os.environ.get('REPLICA_RETRY_SECONDS', '30')),
+}
+
+# Caché compartida por todos los procesos: versiones de la tabla de permisos
+# y de los ids de grupos (restaurant/versions.py) y lecturas del primario tras
+# escribir (config/db_router.py). Con una caché local de cada proceso, los
+# demás workers no verían esos cambios (ver restaurant/checks.py).
+# CACHE_BACKEND: 'db' (tabla de la base, se crea en migrate), 'redis'
+# (REDIS_URL, necesita el paquete redis) o 'locmem' (un solo proceso).
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'redis' if os.environ.get('REDIS_URL') else 'db')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/0'),
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -83,7 +280,7 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'users.passwords.CommonPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
@@ -102,5 +299,27 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON con orjson si está instalado (ver restaurant/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'restaurant.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'restaurant.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Intentos de login por IP (users.views.LoginRateThrottle); vacío lo desactiva
+    'DEFAULT_THROTTLE_RATES': {
+        'login': os.environ.get('LOGIN_THROTTLE_RATE', '10/min') or None,
+    },
 }
 
+if API_ONLY:
+    # Sin sesiones ni plantillas: solo token/básica y solo JSON
+    REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'].remove(
+        'rest_framework.authentication.SessionAuthentication'
+    )
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].remove(
+        'rest_framework.renderers.BrowsableAPIRenderer'
+    )
@@ -0,0 +1,83 @@
+"""
+Tests del enrutado de lecturas a réplicas (config/db_router.py).
+
+    DB_ENGINE=sqlite python manage.py test
+"""
+
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from restaurant.models import Pedido
+from . import db_router
+from .db_router import ReplicaRouter, en_primario, enrutar_peticion, marcar_escritura
+
+REPLICA_ROUTING = {'REPLICAS': ['replica'], 'STICKY_SECONDS': 5, 'RETRY_SECONDS': 30}
+
+
+class _Conexion:
+    """Conexión falsa de la réplica: cuenta los intentos y puede fallar."""
+
+    def __init__(self, caida=False):
+        self.caida = caida
+        self.intentos = 0
+
+    def ensure_connection(self):
+        self.intentos += 1
+        if self.caida:
+            raise OperationalError('réplica caída')
+
+
+@override_settings(REPLICA_ROUTING=REPLICA_ROUTING)
+class ReplicaRouterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('camarero')
+        cls.otro = User.objects.create_user('cocinero')
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.replica = _Conexion()
+        for parche in (
+            mock.patch.object(db_router, 'connections', {'replica': self.replica}),
+            mock.patch.dict(db_router._caidas, clear=True),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+
+    def leer(self, metodo='GET', user=None, model=Pedido):
+        request = SimpleNamespace(method=metodo, user=user or AnonymousUser())
+        with enrutar_peticion(request):
+            return self.router.db_for_read(model)
+
+    def test_lecturas_a_la_replica(self):
+        self.assertEqual(self.leer(), 'replica')
+        self.assertEqual(self.leer(user=self.user, model=User), 'replica')
+        self.assertEqual(self.router.db_for_write(Pedido), 'default')
+
+    def test_primario(self):
+        self.assertEqual(self.leer('POST'), 'default')
+        # Fuera de una petición y en en_primario() se lee del primario
+        self.assertEqual(self.router.db_for_read(Pedido), 'default')
+        request = SimpleNamespace(method='GET', user=AnonymousUser())
+        with enrutar_peticion(request), en_primario():
+            self.assertEqual(self.router.db_for_read(Pedido), 'default')
+
+    def test_primario_tras_escribir(self):
+        marcar_escritura(self.user.pk)
+        self.assertEqual(self.leer(user=self.user), 'default')
+        self.assertEqual(self.leer(user=self.otro), 'replica')
+
+    def test_replica_caida(self):
+        self.replica.caida = True
+        self.assertEqual(self.leer(), 'default')
+        self.assertEqual(self.leer(), 'default')
+        # Se descarta durante RETRY_SECONDS: no se vuelve a intentar conectar
+        self.assertEqual(self.replica.intentos, 1)
+        self.replica.caida = False
+        db_router._caidas.clear()
+        self.assertEqual(self.leer(), 'replica')
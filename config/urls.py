@@ -1,9 +1,13 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/users/', include('users.urls')),
     path('api/', include('restaurant.urls')),
+    path('', include('monitoring.urls')),
 ]
 
+if not settings.API_ONLY:
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
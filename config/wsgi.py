@@ -6,3 +6,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
 
+# Validadores de contraseña y hasher cargados antes de la primera petición
+from users.passwords import precargar  # noqa: E402
+
+precargar()
@@ -0,0 +1,119 @@
+"""
+Logging estructurado (JSON) escrito fuera del hilo de la petición.
+
+AsyncHandler encola los registros en una cola acotada y un hilo de fondo los
+formatea y escribe. Si la cola está llena el registro se descarta (nunca se
+bloquea a un worker) y se incrementa el contador de descartes.
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+
+from . import metrics
+
+log_records_dropped_total = metrics.registry.counter(
+    'log_records_dropped_total', 'Registros de log descartados por cola llena.', ('handler',),
+)
+
+# Atributos estándar de LogRecord que no se copian como campos extra
+_ATRIBUTOS_RECORD = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JSONFormatter(logging.Formatter):
+    """Formatea el registro como una línea JSON con sus campos extra."""
+
+    def format(self, record):
+        datos = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _ATRIBUTOS_RECORD and not clave.startswith('_'):
+                datos[clave] = valor
+        if record.exc_info:
+            datos['exc'] = self.formatException(record.exc_info)
+        return json.dumps(datos, default=str, ensure_ascii=False)
+
+
+class AsyncHandler(logging.Handler):
+    """
+    Handler que escribe en `filename` (o en stderr) desde un hilo de fondo.
+    `maxsize` acota la cola en memoria; `dropped` cuenta los descartes.
+    """
+
+    def __init__(self, filename=None, maxsize=10000, level=logging.NOTSET):
+        super().__init__(level)
+        self.filename = filename
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._cola = None
+        self._hilo = None
+        self._pid = None
+        self._arranque = threading.Lock()
+
+    def _asegurar_hilo(self):
+        # Arranque perezoso: tras un fork cada worker crea su propia cola e hilo
+        if self._pid == os.getpid():
+            return
+        with self._arranque:
+            if self._pid != os.getpid():
+                self._cola = queue.Queue(self.maxsize)
+                self._hilo = threading.Thread(target=self._escribir, name='async-log-writer', daemon=True)
+                self._pid = os.getpid()
+                self._hilo.start()
+
+    def emit(self, record):
+        self._asegurar_hilo()
+        try:
+            self._cola.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            log_records_dropped_total.inc(self.name or type(self).__name__)
+
+    def _abrir(self):
+        if self.filename:
+            return open(self.filename, 'a', encoding='utf-8')
+        # stderr como el resto de logs: stdout queda para la salida de los comandos
+        return sys.stderr
+
+    def _escribir(self):
+        salida = self._abrir()
+        cola = self._cola
+        while True:
+            record = cola.get()
+            if record is None:
+                break
+            try:
+                salida.write(self.format(record) + '\n')
+            except Exception:
+                self.handleError(record)
+            # Se agrupan las escrituras: flush solo cuando la cola se vacía
+            if cola.empty():
+                salida.flush()
+        salida.flush()
+        if salida is not sys.stderr:
+            salida.close()
+
+    def close(self):
+        if self._pid == os.getpid() and self._hilo is not None:
+            try:
+                self._cola.put(None, timeout=1)
+            except queue.Full:
+                pass
+            self._hilo.join(timeout=5)
+            self._pid = None
+        super().close()
+
+
+def wait_for_queue(handler, timeout=5.0):
+    """Espera a que el handler haya escrito lo encolado (útil en tests y scripts)."""
+    limite = time.monotonic() + timeout
+    while handler._cola is not None and not handler._cola.empty() and time.monotonic() < limite:
+        time.sleep(0.01)
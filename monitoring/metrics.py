@@ -0,0 +1,324 @@
+"""
+Registro de métricas en proceso (contadores e histogramas) con exposición
+en el formato de texto de Prometheus.
+
+Cada proceso acumula sus valores en memoria; registrar un valor cuesta un
+lock y una actualización de diccionario. Con METRICS_DIR configurado (varios
+workers de un servidor pre-fork), un hilo de fondo de cada proceso vuelca
+periódicamente sus valores a METRICS_DIR/metrics_<pid>_<id>.json y el
+endpoint de scrape suma los ficheros de todos los procesos. Los de procesos
+terminados se acumulan en metrics_terminados.json.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: no se recogen los ficheros de procesos terminados
+    fcntl = None
+
+FICHERO_TERMINADOS = 'metrics_terminados.json'
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0,
+)
+
+
+class Metric:
+    """Definición de una métrica; los valores se guardan en el Registry."""
+    tipo = None
+
+    def __init__(self, registry, nombre, ayuda, etiquetas=()):
+        self.registry = registry
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+
+    def _clave(self, valores):
+        if len(valores) != len(self.etiquetas):
+            raise ValueError(f'{self.nombre} espera las etiquetas {self.etiquetas}')
+        return (self.nombre, tuple(str(v) for v in valores))
+
+
+class Counter(Metric):
+    tipo = 'counter'
+
+    def inc(self, *valores, cantidad=1):
+        self.registry._sumar(self._clave(valores), cantidad)
+
+
+class Histogram(Metric):
+    tipo = 'histogram'
+
+    def __init__(self, registry, nombre, ayuda, etiquetas=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, valor, *valores):
+        indice = bisect.bisect_left(self.buckets, valor)
+        self.registry._observar(self._clave(valores), indice, valor, len(self.buckets) + 1)
+
+
+class Registry:
+    """
+    Contenedor de métricas de un proceso.
+    Los contadores se guardan como {clave: valor} y los histogramas como
+    {clave: [conteos por bucket (sin acumular), suma]}.
+    """
+
+    def __init__(self, directorio=None, intervalo=1.0):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self.metricas = {}
+        self._lock = threading.Lock()
+        self._lock_volcado = threading.Lock()
+        self._reiniciar()
+        if directorio:
+            atexit.register(self.volcar)
+
+    def _reiniciar(self):
+        self._pid = os.getpid()
+        # Nombre único por proceso: un pid reutilizado no pisa el fichero de otro
+        self._fichero = f'metrics_{self._pid}_{uuid.uuid4().hex[:8]}.json'
+        self._contadores = {}
+        self._histogramas = {}
+        self._volcador = None
+
+    def _registrar(self, metrica):
+        existente = self.metricas.get(metrica.nombre)
+        if existente is not None:
+            return existente
+        self.metricas[metrica.nombre] = metrica
+        return metrica
+
+    def counter(self, nombre, ayuda, etiquetas=()):
+        return self._registrar(Counter(self, nombre, ayuda, etiquetas))
+
+    def histogram(self, nombre, ayuda, etiquetas=(), buckets=DEFAULT_BUCKETS):
+        return self._registrar(Histogram(self, nombre, ayuda, etiquetas, buckets))
+
+    # Escritura
+
+    def _comprobar_fork(self):
+        # Tras un fork el hijo no debe volver a contar lo que acumuló el padre
+        if os.getpid() != self._pid:
+            self._reiniciar()
+        if self.directorio and self._volcador is None:
+            self._volcador = threading.Thread(target=self._volcar_periodicamente, name='metrics-dump', daemon=True)
+            self._volcador.start()
+
+    def _sumar(self, clave, cantidad):
+        with self._lock:
+            self._comprobar_fork()
+            self._contadores[clave] = self._contadores.get(clave, 0) + cantidad
+
+    def _observar(self, clave, indice, valor, num_buckets):
+        with self._lock:
+            self._comprobar_fork()
+            datos = self._histogramas.get(clave)
+            if datos is None:
+                datos = self._histogramas[clave] = [[0] * num_buckets, 0.0]
+            datos[0][indice] += 1
+            datos[1] += valor
+
+    # Multiproceso
+
+    def _volcar_periodicamente(self):
+        # Hilo de fondo (uno por proceso): el disco nunca se toca en la petición
+        while True:
+            time.sleep(self.intervalo)
+            self.volcar()
+
+    def _instantanea(self):
+        with self._lock:
+            self._comprobar_fork()
+            return _serializar(self._contadores, self._histogramas)
+
+    def volcar(self):
+        """Escribe los valores de este proceso en METRICS_DIR (de forma atómica)."""
+        if not self.directorio:
+            return
+        instantanea = self._instantanea()
+        with self._lock_volcado:
+            try:
+                os.makedirs(self.directorio, exist_ok=True)
+                _escribir(os.path.join(self.directorio, self._fichero), instantanea)
+            except OSError:
+                pass
+
+    def _recoger_terminados(self):
+        """
+        Suma los ficheros de procesos que ya no existen en
+        metrics_terminados.json y los borra, para que los contadores no
+        retrocedan ni el directorio crezca con cada worker reciclado.
+        """
+        if fcntl is None:
+            return
+        try:
+            with open(os.path.join(self.directorio, '.metrics.lock'), 'a') as cerrojo:
+                fcntl.flock(cerrojo, fcntl.LOCK_EX)
+                rutas = [
+                    ruta for ruta in glob.glob(os.path.join(self.directorio, 'metrics_*.json'))
+                    if _proceso_terminado(ruta)
+                ]
+                if not rutas:
+                    return
+                destino = os.path.join(self.directorio, FICHERO_TERMINADOS)
+                instantaneas = [_leer(ruta) for ruta in [destino] + rutas]
+                _escribir(destino, _serializar(*_combinar(i for i in instantaneas if i is not None)))
+                for ruta in rutas:
+                    os.remove(ruta)
+        except OSError:
+            pass
+
+    def _instantaneas(self):
+        """Valores de todos los procesos (o solo de este, sin METRICS_DIR)."""
+        if not self.directorio:
+            return [self._instantanea()]
+        self._recoger_terminados()
+        instantaneas = [self._instantanea()]
+        for ruta in glob.glob(os.path.join(self.directorio, 'metrics_*.json')):
+            if os.path.basename(ruta) == self._fichero:
+                continue
+            instantanea = _leer(ruta)
+            if instantanea is not None:
+                instantaneas.append(instantanea)
+        return instantaneas
+
+    # Exposición
+
+    def exposicion(self):
+        """Retorna todas las métricas en el formato de texto de Prometheus."""
+        contadores, histogramas = _combinar(self._instantaneas())
+
+        lineas = []
+        for metrica in sorted(self.metricas.values(), key=lambda m: m.nombre):
+            lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+            lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+            if metrica.tipo == 'counter':
+                for (nombre, valores), valor in sorted(contadores.items()):
+                    if nombre == metrica.nombre:
+                        lineas.append(f'{nombre}{_etiquetas(metrica.etiquetas, valores)} {_numero(valor)}')
+                continue
+            for (nombre, valores), (conteos, suma) in sorted(histogramas.items()):
+                if nombre != metrica.nombre:
+                    continue
+                acumulado = 0
+                for limite, conteo in zip(list(metrica.buckets) + [math.inf], conteos):
+                    acumulado += conteo
+                    le = '+Inf' if limite == math.inf else _numero(limite)
+                    etiquetas = _etiquetas(metrica.etiquetas + ('le',), valores + (le,))
+                    lineas.append(f'{nombre}_bucket{etiquetas} {acumulado}')
+                etiquetas = _etiquetas(metrica.etiquetas, valores)
+                lineas.append(f'{nombre}_sum{etiquetas} {_numero(suma)}')
+                lineas.append(f'{nombre}_count{etiquetas} {acumulado}')
+        return '\n'.join(lineas) + '\n'
+
+
+def _serializar(contadores, histogramas):
+    return {
+        'contadores': [[n, list(e), v] for (n, e), v in contadores.items()],
+        'histogramas': [[n, list(e), list(d[0]), d[1]] for (n, e), d in histogramas.items()],
+    }
+
+
+def _combinar(instantaneas):
+    """Suma varias instantáneas en ({clave: valor}, {clave: [conteos, suma]})."""
+    contadores = {}
+    histogramas = {}
+    for instantanea in instantaneas:
+        for nombre, etiquetas, valor in instantanea['contadores']:
+            clave = (nombre, tuple(etiquetas))
+            contadores[clave] = contadores.get(clave, 0) + valor
+        for nombre, etiquetas, conteos, suma in instantanea['histogramas']:
+            clave = (nombre, tuple(etiquetas))
+            actual = histogramas.get(clave)
+            if actual is None or len(actual[0]) != len(conteos):
+                histogramas[clave] = [list(conteos), suma]
+            else:
+                actual[0] = [a + b for a, b in zip(actual[0], conteos)]
+                actual[1] += suma
+    return contadores, histogramas
+
+
+def _leer(ruta):
+    try:
+        with open(ruta) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir(ruta, instantanea):
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'w') as f:
+        json.dump(instantanea, f)
+    os.replace(temporal, ruta)
+
+
+def _proceso_terminado(ruta):
+    """Indica si el proceso que escribió metrics_<pid>_<id>.json ya no existe."""
+    partes = os.path.basename(ruta).split('_')
+    if len(partes) != 3 or not partes[1].isdigit():
+        return False
+    try:
+        os.kill(int(partes[1]), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ''
+    return '{' + ','.join(f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor))
+
+
+registry = Registry(
+    directorio=getattr(settings, 'METRICS_DIR', None),
+    intervalo=getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0),
+)
+
+# Métricas de la aplicación
+
+http_requests_total = registry.counter(
+    'http_requests_total', 'Peticiones HTTP atendidas.', ('route', 'method', 'status'),
+)
+http_request_duration_seconds = registry.histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones HTTP en segundos.', ('route', 'method'),
+)
+auth_login_total = registry.counter(
+    'auth_login_total', 'Intentos de inicio de sesión por resultado.', ('resultado',),
+)
+permission_checks_total = registry.counter(
+    'permission_checks_total', 'Comprobaciones de permisos por permiso exigido y resultado.', ('permiso', 'resultado'),
+)
+pedido_transiciones_total = registry.counter(
+    'pedido_transiciones_total', 'Cambios de estado de pedidos (desde vacío = creación).', ('desde', 'hacia'),
+)
+tasks_total = registry.counter(
+    'tasks_total', 'Ejecuciones de tareas en segundo plano por resultado.', ('tarea', 'resultado'),
+)
+task_duration_seconds = registry.histogram(
+    'task_duration_seconds', 'Duración de las tareas en segundo plano en segundos.', ('tarea',),
+)
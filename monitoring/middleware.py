@@ -0,0 +1,126 @@
+"""
+Middleware de monitorización.
+"""
+
+import logging
+import threading
+import time
+import uuid
+
+from . import metrics
+from .sql import SQLRecorder
+
+access_logger = logging.getLogger('access')
+
+
+def route_name(request):
+    """Nombre de la ruta resuelta (acotado para no disparar la cardinalidad)."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'sin_ruta'
+    return match.view_name or match.route or 'sin_nombre'
+
+
+class _RoleCache:
+    """Caché por proceso de rol por usuario (evita una consulta por petición)."""
+
+    def __init__(self, ttl=60.0, maximo=10000):
+        self.ttl = ttl
+        self.maximo = maximo
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, user):
+        ahora = time.monotonic()
+        entrada = self._datos.get(user.pk)
+        if entrada is not None and entrada[0] > ahora:
+            return entrada[1]
+        if user.is_superuser:
+            rol = 'superuser'
+        else:
+            rol = ','.join(sorted(user.groups.values_list('name', flat=True))) or 'sin_grupo'
+        with self._lock:
+            if len(self._datos) >= self.maximo:
+                self._datos.clear()
+            self._datos[user.pk] = (ahora + self.ttl, rol)
+        return rol
+
+
+_roles = _RoleCache()
+
+
+def user_role(user):
+    """Rol del usuario para los logs: 'superuser' o los nombres de sus grupos."""
+    return _roles.obtener(user)
+
+
+class MetricsMiddleware:
+    """
+    Registra número de peticiones y latencia por ruta, método y estado.
+    Debe ir lo más arriba posible en MIDDLEWARE para medir la petición completa.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        ruta = route_name(request)
+        metrics.http_request_duration_seconds.observe(duracion, ruta, request.method)
+        metrics.http_requests_total.inc(ruta, request.method, response.status_code)
+        return response
+
+
+class AccessLogMiddleware:
+    """
+    Escribe una línea de log estructurada por petición en el logger 'access':
+    request id, usuario y rol, ruta, estado, tiempos total/SQL/serialización
+    y tamaño de la respuesta. Propaga (o genera) la cabecera X-Request-ID.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.META.get('HTTP_X_REQUEST_ID', '')
+        if not (0 < len(request_id) <= 64 and request_id.replace('-', '').isalnum()):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        request._tiempo_serializacion = 0.0
+
+        inicio = time.perf_counter()
+        with SQLRecorder() as sql:
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+        response['X-Request-ID'] = request_id
+
+        user = getattr(request, 'user', None)
+        autenticado = user is not None and user.is_authenticated
+        access_logger.info('access', extra={
+            'request_id': request_id,
+            'user_id': user.pk if autenticado else None,
+            'role': user_role(user) if autenticado else 'anonimo',
+            'method': request.method,
+            'route': route_name(request),
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(duracion * 1000, 3),
+            'db_ms': round(sql.tiempo * 1000, 3),
+            'db_queries': sql.num_consultas,
+            'serialization_ms': round(request._tiempo_serializacion * 1000, 3),
+            'response_bytes': None if response.streaming else len(response.content),
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        # Se llama justo antes de render(); el callback mide hasta el final del render
+        inicio = time.perf_counter()
+
+        def fin_render(respuesta):
+            request._tiempo_serializacion += time.perf_counter() - inicio
+
+        response.add_post_render_callback(fin_render)
+        return response
@@ -0,0 +1,244 @@
+"""
+Perfilado bajo demanda de peticiones lentas o muestreadas.
+
+Con PROFILING['ENABLED'] el ProfilingMiddleware:
+- perfila con cProfile una fracción SAMPLE_RATE de las peticiones;
+- guarda también cualquier petición que supere SLOW_THRESHOLD segundos.
+
+Un único hilo muestreador toma la pila de las peticiones perfiladas y de las
+que ya superan el umbral cada SAMPLING_INTERVAL segundos (formato "collapsed"
+para flame graphs); sin ninguna de ellas no se despierta. Las peticiones no
+muestreadas solo anotan su inicio y cuentan sus consultas; el SQL de una
+petición lenta se guarda desde que supera el umbral. Cada perfil se guarda en
+un buffer circular en disco de MAX_PROFILES entradas.
+Desactivado, el middleware no se instala (MiddlewareNotUsed).
+"""
+
+import cProfile
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .middleware import route_name
+from .sql import SQLRecorder
+
+DEFAULT_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.01,
+    'SLOW_THRESHOLD': 1.0,
+    'SAMPLING_INTERVAL': 0.005,
+    'DIR': None,
+    'MAX_PROFILES': 100,
+    'MAX_QUERIES': 500,
+}
+
+FORMATOS = {
+    'pstats': ('.prof', 'application/octet-stream'),
+    'collapsed': ('.collapsed', 'text/plain; charset=utf-8'),
+}
+
+
+def get_profiling_settings():
+    config = {**DEFAULT_PROFILING, **getattr(settings, 'PROFILING', {})}
+    if not config['DIR']:
+        config['DIR'] = os.path.join(settings.BASE_DIR, 'profiles')
+    return config
+
+
+class ProfileStore:
+    """
+    Buffer circular de perfiles en disco. Cada perfil es <id>.json
+    (metadatos y SQL) más, opcionalmente, <id>.prof y <id>.collapsed.
+    Los ids empiezan por la marca de tiempo, así que ordenan cronológicamente.
+    """
+
+    def __init__(self, directorio, maximo):
+        self.directorio = directorio
+        self.maximo = maximo
+
+    def _ruta(self, perfil_id, extension):
+        if not perfil_id.replace('-', '').isalnum():
+            raise ValueError('id de perfil no válido')
+        return os.path.join(self.directorio, perfil_id + extension)
+
+    def guardar(self, metadatos, perfil=None, pilas=None):
+        os.makedirs(self.directorio, exist_ok=True)
+        perfil_id = f'{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}'
+        metadatos = {**metadatos, 'id': perfil_id, 'formatos': []}
+        if perfil is not None:
+            perfil.dump_stats(self._ruta(perfil_id, '.prof'))
+            metadatos['formatos'].append('pstats')
+        if pilas:
+            with open(self._ruta(perfil_id, '.collapsed'), 'w') as f:
+                for pila, cuenta in sorted(pilas.items()):
+                    f.write(f'{pila} {cuenta}\n')
+            metadatos['formatos'].append('collapsed')
+        with open(self._ruta(perfil_id, '.json'), 'w') as f:
+            json.dump(metadatos, f)
+        self.recortar()
+        return perfil_id
+
+    def ids(self):
+        if not os.path.isdir(self.directorio):
+            return []
+        return sorted(
+            (nombre[:-5] for nombre in os.listdir(self.directorio) if nombre.endswith('.json')),
+            reverse=True,
+        )
+
+    def recortar(self):
+        for perfil_id in self.ids()[self.maximo:]:
+            for extension in ('.json', '.prof', '.collapsed'):
+                try:
+                    os.remove(self._ruta(perfil_id, extension))
+                except OSError:
+                    pass
+
+    def metadatos(self, perfil_id):
+        try:
+            with open(self._ruta(perfil_id, '.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def ruta_formato(self, perfil_id, formato):
+        ruta = self._ruta(perfil_id, FORMATOS[formato][0])
+        return ruta if os.path.exists(ruta) else None
+
+
+def collapsed_stack(frame):
+    """Convierte una pila en 'mod:func;mod:func' (de la raíz a la hoja)."""
+    partes = []
+    while frame is not None:
+        codigo = frame.f_code
+        partes.append(f'{os.path.basename(codigo.co_filename)}:{codigo.co_name}:{frame.f_lineno}')
+        frame = frame.f_back
+    return ';'.join(reversed(partes))
+
+
+class _Muestreador(threading.Thread):
+    """
+    Hilo que toma muestras de la pila de las peticiones activas. Solo se
+    despierta cada `intervalo` mientras haya una petición muestreada o que ya
+    supera el umbral; si no, duerme hasta que la más antigua pueda superarlo.
+    """
+
+    def __init__(self, intervalo, umbral):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.intervalo = intervalo
+        self.umbral = umbral
+        self.activas = {}
+        self.despertar = threading.Event()
+
+    def _espera(self, ahora):
+        """Segundos hasta la siguiente muestra necesaria."""
+        espera = self.umbral
+        for estado in list(self.activas.values()):
+            if estado['muestreada']:
+                return self.intervalo
+            espera = min(espera, estado['inicio'] + self.umbral - ahora)
+        return max(espera, self.intervalo)
+
+    def run(self):
+        while True:
+            self.despertar.wait(self._espera(time.perf_counter()))
+            self.despertar.clear()
+            if not self.activas:
+                continue
+            ahora = time.perf_counter()
+            marcos = None
+            for hilo, estado in list(self.activas.items()):
+                if not estado['muestreada']:
+                    if ahora - estado['inicio'] < self.umbral:
+                        continue
+                    # Lenta: desde ahora se guardan también sus consultas
+                    estado['sql'].guardar_consultas = True
+                if marcos is None:
+                    marcos = sys._current_frames()
+                frame = marcos.get(hilo)
+                if frame is not None:
+                    pila = collapsed_stack(frame)
+                    estado['pilas'][pila] = estado['pilas'].get(pila, 0) + 1
+
+
+class ProfilingMiddleware:
+    """Middleware opcional de perfilado (ver la documentación del módulo)."""
+
+    _muestreador = None
+    _lock = threading.Lock()
+
+    def __init__(self, get_response):
+        self.config = get_profiling_settings()
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.store = ProfileStore(self.config['DIR'], self.config['MAX_PROFILES'])
+
+    def _iniciar_muestreador(self):
+        # Se arranca en la primera petición para que cada worker (tras el fork) tenga el suyo
+        with self._lock:
+            if ProfilingMiddleware._muestreador is None or ProfilingMiddleware._muestreador.pid != os.getpid():
+                muestreador = _Muestreador(self.config['SAMPLING_INTERVAL'], self.config['SLOW_THRESHOLD'])
+                muestreador.pid = os.getpid()
+                muestreador.start()
+                ProfilingMiddleware._muestreador = muestreador
+        return ProfilingMiddleware._muestreador
+
+    def __call__(self, request):
+        muestreador = self._muestreador
+        if muestreador is None or muestreador.pid != os.getpid():
+            muestreador = self._iniciar_muestreador()
+
+        muestreada = random.random() < self.config['SAMPLE_RATE']
+        hilo = threading.get_ident()
+        # Sin muestreo solo se cuentan las consultas; el SQL se guarda si la
+        # petición resulta lenta (lo activa el muestreador al superar el umbral)
+        sql = SQLRecorder(guardar_consultas=muestreada, limite=self.config['MAX_QUERIES'])
+        estado = {'inicio': time.perf_counter(), 'muestreada': muestreada, 'pilas': {}, 'sql': sql}
+        perfil = cProfile.Profile() if muestreada else None
+
+        muestreador.activas[hilo] = estado
+        if muestreada:
+            muestreador.despertar.set()
+        try:
+            with sql:
+                if perfil is not None:
+                    try:
+                        perfil.enable()
+                    except ValueError:
+                        # Python 3.12+: solo un perfilador activo a la vez en el proceso
+                        perfil = None
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if perfil is not None:
+                        perfil.disable()
+        finally:
+            muestreador.activas.pop(hilo, None)
+        duracion = time.perf_counter() - estado['inicio']
+
+        if muestreada or duracion >= self.config['SLOW_THRESHOLD']:
+            self.store.guardar(
+                {
+                    'fecha': time.time(),
+                    'motivo': 'muestreo' if muestreada else 'lenta',
+                    'metodo': request.method,
+                    'ruta': route_name(request),
+                    'path': request.path,
+                    'status': response.status_code,
+                    'duracion': round(duracion, 6),
+                    'tiempo_sql': round(sql.tiempo, 6),
+                    'num_consultas': sql.num_consultas,
+                    'consultas': sql.consultas,
+                },
+                perfil=perfil,
+                pilas=estado['pilas'],
+            )
+        return response
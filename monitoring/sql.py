@@ -0,0 +1,47 @@
+"""
+Registro de las consultas SQL ejecutadas durante una petición.
+"""
+
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+
+class SQLRecorder:
+    """
+    Context manager que instala un execute_wrapper en todas las conexiones
+    del hilo actual y acumula el tiempo total de base de datos.
+    Con guardar_consultas=True conserva además (alias, sql, duración) de
+    hasta `limite` consultas.
+    """
+
+    def __init__(self, guardar_consultas=False, limite=500):
+        self.guardar_consultas = guardar_consultas
+        self.limite = limite
+        self.consultas = []
+        self.num_consultas = 0
+        self.tiempo = 0.0
+        self._pila = None
+
+    def __enter__(self):
+        self._pila = ExitStack()
+        for conexion in connections.all():
+            self._pila.enter_context(conexion.execute_wrapper(self._envoltorio(conexion.alias)))
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._pila.__exit__(*exc_info)
+
+    def _envoltorio(self, alias):
+        def envoltorio(execute, sql, params, many, context):
+            inicio = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                duracion = time.perf_counter() - inicio
+                self.num_consultas += 1
+                self.tiempo += duracion
+                if self.guardar_consultas and len(self.consultas) < self.limite:
+                    self.consultas.append({'alias': alias, 'sql': sql, 'duracion': round(duracion, 6)})
+        return envoltorio
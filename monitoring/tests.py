@@ -0,0 +1,71 @@
+"""
+Tests de monitorización.
+
+    DB_ENGINE=sqlite python manage.py test
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from restaurant.models import Membresia, Sucursal
+from . import metrics
+
+
+class PerfilesTests(APITestCase):
+    """Los perfiles son de todas las sucursales: solo los ven los superusuarios."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        cls.admin = User.objects.create_user('gerente', password='x')
+        Membresia.objects.create(user=cls.admin, sucursal=sucursal, group=Group.objects.get(name='Administradores'))
+        cls.superusuario = User.objects.create_superuser('root', 'root@test.com', 'x')
+
+    def test_admin_de_sucursal(self):
+        self.client.force_authenticate(self.admin)
+        for ruta in ('/api/profiles/', '/api/profiles/1-abc/', '/api/profiles/1-abc/pstats/'):
+            with self.subTest(ruta=ruta):
+                self.assertEqual(self.client.get(ruta).status_code, 403)
+
+    def test_superusuario(self):
+        self.client.force_authenticate(self.superusuario)
+        with self.settings(PROFILING={'DIR': '/nonexistent'}):
+            response = self.client.get('/api/profiles/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+
+class MetricasTests(APITestCase):
+    """/metrics exige el token o una petición local, y etiqueta los permisos exigidos."""
+
+    @override_settings(METRICS_TOKEN='')
+    def test_sin_token_solo_local(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='::1').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.7').status_code, 403)
+        respuesta = self.client.get('/metrics', REMOTE_ADDR='127.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.7')
+        self.assertEqual(respuesta.status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 403)
+        respuesta = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_etiqueta_de_permisos(self):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=user, sucursal=sucursal, group=Group.objects.get(name='Empleados'))
+        self.client.force_authenticate(user)
+        with mock.patch.object(metrics.permission_checks_total, 'inc') as inc:
+            self.client.get('/api/pedidos/')
+            self.client.get('/api/productos/mas-vendidos/')
+            self.client.delete('/api/mesas/1/delete/')
+        self.assertEqual(inc.call_args_list, [
+            mock.call('restaurant.view_pedido', 'permitido'),
+            mock.call('restaurant.view_pedido,restaurant.view_producto', 'permitido'),
+            mock.call('restaurant.delete_mesa', 'denegado'),
+        ])
@@ -0,0 +1,14 @@
+"""
+URLs de monitorización.
+"""
+
+from django.urls import path
+
+from .views import metrics_view, profile_detail_view, profile_download_view, profile_list_view
+
+urlpatterns = [
+    path('metrics', metrics_view, name='metrics'),
+    path('api/profiles/', profile_list_view, name='profile-list'),
+    path('api/profiles/<str:profile_id>/', profile_detail_view, name='profile-detail'),
+    path('api/profiles/<str:profile_id>/<str:formato>/', profile_download_view, name='profile-download'),
+]
@@ -0,0 +1,129 @@
+"""
+Vistas de monitorización.
+"""
+
+import hmac
+import ipaddress
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseForbidden
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+
+from . import metrics
+from .profiling import FORMATOS, ProfileStore, get_profiling_settings
+
+
+def _es_local(request):
+    """
+    Petición directa desde la propia máquina. Detrás de un proxy en el mismo
+    host REMOTE_ADDR también es local, así que una petición con
+    X-Forwarded-For no cuenta como local.
+    """
+    if 'HTTP_X_FORWARDED_FOR' in request.META:
+        return False
+    try:
+        return ipaddress.ip_address(request.META.get('REMOTE_ADDR', '')).is_loopback
+    except ValueError:
+        return False
+
+
+def metrics_view(request):
+    """
+    Endpoint de scrape en formato de texto de Prometheus.
+    GET /metrics
+    Con METRICS_TOKEN exige 'Authorization: Bearer <token>'; sin él solo
+    responde a clientes locales (ver _es_local).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        recibido = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(recibido, f'Bearer {token}'):
+            return HttpResponseForbidden()
+    elif not _es_local(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.registry.exposicion(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+class EsSuperusuario(BasePermission):
+    """
+    Solo superusuarios: los perfiles son de todo el proceso y traen rutas,
+    ids de usuario y SQL de las peticiones de todas las sucursales.
+    """
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_superuser)
+
+
+def _profile_store():
+    config = get_profiling_settings()
+    return ProfileStore(config['DIR'], config['MAX_PROFILES'])
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, EsSuperusuario])
+def profile_list_view(request):
+    """
+    Lista los perfiles guardados (más recientes primero), sin las consultas SQL.
+    GET /api/profiles/
+    Solo superusuarios.
+    """
+    store = _profile_store()
+    perfiles = []
+    for perfil_id in store.ids():
+        metadatos = store.metadatos(perfil_id)
+        if metadatos is not None:
+            metadatos.pop('consultas', None)
+            perfiles.append(metadatos)
+    return Response(perfiles, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, EsSuperusuario])
+def profile_detail_view(request, profile_id):
+    """
+    Detalle de un perfil, incluidas las consultas SQL ejecutadas.
+    GET /api/profiles/<id>/
+    Solo superusuarios.
+    """
+    try:
+        metadatos = _profile_store().metadatos(profile_id)
+    except ValueError:
+        metadatos = None
+    if metadatos is None:
+        return Response(
+            {'error': f'Perfil {profile_id} no encontrado.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return Response(metadatos, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, EsSuperusuario])
+def profile_download_view(request, profile_id, formato):
+    """
+    Descarga un perfil en formato pstats (cProfile) o collapsed (flame graph).
+    GET /api/profiles/<id>/<pstats|collapsed>/
+    Solo superusuarios.
+    """
+    ruta = None
+    if formato in FORMATOS:
+        try:
+            ruta = _profile_store().ruta_formato(profile_id, formato)
+        except ValueError:
+            ruta = None
+    if ruta is None:
+        return Response(
+            {'error': f'Perfil {profile_id} no disponible en formato {formato}.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    extension, content_type = FORMATOS[formato]
+    return FileResponse(
+        open(ruta, 'rb'), as_attachment=True,
+        filename=f'{profile_id}{extension}', content_type=content_type,
+    )
@@ -1,23 +1,173 @@
 #Configuración del panel de administración para los modelos del restaurante.
-from django.contrib import admin
-from .models import Mesa, Pedido
+from django.contrib import admin, messages
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from .models import Membresia, Mesa, Pedido, PedidoArchivado, PedidoItem, Producto, Sucursal
+from .paginators import EstimatedCountPaginator
+from .sales import recalcular_totales
+from .search import buscar_texto
+
+
+class MesaAcotadaFilter(admin.SimpleListFilter):
+    """
+    Filtro por mesa que solo ofrece opciones una vez elegida la sucursal,
+    y como mucho `limite` mesas, en lugar de listar todas las mesas.
+    """
+    title = 'mesa'
+    parameter_name = 'mesa'
+    limite = 100
+
+    def lookups(self, request, model_admin):
+        sucursal = request.GET.get('sucursal__id__exact', '')
+        if not sucursal.isdigit():
+            return ()
+        mesas = (
+            Mesa.objects.filter(sucursal_id=sucursal)
+            .order_by('numero')
+            .values_list('pk', 'numero')[:self.limite]
+        )
+        return [(pk, f'Mesa {numero}') for pk, numero in mesas]
+
+    def queryset(self, request, queryset):
+        if self.value() and self.value().isdigit():
+            return queryset.filter(mesa_id=self.value())
+        return queryset
+
+
+@admin.register(Sucursal)
+class SucursalAdmin(admin.ModelAdmin):
+    """Configuración del admin para el modelo Sucursal."""
+    list_display = ('nombre', 'codigo', 'activa', 'created_at')
+    list_filter = ('activa',)
+    search_fields = ('nombre', 'codigo')
+    prepopulated_fields = {'codigo': ('nombre',)}
+
+
+@admin.register(Membresia)
+class MembresiaAdmin(admin.ModelAdmin):
+    """Configuración del admin para las membresías de usuarios en sucursales."""
+    list_display = ('user', 'sucursal', 'group')
+    list_filter = ('sucursal', 'group')
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+    list_select_related = ('user', 'sucursal', 'group')
+
+
+class MembresiaInline(admin.TabularInline):
+    """Rol del usuario en cada sucursal."""
+    model = Membresia
+    extra = 0
+    autocomplete_fields = ('sucursal',)
+
+
+admin.site.unregister(User)
+
+
+@admin.register(User)
+class UsuarioAdmin(UserAdmin):
+    """
+    Admin de usuarios con sus membresías. Los grupos de Django son el reflejo
+    de las membresías (restaurant/signals.py), así que se muestran de solo
+    lectura: el rol se cambia en cada sucursal. Los permisos de usuario sí
+    se editan aquí y la API los aplica (restaurant.policy).
+    """
+    inlines = (MembresiaInline,)
+    readonly_fields = ('groups',)
 
 
 @admin.register(Mesa)
 class MesaAdmin(admin.ModelAdmin):
     """Configuración del admin para el modelo Mesa."""
-    list_display = ('numero', 'capacidad', 'estado', 'created_at')
-    list_filter = ('estado',)
+    list_display = ('numero', 'sucursal', 'capacidad', 'estado', 'created_at')
+    list_filter = ('sucursal', 'estado')
     search_fields = ('numero',)
-    ordering = ('numero',)
+    ordering = ('sucursal', 'numero')
+    list_select_related = ('sucursal',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Búsqueda exacta por número (también la usa el autocompletado de PedidoAdmin)
+        search_term = search_term.strip()
+        if search_term.isdigit():
+            return queryset.filter(numero=int(search_term)), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(Producto)
+class ProductoAdmin(admin.ModelAdmin):
+    """Configuración del admin para el modelo Producto."""
+    list_display = ('nombre', 'precio', 'activo', 'updated_at')
+    list_filter = ('activo',)
+    list_editable = ('precio', 'activo')
+    search_fields = ('nombre',)
+
+
+class PedidoItemInline(admin.TabularInline):
+    """Líneas del pedido; el precio unitario se toma del producto al añadirlas."""
+    model = PedidoItem
+    extra = 0
+    autocomplete_fields = ('producto',)
+    readonly_fields = ('precio_unitario', 'historico')
 
 
 @admin.register(Pedido)
 class PedidoAdmin(admin.ModelAdmin):
     """Configuración del admin para el modelo Pedido."""
-    list_display = ('id', 'mesa', 'estado', 'total', 'created_at')
-    list_filter = ('estado', 'mesa')
+    list_display = ('id', 'sucursal', 'mesa', 'estado', 'total', 'created_at')
+    list_filter = ('sucursal', 'estado', MesaAcotadaFilter)
     search_fields = ('descripcion',)
+    search_help_text = 'Pedidos cuya descripción contiene todas las palabras.'
+    ordering = ('-created_at',)
+    date_hierarchy = 'created_at'
+    autocomplete_fields = ('mesa',)
+    exclude = ('sucursal',)
+    inlines = (PedidoItemInline,)
+    list_select_related = ('sucursal', 'mesa')
+    # Sin COUNT(*) completo de la tabla en cada página
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Índice FULLTEXT en MySQL en lugar de LIKE '%...%' sobre el TextField
+        return buscar_texto(queryset, search_term), False
+
+    def save_formset(self, request, form, formset, change):
+        if formset.model is not PedidoItem:
+            return super().save_formset(request, form, formset, change)
+        for item in formset.save(commit=False):
+            if item.pk is None:
+                item.precio_unitario = item.producto.precio
+            item.save()
+        for item in formset.deleted_objects:
+            item.delete()
+        if not formset.has_changed():
+            return
+        if PedidoItem.objects.filter(pedido=form.instance, historico=True).exists():
+            # Líneas históricas (migración 0011) sin precio: la suma no es el total real
+            self.message_user(
+                request,
+                'El pedido tiene líneas históricas sin precio; no se ha recalculado su total.',
+                messages.WARNING,
+            )
+            return
+        # El total pasa a ser la suma de las líneas
+        recalcular_totales([form.instance.pk])
+
+
+@admin.register(PedidoArchivado)
+class PedidoArchivadoAdmin(admin.ModelAdmin):
+    """Configuración del admin para el histórico de pedidos (solo lectura)."""
+    list_display = ('pedido_id', 'sucursal', 'mesa', 'estado', 'total', 'created_at', 'archivado_at')
+    list_filter = ('sucursal', 'estado')
     ordering = ('-created_at',)
     raw_id_fields = ('mesa',)
+    list_select_related = ('sucursal', 'mesa')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
 
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -6,3 +6,22 @@ class RestaurantConfig(AppConfig):
     name = 'restaurant'
     verbose_name = 'Gestión de Restaurante'
 
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        # Conecta el mantenimiento del índice de búsqueda
+        from . import checks, signals  # noqa: F401
+        from .groups import sembrar_grupos_post_migrate
+
+        # La tabla de CACHE_BACKEND=db se crea con las migraciones, antes de
+        # que la siembra de grupos invalide la tabla de permisos
+        post_migrate.connect(
+            checks.crear_tabla_cache, sender=self,
+            dispatch_uid='restaurant.crear_tabla_cache',
+        )
+        # Después de que auth cree los permisos de esta app
+        post_migrate.connect(
+            sembrar_grupos_post_migrate, sender=self,
+            dispatch_uid='restaurant.sembrar_grupos',
+        )
@@ -0,0 +1,89 @@
+"""
+Archivado de pedidos pagados en la tabla histórica PedidoArchivado.
+
+Los pedidos pagados se mueven por lotes acotados: cada lote se copia y se
+borra de Pedido dentro de una transacción corta, de modo que los bloqueos
+duran lo que tarda un lote y no todo el proceso.
+"""
+
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .fast import items_por_pedido
+from .models import Pedido, PedidoArchivado
+
+ESTADO_ARCHIVABLE = 'pagado'
+
+
+def pedidos_archivables(dias):
+    """Pedidos pagados cuya última actualización tiene más de `dias` días."""
+    limite = timezone.now() - timedelta(days=dias)
+    return Pedido.objects.filter(estado=ESTADO_ARCHIVABLE, updated_at__lt=limite)
+
+
+def archivar_lote(ids):
+    """
+    Mueve a PedidoArchivado los pedidos con los ids indicados.
+    Retorna el número de pedidos archivados.
+    """
+    with transaction.atomic():
+        pedidos = list(
+            Pedido.objects
+            .select_for_update()
+            .filter(pk__in=ids, estado=ESTADO_ARCHIVABLE)
+            .values('id', *PedidoArchivado.CAMPOS_COPIADOS)
+        )
+        if not pedidos:
+            return 0
+        # Las líneas se borran con el pedido: se guarda una copia en el histórico
+        items = items_por_pedido([p['id'] for p in pedidos])
+        for p in pedidos:
+            p['items'] = items[p['id']]
+            p['pedido_id'] = p.pop('id')
+        PedidoArchivado.objects.bulk_create(
+            [PedidoArchivado(**p) for p in pedidos],
+            ignore_conflicts=True,
+        )
+        # Solo se borran las filas bloqueadas y copiadas en este lote
+        Pedido.objects.filter(
+            pk__in=[p['pedido_id'] for p in pedidos]
+        ).delete()
+    return len(pedidos)
+
+
+def archivar_pedidos(dias, batch_size=1000, pausa=0.0, limite=None, callback=None):
+    """
+    Archiva los pedidos pagados con más de `dias` días en lotes de
+    `batch_size`. `pausa` son los segundos de espera entre lotes para
+    ceder la base de datos al tráfico normal; `limite` acota el total.
+    `callback(total)` se llama tras cada lote (progreso).
+    Retorna el total de pedidos archivados.
+    """
+    total = 0
+    ultimo_id = 0
+    while limite is None or total < limite:
+        tamano = batch_size if limite is None else min(batch_size, limite - total)
+        # Se recorre por id ascendente para que cada lote use el índice de la PK
+        ids = list(
+            pedidos_archivables(dias)
+            .filter(pk__gt=ultimo_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:tamano]
+        )
+        if not ids:
+            break
+        ultimo_id = ids[-1]
+        total += archivar_lote(ids)
+        if callback:
+            callback(total)
+        if pausa:
+            time.sleep(pausa)
+    return total
+
+
+def incluir_historial(request):
+    """Indica si la petición pide incluir el histórico (?historial=1)."""
+    return request.query_params.get('historial', '').lower() in ('1', 'true', 'si')
@@ -0,0 +1,60 @@
+"""
+Comprobaciones de sistema (manage.py check, migrate, runserver).
+
+La tabla de permisos, los ids de grupos y las lecturas del primario tras
+escribir avisan a los demás procesos a través de la caché de Django. Con una
+caché local de cada proceso, un permiso retirado en el admin seguiría
+concedido en los demás workers hasta reiniciarlos, así que con varios
+workers (WEB_CONCURRENCY > 1, la variable de gunicorn y uvicorn) es un error.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Error, Warning, register
+from django.core.management import call_command
+
+# Backends cuyo contenido no ven los demás procesos
+CACHES_LOCALES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def _workers():
+    try:
+        return int(os.environ.get('WEB_CONCURRENCY', '1'))
+    except ValueError:
+        return 1
+
+
+@register()
+def comprobar_cache_compartida(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND', CACHES_LOCALES[0])
+    if backend not in CACHES_LOCALES:
+        return []
+    if _workers() > 1:
+        return [Error(
+            'La caché por defecto es local de cada proceso y hay varios workers '
+            f'(WEB_CONCURRENCY={_workers()}): los cambios de permisos no llegarían '
+            'a los demás procesos.',
+            hint='Use CACHE_BACKEND=db o CACHE_BACKEND=redis.',
+            id='restaurant.E001',
+        )]
+    if not settings.DEBUG:
+        return [Warning(
+            'La caché por defecto es local de cada proceso: con varios workers los '
+            'cambios de permisos no llegarían a los demás procesos.',
+            hint='Use CACHE_BACKEND=db o CACHE_BACKEND=redis.',
+            id='restaurant.W001',
+        )]
+    return []
+
+
+def crear_tabla_cache(using, **kwargs):
+    """Receptor de post_migrate: crea la tabla de la caché en base si se usa."""
+    if any(
+        caches[alias].__class__.__name__ == 'DatabaseCache' for alias in settings.CACHES
+    ):
+        call_command('createcachetable', database=using, verbosity=0)
@@ -0,0 +1,224 @@
+"""
+Serialización rápida de solo lectura para los listados.
+
+Los serializadores de DRF construyen y validan un objeto Field por campo y
+por fila, lo que domina el tiempo de CPU en listados grandes. Aquí las filas
+se obtienen con values() y se convierten con funciones precalculadas
+(incluidos los mapas de etiquetas de ESTADO_CHOICES), produciendo el mismo
+JSON que MesaSerializer, PedidoSerializer y UserSerializer.
+"""
+
+from django.contrib.auth.models import User
+from django.db.models import Count
+from rest_framework import serializers
+
+from .models import Mesa, Pedido, PedidoItem
+
+# Campos de DRF reutilizados solo para formatear valores igual que los serializadores
+_fecha = serializers.DateTimeField()
+_total = serializers.DecimalField(max_digits=10, decimal_places=2)
+_subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+MESA_ESTADOS = dict(Mesa.ESTADO_CHOICES)
+PEDIDO_ESTADOS = dict(Pedido.ESTADO_CHOICES)
+
+
+def _columna(nombre):
+    """Conversor que copia la columna tal cual."""
+    return lambda fila: fila[nombre]
+
+
+def _fecha_columna(nombre):
+    """Conversor de fechas con el formato de serializers.DateTimeField."""
+    formatear = _fecha.to_representation
+    return lambda fila: formatear(fila[nombre]) if fila[nombre] is not None else None
+
+
+def _etiqueta(nombre, etiquetas):
+    """Conversor equivalente a get_<campo>_display()."""
+    return lambda fila: str(etiquetas.get(fila[nombre], fila[nombre]))
+
+
+class FastSerializer:
+    """
+    Serializador de solo lectura a partir de filas de values().
+    Las subclases definen `campos`: lista ordenada de
+    (nombre, columnas de values(), conversor(fila)).
+    """
+    campos = ()
+
+    def __init__(self, nombres=None):
+        self.campos_activos = [
+            campo for campo in self.campos
+            if nombres is None or campo[0] in nombres
+        ]
+
+    @property
+    def nombres(self):
+        return {nombre for nombre, _, _ in self.campos_activos}
+
+    def columnas(self):
+        columnas = []
+        for _, cols, _ in self.campos_activos:
+            columnas.extend(c for c in cols if c not in columnas)
+        return columnas
+
+    def preparar(self, queryset):
+        """Permite añadir anotaciones al queryset antes de values()."""
+        return queryset
+
+    def complementar(self, filas):
+        """Permite añadir a las filas datos de consultas adicionales."""
+
+    def serializar(self, queryset):
+        filas = list(self.preparar(queryset).values(*self.columnas()))
+        self.complementar(filas)
+        campos = [(nombre, conversor) for nombre, _, conversor in self.campos_activos]
+        return [{nombre: conversor(fila) for nombre, conversor in campos} for fila in filas]
+
+
+class FastMesaSerializer(FastSerializer):
+    """Equivalente rápido de MesaSerializer."""
+    campos = (
+        ('id', ('id',), _columna('id')),
+        ('numero', ('numero',), _columna('numero')),
+        ('capacidad', ('capacidad',), _columna('capacidad')),
+        ('estado', ('estado',), _columna('estado')),
+        ('estado_display', ('estado',), _etiqueta('estado', MESA_ESTADOS)),
+        ('total_pedidos', ('num_pedidos',), _columna('num_pedidos')),
+        ('created_at', ('created_at',), _fecha_columna('created_at')),
+        ('updated_at', ('updated_at',), _fecha_columna('updated_at')),
+    )
+
+    def preparar(self, queryset):
+        if 'total_pedidos' in self.nombres:
+            # Un único COUNT agrupado en lugar de un COUNT por mesa
+            queryset = queryset.annotate(num_pedidos=Count('pedidos'))
+        return queryset
+
+
+def _mesa_info(fila):
+    return {
+        'id': fila['mesa_id'],
+        'numero': fila['mesa__numero'],
+        'estado': fila['mesa__estado'],
+    }
+
+
+def _item(item_id, producto_id, nombre, cantidad, precio_unitario):
+    return {
+        'id': item_id,
+        'producto': producto_id,
+        'producto_nombre': nombre,
+        'cantidad': cantidad,
+        'precio_unitario': _total.to_representation(precio_unitario),
+        'subtotal': _subtotal.to_representation(cantidad * precio_unitario),
+    }
+
+
+def items_por_pedido(ids, bloque=500):
+    """
+    Líneas de los pedidos `ids` con la forma de PedidoItemSerializer:
+    {pedido_id: [item, ...]}, con una consulta por bloque de ids.
+    """
+    items = {pedido_id: [] for pedido_id in ids}
+    ids = list(items)
+    for inicio in range(0, len(ids), bloque):
+        filas = (
+            PedidoItem.objects
+            .filter(pedido_id__in=ids[inicio:inicio + bloque])
+            .order_by('pk')
+            .values_list('pedido_id', 'id', 'producto_id', 'producto__nombre', 'cantidad', 'precio_unitario')
+        )
+        for pedido_id, *item in filas:
+            items[pedido_id].append(_item(*item))
+    return items
+
+
+def items_de_pedidos(pedidos):
+    """
+    Como items_por_pedido(), pero de los pedidos de un queryset, con una sola
+    consulta (pedido_id IN (subconsulta)) sea cual sea el número de pedidos.
+    """
+    items = {}
+    filas = (
+        PedidoItem.objects
+        .filter(pedido__in=pedidos.order_by().values('pk'))
+        .order_by('pk')
+        .values_list('pedido_id', 'id', 'producto_id', 'producto__nombre', 'cantidad', 'precio_unitario')
+    )
+    for pedido_id, *item in filas:
+        items.setdefault(pedido_id, []).append(_item(*item))
+    return items
+
+
+class FastPedidoSerializer(FastSerializer):
+    """
+    Equivalente rápido de PedidoSerializer (mesa_info se obtiene con un JOIN
+    y las líneas de todos los pedidos con una consulta por bloque de ids).
+    """
+    campos = (
+        ('id', ('id',), _columna('id')),
+        ('mesa', ('mesa_id',), _columna('mesa_id')),
+        ('mesa_info', ('mesa_id', 'mesa__numero', 'mesa__estado'), _mesa_info),
+        ('descripcion', ('descripcion',), _columna('descripcion')),
+        ('items', ('id',), _columna('items')),
+        ('total', ('total',), lambda fila: _total.to_representation(fila['total'])),
+        ('estado', ('estado',), _columna('estado')),
+        ('estado_display', ('estado',), _etiqueta('estado', PEDIDO_ESTADOS)),
+        ('created_at', ('created_at',), _fecha_columna('created_at')),
+        ('updated_at', ('updated_at',), _fecha_columna('updated_at')),
+    )
+
+    def complementar(self, filas):
+        if 'items' not in self.nombres:
+            return
+        items = items_por_pedido([fila['id'] for fila in filas])
+        for fila in filas:
+            fila['items'] = items[fila['id']]
+
+
+def _grupos(fila):
+    return [{'id': group_id, 'name': name} for group_id, name in fila['grupos']]
+
+
+def _nombres_grupos(fila):
+    return [name for _, name in fila['grupos']]
+
+
+class FastUserSerializer(FastSerializer):
+    """Equivalente rápido de users.serializers.UserSerializer."""
+    campos = (
+        ('id', ('id',), _columna('id')),
+        ('username', ('username',), _columna('username')),
+        ('email', ('email',), _columna('email')),
+        ('first_name', ('first_name',), _columna('first_name')),
+        ('last_name', ('last_name',), _columna('last_name')),
+        ('is_active', ('is_active',), _columna('is_active')),
+        ('is_staff', ('is_staff',), _columna('is_staff')),
+        ('groups', ('id',), _grupos),
+        ('group_names', ('id',), _nombres_grupos),
+        ('date_joined', ('date_joined',), _fecha_columna('date_joined')),
+        ('last_login', ('last_login',), _fecha_columna('last_login')),
+    )
+    # Tamaño de los bloques de ids para no exceder el límite de parámetros de SQLite
+    bloque_ids = 500
+
+    def complementar(self, filas):
+        if not self.nombres & {'groups', 'group_names'}:
+            return
+        grupos = {fila['id']: [] for fila in filas}
+        ids = list(grupos)
+        through = User.groups.through
+        for inicio in range(0, len(ids), self.bloque_ids):
+            relaciones = (
+                through.objects
+                .filter(user_id__in=ids[inicio:inicio + self.bloque_ids])
+                # El mismo orden que user.groups.all() (por id de grupo), no el de alta
+                .order_by('group_id')
+                .values_list('user_id', 'group_id', 'group__name')
+            )
+            for user_id, group_id, nombre in relaciones:
+                grupos[user_id].append((group_id, nombre))
+        for fila in filas:
+            fila['grupos'] = grupos[fila['id']]
@@ -0,0 +1,135 @@
+"""
+Estado de la sala: mesas, pedidos abiertos y estadísticas en una respuesta.
+
+Al arrancar, una tablet de sala necesitaba /api/mesas/ y después
+/api/mesas/<id>/pedidos/ por cada mesa. estado_sala() devuelve lo mismo con
+un número fijo de consultas, sea cual sea el número de mesas:
+
+1. las mesas (FastMesaSerializer, sin el COUNT por mesa),
+2. los pedidos abiertos (FastPedidoSerializer) y sus líneas (una consulta
+   con los mismos filtros como subconsulta),
+3. las estadísticas por mesa y estado de los pedidos abiertos (un GROUP BY
+   sobre pedido_sucursal_estado_idx, sin recorrer el histórico de pagados),
+   de las que salen también total_pedidos de cada mesa y las estadísticas de
+   la sucursal.
+
+Con `desde` (modo delta) solo se devuelven las mesas y los pedidos con
+updated_at posterior, incluidos los pedidos que se han cerrado (pagado) para
+que el cliente los quite. Los pedidos salen del índice
+pedido_sucursal_updated_idx. Como los borrados no dejan rastro en updated_at,
+el delta incluye los ids de todas las mesas y de los pedidos abiertos (una
+consulta más, solo de índice) para que el cliente descarte el resto.
+
+El cliente guarda `server_time` y lo envía como `since` en la siguiente
+petición. Se resta FLOOR['DELTA_MARGIN_SECONDS'] a `desde` para no perder
+cambios de transacciones que se confirmaron después de empezar la consulta
+anterior ni los que aún no han llegado a la réplica (config/db_router.py);
+los cambios repetidos se pueden aplicar de nuevo sin problema.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.utils import timezone
+from rest_framework import serializers
+
+from .fast import FastMesaSerializer, FastPedidoSerializer, items_de_pedidos
+from .models import Mesa, Pedido
+from .tenancy import filtrar_sucursal
+
+_fecha = serializers.DateTimeField()
+_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+DEFAULT_FLOOR = {
+    # Segundos que se solapan dos peticiones delta consecutivas
+    'DELTA_MARGIN_SECONDS': 5,
+}
+
+# Pedidos que siguen en la sala
+ESTADOS_ABIERTOS = ('pendiente', 'en_preparacion', 'servido')
+
+# Campos de las mesas; total_pedidos sale de las estadísticas
+CAMPOS_MESA = [nombre for nombre, _, _ in FastMesaSerializer.campos if nombre != 'total_pedidos']
+
+
+class PedidoSalaSerializer(FastPedidoSerializer):
+    """FastPedidoSerializer con las líneas de todos los pedidos en una consulta."""
+
+    def __init__(self, pedidos, nombres=None):
+        super().__init__(nombres)
+        self.pedidos = pedidos
+
+    def complementar(self, filas):
+        if not filas or 'items' not in self.nombres:
+            return
+        items = items_de_pedidos(self.pedidos)
+        for fila in filas:
+            fila['items'] = items.get(fila['id'], [])
+
+
+def get_floor_settings():
+    return {**DEFAULT_FLOOR, **getattr(settings, 'FLOOR', {})}
+
+
+def _estadisticas(pedidos):
+    """
+    ({mesa_id: [{'estado', 'cantidad', 'total'}]}, [totales de la sucursal])
+    con un único GROUP BY por mesa y estado de los pedidos abiertos.
+    """
+    por_mesa = defaultdict(list)
+    sucursal = {}
+    filas = (
+        pedidos
+        .order_by()
+        .values_list('mesa_id', 'estado')
+        .annotate(cantidad=Count('id'), total=Sum('total'))
+        .order_by('mesa_id', 'estado')
+    )
+    for mesa_id, estado, cantidad, total in filas:
+        por_mesa[mesa_id].append({'estado': estado, 'cantidad': cantidad, 'total': _total.to_representation(total)})
+        acumulado = sucursal.setdefault(estado, [0, 0])
+        acumulado[0] += cantidad
+        acumulado[1] += total
+    totales = [
+        {'estado': estado, 'cantidad': cantidad, 'total': _total.to_representation(total)}
+        for estado, (cantidad, total) in sorted(sucursal.items())
+    ]
+    return por_mesa, totales
+
+
+def estado_sala(sucursal, desde=None):
+    """
+    Estado de la sala de `sucursal` (todas si es None). Con `desde`
+    (datetime) solo incluye las mesas y los pedidos modificados después.
+    """
+    server_time = timezone.now()
+    mesas = filtrar_sucursal(Mesa.objects.order_by('numero'), sucursal)
+    pedidos = filtrar_sucursal(Pedido.objects.all(), sucursal)
+    abiertos = pedidos.filter(estado__in=ESTADOS_ABIERTOS)
+
+    if desde is None:
+        mesas_cambiadas = mesas
+        pedidos_cambiados = abiertos
+    else:
+        desde = desde - timedelta(seconds=get_floor_settings()['DELTA_MARGIN_SECONDS'])
+        mesas_cambiadas = mesas.filter(updated_at__gte=desde)
+        pedidos_cambiados = pedidos.filter(updated_at__gte=desde)
+
+    estadisticas, totales = _estadisticas(abiertos)
+    filas_mesas = FastMesaSerializer(CAMPOS_MESA).serializar(mesas_cambiadas)
+    for mesa in filas_mesas:
+        mesa['total_pedidos'] = sum(fila['cantidad'] for fila in estadisticas.get(mesa['id'], ()))
+    datos = {
+        'server_time': _fecha.to_representation(server_time),
+        'delta': desde is not None,
+        'mesas': filas_mesas,
+        'pedidos': PedidoSalaSerializer(pedidos_cambiados).serializar(pedidos_cambiados.order_by('mesa_id', 'created_at')),
+        'estadisticas_por_mesa': {str(mesa_id): filas for mesa_id, filas in estadisticas.items()},
+        'estadisticas_por_estado': totales,
+    }
+    if desde is not None:
+        datos['mesas_ids'] = list(mesas.values_list('id', flat=True))
+        datos['pedidos_abiertos_ids'] = list(abiertos.order_by('id').values_list('id', flat=True))
+    return datos
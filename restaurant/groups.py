@@ -0,0 +1,161 @@
+"""
+Grupos de usuarios y sus permisos sobre los modelos de la app.
+
+GRUPOS indica los permisos de cada grupo ('restaurant.add_mesa', ...), los
+mismos que comprueba la API (restaurant.policy) y muestra el admin.
+sembrar_grupos() lo aplica de forma idempotente y con un número
+fijo de consultas: crea los grupos que falten y añade con un único
+bulk_create los permisos que falten en auth_group_permissions. Los permisos
+que un administrador haya añadido a mano no se quitan.
+
+Se ejecuta en post_migrate (ver RestaurantConfig.ready), después de que
+Django cree los ContentType y Permission de los modelos, así que se puede
+lanzar tantas veces como se quiera y nunca se queda sin permisos por
+ejecutarse antes de tiempo.
+
+grupo_id() guarda en memoria el id de cada grupo por nombre. Las señales de
+Group (restaurant/signals.py) vacían la caché al guardar o borrar un grupo y
+publican una versión nueva en la caché compartida (restaurant/versions.py),
+así que los demás procesos la vacían en como mucho POLICY['CHECK_INTERVAL']
+segundos, igual que la tabla de permisos.
+"""
+
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS, router, transaction
+
+from .versions import VersionCompartida
+
+GRUPO_ADMIN = 'Administradores'
+GRUPO_EMPLEADOS = 'Empleados'
+
+CLAVE_VERSION = 'restaurant:grupos:version'
+
+TODAS = ('add', 'change', 'delete', 'view')
+SIN_BORRAR = ('add', 'change', 'view')
+
+
+def permisos(modelo, acciones):
+    """permisos('restaurant.mesa', ('add', 'view')) -> {'restaurant.add_mesa', 'restaurant.view_mesa'}."""
+    app_label, model_name = modelo.split('.')
+    return {f'{app_label}.{accion}_{model_name}' for accion in acciones}
+
+
+# Permisos de cada grupo como 'app_label.codename' (igual que user.has_perm)
+GRUPOS = {
+    # CRUD completo, gestión de usuarios y perfiles de la sucursal
+    GRUPO_ADMIN: {
+        *permisos('restaurant.mesa', TODAS),
+        *permisos('restaurant.pedido', TODAS),
+        *permisos('restaurant.producto', TODAS),
+        *permisos('auth.user', TODAS),
+        'restaurant.administrar_sucursal',
+    },
+    # Crear, leer y actualizar (sin eliminar); la carta solo se consulta
+    GRUPO_EMPLEADOS: {
+        *permisos('restaurant.mesa', SIN_BORRAR),
+        *permisos('restaurant.pedido', SIN_BORRAR),
+        *permisos('restaurant.producto', ('view',)),
+    },
+}
+
+
+def _intervalo():
+    from .policy import get_policy_settings
+
+    return get_policy_settings()['CHECK_INTERVAL']
+
+
+_ids = {}
+_version = VersionCompartida(CLAVE_VERSION, _intervalo)
+
+
+def grupo_id(nombre):
+    """Id del grupo `nombre`, cacheado por proceso. None si no existe (no se cachea)."""
+    if _version.cambiada():
+        _ids.clear()
+    if nombre not in _ids:
+        Group = global_apps.get_model('auth', 'Group')
+        pk = Group.objects.filter(name=nombre).values_list('pk', flat=True).first()
+        if pk is None:
+            return None
+        _ids[nombre] = pk
+    return _ids[nombre]
+
+
+def limpiar_cache():
+    """Vacía los ids de este proceso y avisa a los demás."""
+    _ids.clear()
+    _version.invalidar()
+
+
+def invalidar():
+    """Vacía los ids de este proceso y avisa a los demás al confirmarse la transacción."""
+    _ids.clear()
+    transaction.on_commit(limpiar_cache)
+
+
+def sembrar_grupos(apps=global_apps, using=DEFAULT_DB_ALIAS, grupos=None):
+    """
+    Crea los grupos de `grupos` (GRUPOS por defecto) y les añade los permisos
+    que les falten. Retorna el número de permisos añadidos. Los permisos que
+    aún no existen (modelos sin migrar) se ignoran y se añaden en la
+    siguiente ejecución.
+    """
+    grupos = GRUPOS if grupos is None else grupos
+    Group = apps.get_model('auth', 'Group')
+    Permission = apps.get_model('auth', 'Permission')
+    GroupPermission = Group.permissions.through
+
+    ids = dict(Group.objects.using(using).filter(name__in=grupos).values_list('name', 'pk'))
+    faltan = [Group(name=nombre) for nombre in grupos if nombre not in ids]
+    if faltan:
+        Group.objects.using(using).bulk_create(faltan, ignore_conflicts=True)
+        ids = dict(Group.objects.using(using).filter(name__in=grupos).values_list('name', 'pk'))
+
+    nombres = set().union(*grupos.values())
+    permisos_ids = {
+        f'{app_label}.{codename}': pk
+        for pk, app_label, codename in Permission.objects.using(using)
+        .filter(
+            content_type__app_label__in={nombre.split('.')[0] for nombre in nombres},
+            codename__in={nombre.split('.')[1] for nombre in nombres},
+        )
+        .values_list('pk', 'content_type__app_label', 'codename')
+    }
+    deseados = {
+        (ids[grupo], permisos_ids[nombre])
+        for grupo, nombres_grupo in grupos.items()
+        for nombre in nombres_grupo
+        if nombre in permisos_ids
+    }
+    existentes = set(
+        GroupPermission.objects.using(using)
+        .filter(group_id__in=ids.values())
+        .values_list('group_id', 'permission_id')
+    )
+    nuevos = [
+        GroupPermission(group_id=group_id, permission_id=permission_id)
+        for group_id, permission_id in sorted(deseados - existentes)
+    ]
+    GroupPermission.objects.using(using).bulk_create(nuevos, ignore_conflicts=True)
+    return len(nuevos)
+
+
+def sembrar_grupos_post_migrate(app_config, verbosity=2, using=DEFAULT_DB_ALIAS, apps=global_apps, **kwargs):
+    """Receptor de post_migrate: siembra los grupos tras cada migrate."""
+    try:
+        Group = apps.get_model('auth', 'Group')
+        apps.get_model('auth', 'Permission')
+    except LookupError:
+        # auth no está migrada (p. ej. tras migrar hacia atrás hasta zero)
+        return
+    if not router.allow_migrate_model(using, Group):
+        return
+    from .policy import tabla
+
+    nuevos = sembrar_grupos(apps, using)
+    # Los grupos y permisos creados con bulk_create no emiten señales
+    limpiar_cache()
+    tabla.invalidar()
+    if nuevos and verbosity >= 2:
+        print(f'Añadidos {nuevos} permisos a los grupos {", ".join(GRUPOS)}.')
@@ -0,0 +1,165 @@
+"""
+Soporte de la cabecera Idempotency-Key para las vistas de creación.
+
+La primera petición con una clave la reserva (INSERT con restricción única,
+atómico entre procesos), se ejecuta y guarda su respuesta. Los reintentos:
+- con la petición ya completada reciben la respuesta guardada (sin validar
+  ni insertar de nuevo) y la cabecera Idempotent-Replayed: true;
+- mientras la primera sigue en curso reciben 409 con Retry-After;
+- con la misma clave pero otro cuerpo u otra sucursal reciben 422.
+Las claves caducan a los IDEMPOTENCY['TTL'] segundos.
+"""
+
+import hashlib
+import json
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .tenancy import sucursal_actual
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+
+# Intentos de reserva antes de responder 409
+RESERVA_INTENTOS = 3
+
+DEFAULT_IDEMPOTENCY = {
+    # Segundos que se conserva una respuesta
+    'TTL': 24 * 60 * 60,
+    # Segundos tras los que una petición 'procesando' se da por abandonada
+    'LOCK_TIMEOUT': 60,
+    # Probabilidad de purgar claves caducadas en cada reserva, y cuántas
+    'PURGE_PROBABILITY': 0.01,
+    'PURGE_BATCH': 1000,
+}
+
+
+def get_idempotency_settings():
+    return {**DEFAULT_IDEMPOTENCY, **getattr(settings, 'IDEMPOTENCY', {})}
+
+
+def huella_peticion(request):
+    """
+    Hash del método, ruta, sucursal y cuerpo de la petición. Con la sucursal,
+    repetir el cuerpo con otra X-Sucursal es otra petición (422) y no la
+    respuesta de la primera sucursal.
+    """
+    cuerpo = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    sucursal = sucursal_actual(request)
+    contenido = f'{request.method} {request.path} {sucursal.pk if sucursal else "*"}\n{cuerpo}'
+    return hashlib.sha256(contenido.encode()).hexdigest()
+
+
+def purgar_caducadas(limite=None):
+    """Borra hasta `limite` claves caducadas. Retorna cuántas se borraron."""
+    ids = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).values_list('pk', flat=True)
+    if limite is not None:
+        ids = ids[:limite]
+    return IdempotencyKey.objects.filter(pk__in=list(ids)).delete()[0]
+
+
+def _reservar(request, clave, huella, config):
+    """
+    Intenta reservar la clave. Retorna (registro, None) si la reserva es
+    nuestra, o (None, registro_existente) si otra petición ya la tiene. Si el
+    registro existente desaparece una y otra vez (purgas concurrentes), tras
+    RESERVA_INTENTOS intentos retorna (None, None).
+    """
+    for _ in range(RESERVA_INTENTOS):
+        ahora = timezone.now()
+        try:
+            with transaction.atomic():
+                registro = IdempotencyKey.objects.create(
+                    user=request.user, clave=clave, endpoint=request.path[:255], huella=huella,
+                    expires_at=ahora + timedelta(seconds=config['TTL']),
+                )
+            return registro, None
+        except IntegrityError:
+            pass
+
+        existente = IdempotencyKey.objects.filter(user=request.user, clave=clave).first()
+        if existente is None:
+            # Se borró (caducada) entre medias
+            continue
+        abandonada = (
+            existente.estado == 'procesando' and
+            existente.created_at < ahora - timedelta(seconds=config['LOCK_TIMEOUT'])
+        )
+        if existente.expires_at < ahora or abandonada:
+            # Se toma la clave solo si nadie lo ha hecho ya (UPDATE condicional)
+            tomada = IdempotencyKey.objects.filter(
+                pk=existente.pk, estado=existente.estado, created_at=existente.created_at
+            ).update(
+                huella=huella, estado='procesando', status_code=None, respuesta=None,
+                created_at=ahora, expires_at=ahora + timedelta(seconds=config['TTL']),
+            )
+            try:
+                existente.refresh_from_db()
+            except IdempotencyKey.DoesNotExist:
+                continue
+            if tomada:
+                return existente, None
+        return None, existente
+    return None, None
+
+
+def idempotent(request, ejecutar):
+    """
+    Ejecuta `ejecutar()` (que retorna un Response) aplicando la semántica de
+    Idempotency-Key si la petición trae la cabecera.
+    """
+    clave = request.META.get(HEADER)
+    if not clave:
+        return ejecutar()
+    if len(clave) > 255:
+        return Response(
+            {'error': 'La cabecera Idempotency-Key no puede superar 255 caracteres.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    config = get_idempotency_settings()
+    if random.random() < config['PURGE_PROBABILITY']:
+        purgar_caducadas(config['PURGE_BATCH'])
+
+    huella = huella_peticion(request)
+    registro, existente = _reservar(request, clave, huella, config)
+
+    if registro is None:
+        if existente is not None and existente.huella != huella:
+            return Response(
+                {'error': 'La Idempotency-Key ya se usó con una petición distinta.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if existente is None or existente.estado == 'procesando':
+            return Response(
+                {'error': 'Hay una petición con esta Idempotency-Key en curso.'},
+                status=status.HTTP_409_CONFLICT,
+                headers={'Retry-After': '1'}
+            )
+        return Response(
+            existente.respuesta, status=existente.status_code,
+            headers={'Idempotent-Replayed': 'true'}
+        )
+
+    try:
+        response = ejecutar()
+    except Exception:
+        registro.delete()
+        raise
+    if response.status_code >= 500:
+        # Los errores del servidor no se guardan: el reintento vuelve a ejecutarse
+        registro.delete()
+        return response
+
+    registro.estado = 'completado'
+    registro.status_code = response.status_code
+    registro.respuesta = response.data
+    registro.save(update_fields=['estado', 'status_code', 'respuesta'])
+    return response
@@ -0,0 +1,58 @@
+"""
+Comando para mover pedidos pagados antiguos a la tabla histórica.
+
+Uso:
+    python manage.py archivar_pedidos --dias 30 --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+
+from config.db_router import en_replica
+from restaurant.archive import archivar_pedidos, pedidos_archivables
+
+
+class Command(BaseCommand):
+    help = 'Archiva en PedidoArchivado los pedidos pagados con más de N días.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=30,
+            help='Antigüedad mínima (en días desde la última actualización).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Pedidos movidos por transacción.'
+        )
+        parser.add_argument(
+            '--pausa', type=float, default=0.0,
+            help='Segundos de espera entre lotes.'
+        )
+        parser.add_argument(
+            '--limite', type=int, default=None,
+            help='Máximo de pedidos a archivar en esta ejecución.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Solo informa cuántos pedidos se archivarían.'
+        )
+
+    def handle(self, *args, **options):
+        dias = options['dias']
+        if options['dry_run']:
+            with en_replica():
+                cantidad = pedidos_archivables(dias).count()
+            self.stdout.write(f'{cantidad} pedidos pagados se archivarían.')
+            return
+
+        def progreso(total):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {total} pedidos archivados...')
+
+        total = archivar_pedidos(
+            dias,
+            batch_size=options['batch_size'],
+            pausa=options['pausa'],
+            limite=options['limite'],
+            callback=progreso,
+        )
+        self.stdout.write(self.style.SUCCESS(f'{total} pedidos archivados.'))
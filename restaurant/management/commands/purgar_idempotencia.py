@@ -0,0 +1,29 @@
+"""
+Comando para borrar las claves de idempotencia caducadas.
+
+Uso:
+    python manage.py purgar_idempotencia --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+
+from restaurant.idempotency import purgar_caducadas
+
+
+class Command(BaseCommand):
+    help = 'Borra las claves Idempotency-Key caducadas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Claves borradas por consulta.'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            borradas = purgar_caducadas(options['batch_size'])
+            total += borradas
+            if borradas < options['batch_size']:
+                break
+        self.stdout.write(self.style.SUCCESS(f'{total} claves caducadas borradas.'))
@@ -0,0 +1,30 @@
+"""
+Comando para reconstruir el índice invertido de búsqueda de pedidos.
+
+Necesario tras cargas con bulk_create (que no emiten post_save) y al
+activar el motor 'indice' sobre pedidos ya existentes.
+
+Uso:
+    python manage.py reindexar_pedidos --batch-size 1000
+"""
+
+from django.core.management.base import BaseCommand
+
+from restaurant.search import reindexar_pedidos
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice invertido de la descripción de los pedidos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Pedidos indexados por lote.'
+        )
+
+    def handle(self, *args, **options):
+        total = reindexar_pedidos(
+            batch_size=options['batch_size'],
+            callback=lambda n: self.stdout.write(f'{n} pedidos indexados...'),
+        )
+        self.stdout.write(self.style.SUCCESS(f'{total} pedidos indexados.'))
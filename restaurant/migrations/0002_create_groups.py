@@ -1,58 +1,27 @@
 """
 Migración de datos para crear los grupos de usuarios iniciales.
-Crea los grupos 'Administradores' y 'Empleados' con sus permisos correspondientes.
+Crea los grupos 'Administradores' y 'Empleados'.
+
+En una base nueva los permisos de los modelos aún no existen al aplicar esta
+migración (Django los crea en post_migrate), así que aquí solo se crean los
+grupos; el receptor post_migrate de la app (restaurant.groups) les añade los
+permisos al terminar cada migrate. La migración no importa código de la app
+para que siga aplicándose igual aunque ese código cambie.
 """
 from django.db import migrations
 
+GRUPOS = ['Administradores', 'Empleados']
+
 
 def create_groups(apps, schema_editor):
-    """
-    Crea los grupos de usuarios con sus permisos.
-    - Administradores: CRUD completo en todos los modelos
-    - Empleados: Crear, Leer, Actualizar (sin Eliminar)
-    """
     Group = apps.get_model('auth', 'Group')
-    Permission = apps.get_model('auth', 'Permission')
-    ContentType = apps.get_model('contenttypes', 'ContentType')
-
-    #Crear grupo Administradores
-    admin_group, _ = Group.objects.get_or_create(name='Administradores')
-    
-    #Crear grupo Empleados
-    empleados_group, _ = Group.objects.get_or_create(name='Empleados')
-
-    #Obtener content types para Mesa y Pedido
-    try:
-        mesa_ct = ContentType.objects.get(app_label='restaurant', model='mesa')
-        pedido_ct = ContentType.objects.get(app_label='restaurant', model='pedido')
-
-        # Permisos para Mesa
-        mesa_perms = Permission.objects.filter(content_type=mesa_ct)
-        # Permisos para Pedido
-        pedido_perms = Permission.objects.filter(content_type=pedido_ct)
-
-        # Administradores obtienen todos los permisos
-        for perm in mesa_perms:
-            admin_group.permissions.add(perm)
-        for perm in pedido_perms:
-            admin_group.permissions.add(perm)
-
-        # Empleados obtienen permisos de ver, crear y cambiar (no eliminar)
-        for perm in mesa_perms:
-            if 'delete' not in perm.codename:
-                empleados_group.permissions.add(perm)
-        for perm in pedido_perms:
-            if 'delete' not in perm.codename:
-                empleados_group.permissions.add(perm)
-
-    except ContentType.DoesNotExist:
-        # Los content types se crearán cuando se apliquen las migraciones
-        pass
+    for nombre in GRUPOS:
+        Group.objects.using(schema_editor.connection.alias).get_or_create(name=nombre)
 
 
 def remove_groups(apps, schema_editor):
     Group = apps.get_model('auth', 'Group')
-    Group.objects.filter(name__in=['Administradores', 'Empleados']).delete()
+    Group.objects.using(schema_editor.connection.alias).filter(name__in=GRUPOS).delete()
 
 
 class Migration(migrations.Migration):
@@ -66,4 +35,3 @@ class Migration(migrations.Migration):
     operations = [
         migrations.RunPython(create_groups, remove_groups),
     ]
-
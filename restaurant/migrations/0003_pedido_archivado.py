@@ -0,0 +1,64 @@
+"""
+Tabla histórica PedidoArchivado e índice (estado, updated_at) de Pedido para
+seleccionar los pedidos a archivar. El índice de Pedido se crea en línea; los
+de PedidoArchivado se crean sobre la tabla recién creada, vacía.
+"""
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """
+    AddIndex que en MySQL crea el índice sin bloquear las escrituras; si no
+    se puede en línea, MySQL falla en lugar de bloquear la tabla. Copia
+    mínima de restaurant.operations.AddIndexOnline, sin informe de avance,
+    para que la migración no dependa del código de la app.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'mysql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(f'{self.index.create_sql(model, schema_editor)} ALGORITHM=INPLACE LOCK=NONE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0002_create_groups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PedidoArchivado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pedido_id', models.BigIntegerField(unique=True, verbose_name='ID del pedido original')),
+                ('descripcion', models.TextField(verbose_name='Descripción del pedido')),
+                ('total', models.DecimalField(decimal_places=2, default=0.0, max_digits=10, verbose_name='Total')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_preparacion', 'En Preparación'), ('servido', 'Servido'), ('pagado', 'Pagado')], default='pagado', max_length=20, verbose_name='Estado')),
+                ('created_at', models.DateTimeField(verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(verbose_name='Fecha de actualización')),
+                ('archivado_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de archivado')),
+            ],
+            options={
+                'verbose_name': 'Pedido archivado',
+                'verbose_name_plural': 'Pedidos archivados',
+                'ordering': ['-created_at'],
+            },
+        ),
+        AddIndexOnline(
+            model_name='pedido',
+            index=models.Index(fields=['estado', 'updated_at'], name='pedido_estado_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='pedidoarchivado',
+            name='mesa',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pedidos_archivados', to='restaurant.mesa', verbose_name='Mesa'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidoarchivado',
+            index=models.Index(fields=['mesa', '-created_at'], name='archivo_mesa_created_idx'),
+        ),
+    ]
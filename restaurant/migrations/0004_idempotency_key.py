@@ -0,0 +1,38 @@
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('restaurant', '0003_pedido_archivado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=255, verbose_name='Clave')),
+                ('endpoint', models.CharField(max_length=255, verbose_name='Endpoint')),
+                ('huella', models.CharField(max_length=64, verbose_name='Huella de la petición')),
+                ('estado', models.CharField(choices=[('procesando', 'Procesando'), ('completado', 'Completado')], default='procesando', max_length=20, verbose_name='Estado')),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='Código de estado')),
+                ('respuesta', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Respuesta')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Fecha de expiración')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Clave de idempotencia',
+                'verbose_name_plural': 'Claves de idempotencia',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'clave'), name='idempotency_user_clave_uniq'),
+        ),
+    ]
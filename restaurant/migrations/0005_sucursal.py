@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('restaurant', '0004_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sucursal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('nombre', models.CharField(max_length=100, unique=True, verbose_name='Nombre')),
+                ('codigo', models.SlugField(help_text='Identificador usado en la cabecera X-Sucursal.', unique=True, verbose_name='Código')),
+                ('activa', models.BooleanField(default=True, verbose_name='Activa')),
+            ],
+            options={
+                'verbose_name': 'Sucursal',
+                'verbose_name_plural': 'Sucursales',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.AddField(
+            model_name='mesa',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='mesas', to='restaurant.sucursal', verbose_name='Sucursal'),
+        ),
+        migrations.AddField(
+            model_name='pedido',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pedidos', to='restaurant.sucursal', verbose_name='Sucursal'),
+        ),
+        migrations.AddField(
+            model_name='pedidoarchivado',
+            name='sucursal',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='pedidos_archivados', to='restaurant.sucursal', verbose_name='Sucursal'),
+        ),
+        migrations.CreateModel(
+            name='Membresia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='membresias', to='auth.group', verbose_name='Grupo')),
+                ('sucursal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='membresias', to='restaurant.sucursal', verbose_name='Sucursal')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='membresias', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Membresía',
+                'verbose_name_plural': 'Membresías',
+                'indexes': [models.Index(fields=['sucursal', 'group'], name='membresia_sucursal_group_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='membresia',
+            constraint=models.UniqueConstraint(fields=('user', 'sucursal'), name='membresia_user_sucursal_uniq'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+"""
+Migración de datos para la introducción de sucursales.
+Crea la sucursal 'Principal', le asigna las mesas, pedidos y pedidos
+archivados existentes, y convierte los grupos de cada usuario en
+membresías de esa sucursal.
+"""
+from django.db import migrations
+
+CODIGO_PRINCIPAL = 'principal'
+
+
+def asignar_sucursal_principal(apps, schema_editor):
+    Sucursal = apps.get_model('restaurant', 'Sucursal')
+    Mesa = apps.get_model('restaurant', 'Mesa')
+    Pedido = apps.get_model('restaurant', 'Pedido')
+    PedidoArchivado = apps.get_model('restaurant', 'PedidoArchivado')
+    Membresia = apps.get_model('restaurant', 'Membresia')
+    User = apps.get_model('auth', 'User')
+
+    sucursal, _ = Sucursal.objects.get_or_create(
+        codigo=CODIGO_PRINCIPAL, defaults={'nombre': 'Principal'}
+    )
+
+    # Un UPDATE por tabla en lugar de guardar fila a fila
+    for modelo in (Mesa, Pedido, PedidoArchivado):
+        modelo.objects.filter(sucursal__isnull=True).update(sucursal=sucursal)
+
+    # Una membresía por usuario; si tenía varios grupos, prevalece Administradores
+    prioridad = {'Administradores': 0}
+    grupos_por_usuario = {}
+    relaciones = (
+        User.groups.through.objects
+        .values_list('user_id', 'group_id', 'group__name')
+        .order_by('user_id')
+    )
+    for user_id, group_id, nombre in relaciones.iterator():
+        actual = grupos_por_usuario.get(user_id)
+        if actual is None or prioridad.get(nombre, 1) < prioridad.get(actual[1], 1):
+            grupos_por_usuario[user_id] = (group_id, nombre)
+
+    Membresia.objects.bulk_create(
+        [
+            Membresia(user_id=user_id, sucursal=sucursal, group_id=group_id)
+            for user_id, (group_id, _) in grupos_por_usuario.items()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def quitar_sucursal_principal(apps, schema_editor):
+    Membresia = apps.get_model('restaurant', 'Membresia')
+    Membresia.objects.filter(sucursal__codigo=CODIGO_PRINCIPAL).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0005_sucursal'),
+    ]
+
+    operations = [
+        migrations.RunPython(asignar_sucursal_principal, quitar_sucursal_principal),
+    ]
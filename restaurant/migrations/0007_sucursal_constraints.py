@@ -0,0 +1,68 @@
+"""
+Sucursal obligatoria en mesas y pedidos, índices por sucursal (creados en
+línea en MySQL) y número de mesa único por sucursal.
+"""
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """
+    AddIndex que en MySQL crea el índice sin bloquear las escrituras; si no
+    se puede en línea, MySQL falla en lugar de bloquear la tabla. Copia
+    mínima de restaurant.operations.AddIndexOnline, sin informe de avance,
+    para que la migración no dependa del código de la app.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'mysql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(f'{self.index.create_sql(model, schema_editor)} ALGORITHM=INPLACE LOCK=NONE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0006_asignar_sucursal_principal'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mesa',
+            name='numero',
+            field=models.PositiveIntegerField(verbose_name='Número de mesa'),
+        ),
+        migrations.AlterField(
+            model_name='mesa',
+            name='sucursal',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='mesas', to='restaurant.sucursal', verbose_name='Sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='pedido',
+            name='sucursal',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pedidos', to='restaurant.sucursal', verbose_name='Sucursal'),
+        ),
+        migrations.AlterField(
+            model_name='pedidoarchivado',
+            name='sucursal',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='pedidos_archivados', to='restaurant.sucursal', verbose_name='Sucursal'),
+        ),
+        AddIndexOnline(
+            model_name='pedido',
+            index=models.Index(fields=['sucursal', '-created_at'], name='pedido_sucursal_created_idx'),
+        ),
+        AddIndexOnline(
+            model_name='pedido',
+            index=models.Index(fields=['sucursal', 'estado'], name='pedido_sucursal_estado_idx'),
+        ),
+        AddIndexOnline(
+            model_name='pedidoarchivado',
+            index=models.Index(fields=['sucursal', '-created_at'], name='archivo_sucursal_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mesa',
+            constraint=models.UniqueConstraint(fields=('sucursal', 'numero'), name='mesa_sucursal_numero_uniq'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+"""
+Índices para el admin de pedidos: orden por fecha de creación y búsqueda
+FULLTEXT sobre la descripción. El índice FULLTEXT solo se crea en MySQL
+(ver restaurant/search.py); en otros motores la búsqueda usa icontains.
+
+InnoDB no admite LOCK=NONE al añadir un índice FULLTEXT: el primero
+reconstruye la tabla para añadir la columna oculta FTS_DOC_ID. Se crea con
+ALGORITHM=INPLACE LOCK=SHARED, que admite lecturas y bloquea las escrituras
+mientras dura, y MySQL falla en lugar de copiar la tabla entera. En una
+tabla de pedidos grande, aplíquese en una ventana de poca actividad.
+"""
+from django.db import migrations, models
+
+INDICE_FULLTEXT = 'pedido_descripcion_ft'
+
+
+def crear_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        f'CREATE FULLTEXT INDEX {INDICE_FULLTEXT} ON restaurant_pedido (descripcion) '
+        'ALGORITHM=INPLACE LOCK=SHARED'
+    )
+
+
+def borrar_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'DROP INDEX {INDICE_FULLTEXT} ON restaurant_pedido')
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """
+    AddIndex que en MySQL crea el índice sin bloquear las escrituras; si no
+    se puede en línea, MySQL falla en lugar de bloquear la tabla. Copia
+    mínima de restaurant.operations.AddIndexOnline, sin informe de avance,
+    para que la migración no dependa del código de la app.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'mysql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(f'{self.index.create_sql(model, schema_editor)} ALGORITHM=INPLACE LOCK=NONE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0007_sucursal_constraints'),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name='pedido',
+            index=models.Index(fields=['-created_at'], name='pedido_created_idx'),
+        ),
+        migrations.RunPython(crear_fulltext, borrar_fulltext),
+    ]
@@ -0,0 +1,93 @@
+"""
+Índice invertido de la descripción de los pedidos (ver restaurant/search.py)
+y su carga con los pedidos existentes, por lotes de id, cada lote en su
+propia transacción. Solo se carga si el motor de búsqueda es 'indice': con
+el FULLTEXT de MySQL la tabla no se usa, y al cambiar de motor se rellena
+con el comando reindexar_pedidos.
+
+La normalización es una copia de restaurant.search.palabras_indice() en el
+momento de la migración, para que no dependa del código de la app.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models, transaction
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+_PALABRA = re.compile(r'\w+')
+
+STOPWORDS = frozenset({
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'lo', 'los',
+    'o', 'para', 'por', 'sin', 'su', 'un', 'una', 'y',
+})
+
+
+def terminos(texto):
+    texto = unicodedata.normalize('NFKD', (texto or '').lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return Counter(
+        palabra[:64] for palabra in _PALABRA.findall(texto)
+        if len(palabra) > 1 and palabra not in STOPWORDS
+    )
+
+
+def indexar_pedidos(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    backend = getattr(settings, 'SEARCH', {}).get('BACKEND', 'auto')
+    if backend == 'fulltext' or (backend == 'auto' and schema_editor.connection.vendor == 'mysql'):
+        return
+    Pedido = apps.get_model('restaurant', 'Pedido')
+    TerminoPedido = apps.get_model('restaurant', 'TerminoPedido')
+    ultimo_id = 0
+    while True:
+        lote = list(
+            Pedido.objects.using(alias).filter(pk__gt=ultimo_id).order_by('pk')
+            .values_list('pk', 'sucursal_id', 'descripcion')[:BATCH_SIZE]
+        )
+        if not lote:
+            break
+        with transaction.atomic(using=alias):
+            ids = [pk for pk, _, _ in lote]
+            TerminoPedido.objects.using(alias).filter(pedido_id__in=ids).delete()
+            TerminoPedido.objects.using(alias).bulk_create([
+                TerminoPedido(pedido_id=pk, sucursal_id=sucursal_id, termino=termino, frecuencia=frecuencia)
+                for pk, sucursal_id, descripcion in lote
+                for termino, frecuencia in terminos(descripcion).items()
+            ])
+        ultimo_id = lote[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('restaurant', '0008_pedido_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoPedido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=64, verbose_name='Término')),
+                ('frecuencia', models.PositiveSmallIntegerField(default=1, verbose_name='Frecuencia')),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='restaurant.pedido', verbose_name='Pedido')),
+                ('sucursal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='restaurant.sucursal', verbose_name='Sucursal')),
+            ],
+            options={
+                'verbose_name': 'Término de pedido',
+                'verbose_name_plural': 'Términos de pedidos',
+                'indexes': [models.Index(fields=['sucursal', 'termino'], name='termino_sucursal_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='terminopedido',
+            constraint=models.UniqueConstraint(fields=('pedido', 'termino'), name='termino_pedido_uniq'),
+        ),
+        migrations.RunPython(indexar_pedidos, migrations.RunPython.noop),
+    ]
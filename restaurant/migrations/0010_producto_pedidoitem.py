@@ -0,0 +1,50 @@
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0009_termino_pedido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Producto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+                ('nombre', models.CharField(max_length=100, unique=True, verbose_name='Nombre')),
+                ('precio', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio')),
+                ('activo', models.BooleanField(default=True, help_text='Solo los productos activos se pueden pedir.', verbose_name='Activo')),
+            ],
+            options={
+                'verbose_name': 'Producto',
+                'verbose_name_plural': 'Productos',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.AddField(
+            model_name='pedidoarchivado',
+            name='items',
+            field=models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='Copia de las líneas del pedido al archivarlo.', verbose_name='Líneas del pedido'),
+        ),
+        migrations.CreateModel(
+            name='PedidoItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cantidad', models.PositiveSmallIntegerField(default=1, verbose_name='Cantidad')),
+                ('precio_unitario', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Precio unitario')),
+                ('pedido', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='restaurant.pedido', verbose_name='Pedido')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='items', to='restaurant.producto', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Línea de pedido',
+                'verbose_name_plural': 'Líneas de pedido',
+                'ordering': ['pk'],
+                'indexes': [models.Index(fields=['pedido', 'producto', 'cantidad', 'precio_unitario'], name='pedidoitem_ventas_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,105 @@
+"""
+Migración de datos: crea las líneas (PedidoItem) de los pedidos existentes
+a partir de su descripción libre ('2 pizza margarita, 1 café').
+
+Se recorre la tabla por lotes de id ascendente, cada lote en su propia
+transacción (la migración no es atómica), así que puede interrumpirse y
+volver a lanzarse: los pedidos que ya tienen líneas se saltan.
+
+Los productos que no existían se crean inactivos y con precio 0, y las
+líneas históricas quedan con precio unitario 0: el total guardado de esos
+pedidos no se recalcula (0014_pedidoitem_historico las marca como históricas). Un administrador debe poner precio a los
+productos y activarlos antes de que se puedan pedir.
+"""
+import re
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+_LINEA = re.compile(r'^(\d+)\s*(?:x\s+)?(.+)$', re.IGNORECASE)
+
+
+def lineas(descripcion):
+    """'2 pizza margarita, 1 café' -> [('Pizza margarita', 2), ('Café', 1)]."""
+    resultado = []
+    for parte in re.split(r'[,;\n]+', descripcion or ''):
+        parte = ' '.join(parte.split())
+        if not parte:
+            continue
+        coincidencia = _LINEA.match(parte)
+        if coincidencia:
+            cantidad, nombre = int(coincidencia.group(1)), coincidencia.group(2)
+        else:
+            cantidad, nombre = 1, parte
+        if cantidad < 1:
+            continue
+        resultado.append((nombre.capitalize()[:100], min(cantidad, 32767)))
+    return resultado
+
+
+def crear_items(apps, schema_editor):
+    Pedido = apps.get_model('restaurant', 'Pedido')
+    PedidoItem = apps.get_model('restaurant', 'PedidoItem')
+    Producto = apps.get_model('restaurant', 'Producto')
+
+    productos = {}
+    ultimo_id = 0
+    while True:
+        lote = list(
+            Pedido.objects.filter(pk__gt=ultimo_id)
+            .order_by('pk')
+            .values_list('pk', 'descripcion')[:BATCH_SIZE]
+        )
+        if not lote:
+            break
+        ultimo_id = lote[-1][0]
+
+        with transaction.atomic():
+            con_items = set(
+                PedidoItem.objects
+                .filter(pedido_id__in=[pk for pk, _ in lote])
+                .values_list('pedido_id', flat=True)
+            )
+            por_pedido = [
+                (pk, lineas(descripcion)) for pk, descripcion in lote if pk not in con_items
+            ]
+
+            # Productos del lote que aún no están en memoria: una consulta y un INSERT
+            nombres = {nombre for _, items in por_pedido for nombre, _ in items} - set(productos)
+            if nombres:
+                productos.update(
+                    Producto.objects.filter(nombre__in=nombres).values_list('nombre', 'pk')
+                )
+                nuevos = nombres - set(productos)
+                if nuevos:
+                    Producto.objects.bulk_create(
+                        [Producto(nombre=nombre, precio=0, activo=False) for nombre in nuevos],
+                        ignore_conflicts=True,
+                    )
+                    productos.update(
+                        Producto.objects.filter(nombre__in=nuevos).values_list('nombre', 'pk')
+                    )
+
+            PedidoItem.objects.bulk_create([
+                PedidoItem(
+                    pedido_id=pk, producto_id=productos[nombre],
+                    cantidad=cantidad, precio_unitario=0,
+                )
+                for pk, items in por_pedido
+                for nombre, cantidad in items
+                if nombre in productos
+            ], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('restaurant', '0010_producto_pedidoitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+"""
+Índice (sucursal, updated_at) de Pedido para consultar los cambios recientes
+de una sucursal. Se crea en línea para no bloquear las escrituras en una
+tabla de pedidos grande.
+"""
+from django.db import migrations, models
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """
+    AddIndex que en MySQL crea el índice sin bloquear las escrituras; si no
+    se puede en línea, MySQL falla en lugar de bloquear la tabla. Copia
+    mínima de restaurant.operations.AddIndexOnline, sin informe de avance,
+    para que la migración no dependa del código de la app.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'mysql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(f'{self.index.create_sql(model, schema_editor)} ALGORITHM=INPLACE LOCK=NONE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0011_pedido_items_backfill'),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name='pedido',
+            index=models.Index(fields=['sucursal', 'updated_at'], name='pedido_sucursal_updated_idx'),
+        ),
+    ]
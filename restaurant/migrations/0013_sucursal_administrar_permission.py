@@ -0,0 +1,15 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurant', '0012_pedido_sucursal_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='sucursal',
+            options={'ordering': ['nombre'], 'permissions': [('administrar_sucursal', 'Puede administrar la sucursal (usuarios y perfiles)')], 'verbose_name': 'Sucursal', 'verbose_name_plural': 'Sucursales'},
+        ),
+    ]
@@ -0,0 +1,81 @@
+"""
+Marca como históricas las líneas creadas por 0011_pedido_items_backfill,
+las de precio unitario 0, para que su pedido conserve el total guardado y no
+cuenten en las ventas por producto. Las de la API toman el precio de un
+producto activo, así que solo coincidiría la línea de un producto gratuito.
+Las líneas se marcan por lotes de id, cada lote en su propia transacción,
+como en 0011. El índice de ventas se sustituye en línea: en MySQL ni crear
+el nuevo ni borrar el anterior bloquea las escrituras de las líneas.
+"""
+from django.db import migrations, models, transaction
+
+BATCH_SIZE = 10000
+
+
+def marcar_historicas(apps, schema_editor):
+    PedidoItem = apps.get_model('restaurant', 'PedidoItem')
+    lineas = PedidoItem.objects.using(schema_editor.connection.alias)
+    ultimo_id = 0
+    while True:
+        ids = list(lineas.filter(pk__gt=ultimo_id).order_by('pk').values_list('pk', flat=True)[:BATCH_SIZE])
+        if not ids:
+            break
+        with transaction.atomic(using=schema_editor.connection.alias):
+            lineas.filter(pk__gte=ids[0], pk__lte=ids[-1], precio_unitario=0).update(historico=True)
+        ultimo_id = ids[-1]
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """
+    AddIndex que en MySQL crea el índice sin bloquear las escrituras; si no
+    se puede en línea, MySQL falla en lugar de bloquear la tabla. Copia
+    mínima de restaurant.operations.AddIndexOnline, sin informe de avance,
+    para que la migración no dependa del código de la app.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'mysql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(f'{self.index.create_sql(model, schema_editor)} ALGORITHM=INPLACE LOCK=NONE')
+
+
+class RemoveIndexOnline(migrations.RemoveIndex):
+    """RemoveIndex que en MySQL borra el índice sin bloquear las escrituras."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if schema_editor.connection.vendor != 'mysql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(
+                f'DROP INDEX {schema_editor.quote_name(self.name)} '
+                f'ON {schema_editor.quote_name(model._meta.db_table)} ALGORITHM=INPLACE LOCK=NONE'
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('restaurant', '0013_sucursal_administrar_permission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pedidoitem',
+            name='historico',
+            field=models.BooleanField(default=False, help_text='Creada a partir de la descripción de un pedido antiguo, sin precio: el total del pedido es el que se guardó entonces.', verbose_name='Histórica'),
+        ),
+        migrations.RunPython(marcar_historicas, migrations.RunPython.noop),
+        AddIndexOnline(
+            model_name='pedidoitem',
+            index=models.Index(fields=['pedido', 'historico', 'producto', 'cantidad', 'precio_unitario'], name='pedidoitem_ventas_hist_idx'),
+        ),
+        RemoveIndexOnline(
+            model_name='pedidoitem',
+            name='pedidoitem_ventas_idx',
+        ),
+    ]
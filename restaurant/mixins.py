@@ -0,0 +1,106 @@
+"""
+Mixins reutilizables para las vistas de la API.
+"""
+
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .idempotency import idempotent
+from .serializers import campos_solicitados
+from .tasks import notificar_pedido
+from .tenancy import filtrar_sucursal, sucursal_actual
+
+
+class SucursalScopedMixin:
+    """
+    Mixin para vistas genéricas que limita el queryset a la sucursal de la
+    petición (ver restaurant.tenancy) y la asigna a los objetos creados.
+    `sucursal_field` es el lookup de la sucursal desde el modelo de la vista;
+    `asignar_sucursal` indica si perform_create la pasa a serializer.save().
+    """
+    sucursal_field = 'sucursal'
+    asignar_sucursal = True
+
+    def get_queryset(self):
+        return filtrar_sucursal(super().get_queryset(), sucursal_actual(self.request), self.sucursal_field)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sucursal'] = sucursal_actual(self.request)
+        return context
+
+    def perform_create(self, serializer):
+        sucursal = sucursal_actual(self.request)
+        if self.asignar_sucursal and sucursal is not None:
+            serializer.save(sucursal=sucursal)
+        else:
+            serializer.save()
+
+
+class SparseFieldsMixin:
+    """
+    Mixin para vistas genéricas que limita las columnas consultadas a los
+    campos pedidos con ?fields=/?exclude= (ver DynamicFieldsMixin). Sin
+    selección se cargan todos los campos del serializador, también con sus
+    select_related()/prefetch_related(), para no consultar por fila.
+    """
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'optimizar_queryset'):
+            return queryset
+        nombres = campos_solicitados(self.request, serializer_class.Meta.fields)
+        if nombres is None:
+            nombres = serializer_class.Meta.fields
+        return serializer_class.optimizar_queryset(queryset, nombres)
+
+
+class FastListMixin:
+    """
+    Mixin para ListAPIView que renderiza el listado con un FastSerializer
+    (ver restaurant.fast) en lugar del serializador de DRF.
+    Respeta ?fields=/?exclude=: solo se consultan las columnas necesarias.
+    Si la vista tiene paginación se usa el camino normal.
+    """
+    fast_serializer_class = None
+
+    def get_fast_serializer(self):
+        disponibles = [nombre for nombre, _, _ in self.fast_serializer_class.campos]
+        return self.fast_serializer_class(campos_solicitados(self.request, disponibles))
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer_class is None or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(self.get_fast_serializer().serializar(queryset))
+
+
+class IdempotentCreateMixin:
+    """
+    Mixin para vistas con create() que admite la cabecera Idempotency-Key
+    (ver restaurant.idempotency): los reintentos reciben la respuesta guardada.
+    """
+    def create(self, request, *args, **kwargs):
+        return idempotent(request, lambda: super(IdempotentCreateMixin, self).create(request, *args, **kwargs))
+
+
+class NotificarPedidoMixin:
+    """
+    Mixin para las vistas que crean o modifican pedidos: encola la
+    notificación de cada pedido en la misma transacción que el cambio
+    (outbox, ver tasks.registry). Una creación múltiple se guarda entera o no
+    se guarda.
+    """
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            super().perform_create(serializer)
+            pedidos = serializer.instance if isinstance(serializer.instance, list) else [serializer.instance]
+            notificar_pedido.encolar_lote([(pedido.id, 'creado') for pedido in pedidos])
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+            notificar_pedido.encolar(serializer.instance.id, 'actualizado')
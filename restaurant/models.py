@@ -2,6 +2,8 @@
 Modelos para la gestión del restaurante.
 """
 
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 
@@ -17,6 +19,70 @@ class BaseModel(models.Model):
         abstract = True
 
 
+class Sucursal(BaseModel):
+    """
+    Local del restaurante. Mesas, pedidos y la pertenencia de los usuarios
+    a grupos se definen por sucursal.
+    """
+    nombre = models.CharField(max_length=100, unique=True, verbose_name='Nombre')
+    codigo = models.SlugField(
+        max_length=50,
+        unique=True,
+        verbose_name='Código',
+        help_text='Identificador usado en la cabecera X-Sucursal.'
+    )
+    activa = models.BooleanField(default=True, verbose_name='Activa')
+
+    class Meta:
+        verbose_name = 'Sucursal'
+        verbose_name_plural = 'Sucursales'
+        ordering = ['nombre']
+        permissions = [
+            ('administrar_sucursal', 'Puede administrar la sucursal (usuarios y perfiles)'),
+        ]
+
+    def __str__(self):
+        return self.nombre
+
+
+class Membresia(models.Model):
+    """
+    Pertenencia de un usuario a una sucursal con un grupo (rol).
+    Un usuario puede ser administrador en una sucursal y empleado en otra.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='membresias',
+        verbose_name='Usuario'
+    )
+    sucursal = models.ForeignKey(
+        Sucursal,
+        on_delete=models.CASCADE,
+        related_name='membresias',
+        verbose_name='Sucursal'
+    )
+    group = models.ForeignKey(
+        'auth.Group',
+        on_delete=models.CASCADE,
+        related_name='membresias',
+        verbose_name='Grupo'
+    )
+
+    class Meta:
+        verbose_name = 'Membresía'
+        verbose_name_plural = 'Membresías'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'sucursal'], name='membresia_user_sucursal_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['sucursal', 'group'], name='membresia_sucursal_group_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.sucursal} ({self.group})'
+
+
 class Mesa(BaseModel):
     """
     Modelo para representar las mesas del restaurante.
@@ -27,7 +93,13 @@ class Mesa(BaseModel):
         ('reservada', 'Reservada'),
     ]
 
-    numero = models.PositiveIntegerField(unique=True, verbose_name='Número de mesa')
+    sucursal = models.ForeignKey(
+        Sucursal,
+        on_delete=models.PROTECT,
+        related_name='mesas',
+        verbose_name='Sucursal'
+    )
+    numero = models.PositiveIntegerField(verbose_name='Número de mesa')
     capacidad = models.PositiveIntegerField(verbose_name='Capacidad de comensales')
     estado = models.CharField(
         max_length=20,
@@ -40,6 +112,10 @@ class Mesa(BaseModel):
         verbose_name = 'Mesa'
         verbose_name_plural = 'Mesas'
         ordering = ['numero']
+        constraints = [
+            # El número de mesa es único dentro de cada sucursal
+            models.UniqueConstraint(fields=['sucursal', 'numero'], name='mesa_sucursal_numero_uniq'),
+        ]
 
     def __str__(self):
         return f'Mesa {self.numero} ({self.get_estado_display()})'
@@ -57,6 +133,12 @@ class Pedido(BaseModel):
         ('pagado', 'Pagado'),
     ]
 
+    sucursal = models.ForeignKey(
+        Sucursal,
+        on_delete=models.PROTECT,
+        related_name='pedidos',
+        verbose_name='Sucursal'
+    )
     mesa = models.ForeignKey(
         Mesa,
         on_delete=models.CASCADE,
@@ -81,7 +163,238 @@ class Pedido(BaseModel):
         verbose_name = 'Pedido'
         verbose_name_plural = 'Pedidos'
         ordering = ['-created_at']
+        indexes = [
+            # Usado por el archivado para localizar pedidos pagados antiguos
+            models.Index(fields=['estado', 'updated_at'], name='pedido_estado_updated_idx'),
+            # Orden por defecto y jerarquía de fechas del admin
+            models.Index(fields=['-created_at'], name='pedido_created_idx'),
+            # Listados de una sucursal: cada una recorre solo sus propias filas
+            models.Index(fields=['sucursal', '-created_at'], name='pedido_sucursal_created_idx'),
+            models.Index(fields=['sucursal', 'estado'], name='pedido_sucursal_estado_idx'),
+            # Cambios recientes de una sucursal (updated_at > desde)
+            models.Index(fields=['sucursal', 'updated_at'], name='pedido_sucursal_updated_idx'),
+        ]
 
     def __str__(self):
         return f'Pedido #{self.id} - Mesa {self.mesa.numero} ({self.get_estado_display()})'
 
+    def save(self, *args, **kwargs):
+        # La sucursal del pedido es siempre la de su mesa (desnormalizada para filtrar sin JOIN)
+        if self.mesa_id is not None:
+            self.sucursal_id = self.mesa.sucursal_id
+        super().save(*args, **kwargs)
+
+
+class Producto(BaseModel):
+    """
+    Plato o bebida de la carta. Los pedidos lo referencian en sus líneas
+    (PedidoItem) con el precio vigente al pedir.
+    """
+    nombre = models.CharField(max_length=100, unique=True, verbose_name='Nombre')
+    precio = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Precio'
+    )
+    activo = models.BooleanField(
+        default=True,
+        verbose_name='Activo',
+        help_text='Solo los productos activos se pueden pedir.'
+    )
+
+    class Meta:
+        verbose_name = 'Producto'
+        verbose_name_plural = 'Productos'
+        ordering = ['nombre']
+
+    def __str__(self):
+        return self.nombre
+
+
+class PedidoItem(models.Model):
+    """
+    Línea de un pedido: producto, cantidad y precio unitario al pedir.
+    El total del pedido es la suma de sus líneas (ver restaurant/sales.py).
+    """
+    pedido = models.ForeignKey(
+        Pedido,
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name='Pedido'
+    )
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.PROTECT,
+        related_name='items',
+        verbose_name='Producto'
+    )
+    cantidad = models.PositiveSmallIntegerField(default=1, verbose_name='Cantidad')
+    precio_unitario = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        verbose_name='Precio unitario'
+    )
+    historico = models.BooleanField(
+        default=False,
+        verbose_name='Histórica',
+        help_text='Creada a partir de la descripción de un pedido antiguo, sin precio: '
+                  'el total del pedido es el que se guardó entonces.'
+    )
+
+    class Meta:
+        verbose_name = 'Línea de pedido'
+        verbose_name_plural = 'Líneas de pedido'
+        ordering = ['pk']
+        indexes = [
+            # Ventas por producto: el JOIN desde los pedidos de un rango de fechas
+            # descarta las líneas históricas y resuelve cantidad y precio sin
+            # leer la tabla
+            models.Index(
+                fields=['pedido', 'historico', 'producto', 'cantidad', 'precio_unitario'],
+                name='pedidoitem_ventas_hist_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.cantidad} x {self.producto_id} (pedido #{self.pedido_id})'
+
+    @property
+    def subtotal(self):
+        return self.cantidad * self.precio_unitario
+
+
+class TerminoPedido(models.Model):
+    """
+    Índice invertido de la descripción de los pedidos: una fila por palabra
+    normalizada y pedido. Lo mantiene restaurant.search al guardar un
+    pedido cuando el motor no tiene FULLTEXT (p. ej. SQLite).
+    """
+    termino = models.CharField(max_length=64, verbose_name='Término')
+    pedido = models.ForeignKey(
+        Pedido,
+        on_delete=models.CASCADE,
+        related_name='terminos',
+        verbose_name='Pedido'
+    )
+    sucursal = models.ForeignKey(
+        Sucursal,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Sucursal'
+    )
+    frecuencia = models.PositiveSmallIntegerField(default=1, verbose_name='Frecuencia')
+
+    class Meta:
+        verbose_name = 'Término de pedido'
+        verbose_name_plural = 'Términos de pedidos'
+        constraints = [
+            models.UniqueConstraint(fields=['pedido', 'termino'], name='termino_pedido_uniq'),
+        ]
+        indexes = [
+            # Búsqueda por prefijo dentro de una sucursal
+            models.Index(fields=['sucursal', 'termino'], name='termino_sucursal_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.termino} (pedido #{self.pedido_id})'
+
+
+class PedidoArchivado(models.Model):
+    """
+    Histórico frío de pedidos pagados.
+    Los pedidos en estado 'pagado' con cierta antigüedad se mueven aquí
+    (ver comando archivar_pedidos) para mantener pequeña la tabla de Pedido.
+    Conserva el id y los timestamps originales del pedido.
+    """
+    pedido_id = models.BigIntegerField(unique=True, verbose_name='ID del pedido original')
+    sucursal = models.ForeignKey(
+        Sucursal,
+        on_delete=models.PROTECT,
+        related_name='pedidos_archivados',
+        verbose_name='Sucursal'
+    )
+    mesa = models.ForeignKey(
+        Mesa,
+        on_delete=models.CASCADE,
+        related_name='pedidos_archivados',
+        verbose_name='Mesa'
+    )
+    descripcion = models.TextField(verbose_name='Descripción del pedido')
+    total = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0.00,
+        verbose_name='Total'
+    )
+    estado = models.CharField(
+        max_length=20,
+        choices=Pedido.ESTADO_CHOICES,
+        default='pagado',
+        verbose_name='Estado'
+    )
+    items = models.JSONField(
+        default=list,
+        encoder=DjangoJSONEncoder,
+        verbose_name='Líneas del pedido',
+        help_text='Copia de las líneas del pedido al archivarlo.'
+    )
+    created_at = models.DateTimeField(verbose_name='Fecha de creación')
+    updated_at = models.DateTimeField(verbose_name='Fecha de actualización')
+    archivado_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de archivado')
+
+    # Campos copiados tal cual desde Pedido al archivar
+    CAMPOS_COPIADOS = ('sucursal_id', 'mesa_id', 'descripcion', 'total', 'estado', 'created_at', 'updated_at')
+
+    class Meta:
+        verbose_name = 'Pedido archivado'
+        verbose_name_plural = 'Pedidos archivados'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['mesa', '-created_at'], name='archivo_mesa_created_idx'),
+            models.Index(fields=['sucursal', '-created_at'], name='archivo_sucursal_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'Pedido archivado #{self.pedido_id} - Mesa {self.mesa_id}'
+
+
+class IdempotencyKey(models.Model):
+    """
+    Respuesta guardada de una petición de escritura con cabecera Idempotency-Key.
+    Los reintentos con la misma clave reciben la respuesta guardada sin volver
+    a ejecutar la validación ni las inserciones (ver restaurant/idempotency.py).
+    """
+    ESTADO_CHOICES = [
+        ('procesando', 'Procesando'),
+        ('completado', 'Completado'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+        verbose_name='Usuario'
+    )
+    clave = models.CharField(max_length=255, verbose_name='Clave')
+    endpoint = models.CharField(max_length=255, verbose_name='Endpoint')
+    huella = models.CharField(max_length=64, verbose_name='Huella de la petición')
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='procesando',
+        verbose_name='Estado'
+    )
+    status_code = models.PositiveSmallIntegerField(null=True, verbose_name='Código de estado')
+    respuesta = models.JSONField(null=True, encoder=DjangoJSONEncoder, verbose_name='Respuesta')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
+    expires_at = models.DateTimeField(db_index=True, verbose_name='Fecha de expiración')
+
+    class Meta:
+        verbose_name = 'Clave de idempotencia'
+        verbose_name_plural = 'Claves de idempotencia'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'clave'], name='idempotency_user_clave_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.clave} ({self.get_estado_display()})'
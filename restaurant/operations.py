@@ -0,0 +1,206 @@
+"""
+Operaciones de migración para tablas grandes.
+
+AddIndexOnline crea un índice sin bloquear las escrituras de la tabla:
+- MySQL: CREATE INDEX ... ALGORITHM=INPLACE LOCK=NONE. InnoDB construye el
+  índice en línea y aplica después los cambios concurrentes; si el índice no
+  se puede crear sin bloqueo, MySQL falla en lugar de bloquear la tabla.
+  Mientras tanto, otro hilo lee el avance en performance_schema (etapas
+  stage/innodb/alter%). Los instrumentos y consumidores de performance_schema
+  son globales del servidor: se activan solo durante la creación y al
+  terminar se restaura su estado anterior.
+- SQLite: no hay creación en línea; el CREATE INDEX normal bloquea las
+  escrituras mientras dura y el avance se informa con el tiempo transcurrido
+  (set_progress_handler).
+- Resto de motores: igual que AddIndex.
+
+Si el índice ya existe (una ejecución anterior interrumpida, ya que en MySQL
+el DDL no es transaccional), no se vuelve a crear. El avance solo se
+muestra en tablas de más de `umbral_filas` filas (estimadas con MAX(pk)).
+"""
+
+import threading
+import time
+
+from django.db import DatabaseError, connections, migrations
+from django.db.models import Max
+
+# Instrumentación de InnoDB para el avance de ALTER/CREATE INDEX:
+# (consulta del estado actual, activación, restauración de una fila)
+_INSTRUMENTOS_MYSQL = (
+    (
+        "SELECT ENABLED, TIMED, NAME FROM performance_schema.setup_instruments "
+        "WHERE NAME LIKE 'stage/innodb/alter%%'",
+        "UPDATE performance_schema.setup_instruments SET ENABLED = 'YES', TIMED = 'YES' "
+        "WHERE NAME LIKE 'stage/innodb/alter%%'",
+        "UPDATE performance_schema.setup_instruments SET ENABLED = %s, TIMED = %s WHERE NAME = %s",
+    ),
+    (
+        "SELECT ENABLED, NAME FROM performance_schema.setup_consumers "
+        "WHERE NAME LIKE 'events_stages_%%'",
+        "UPDATE performance_schema.setup_consumers SET ENABLED = 'YES' "
+        "WHERE NAME LIKE 'events_stages_%%'",
+        "UPDATE performance_schema.setup_consumers SET ENABLED = %s WHERE NAME = %s",
+    ),
+)
+
+_AVANCE_MYSQL = (
+    "SELECT EVENT_NAME, WORK_COMPLETED, WORK_ESTIMATED "
+    "FROM performance_schema.events_stages_current "
+    "WHERE THREAD_ID = %s AND EVENT_NAME LIKE 'stage/innodb/alter%%'"
+)
+
+
+def _imprimir(mensaje):
+    print(f'  {mensaje}', flush=True)
+
+
+class AddIndexOnline(migrations.AddIndex):
+    """AddIndex que no bloquea las escrituras en MySQL e informa del avance."""
+
+    def __init__(self, model_name, index, intervalo=5, umbral_filas=100_000):
+        super().__init__(model_name, index)
+        self.intervalo = intervalo
+        self.umbral_filas = umbral_filas
+        self.progreso = _imprimir
+
+    def deconstruct(self):
+        nombre, args, kwargs = super().deconstruct()
+        if self.intervalo != 5:
+            kwargs['intervalo'] = self.intervalo
+        if self.umbral_filas != 100_000:
+            kwargs['umbral_filas'] = self.umbral_filas
+        return nombre, args, kwargs
+
+    def describe(self):
+        return f'{super().describe()} (online)'
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        conexion = schema_editor.connection
+        if schema_editor.collect_sql or conexion.vendor not in ('mysql', 'sqlite'):
+            # sqlmigrate o motores sin camino propio
+            sql = self.index.create_sql(model, schema_editor)
+            if conexion.vendor == 'mysql':
+                sql = f'{sql} ALGORITHM=INPLACE LOCK=NONE'
+            schema_editor.execute(sql)
+            return
+        if self._existe(model, conexion):
+            self.progreso(f'Índice {self.index.name}: ya existe, no se crea.')
+            return
+
+        filas = model._default_manager.using(conexion.alias).aggregate(maximo=Max('pk'))['maximo'] or 0
+        informar = filas >= self.umbral_filas
+        if informar:
+            self.progreso(f'Índice {self.index.name}: creando en {model._meta.db_table} (~{filas} filas)...')
+        inicio = time.monotonic()
+        if conexion.vendor == 'mysql':
+            self._crear_mysql(model, schema_editor, informar, inicio)
+        else:
+            self._crear_sqlite(model, schema_editor, informar, inicio)
+        if informar:
+            self.progreso(f'Índice {self.index.name}: creado en {time.monotonic() - inicio:.1f} s.')
+
+    def _existe(self, model, conexion):
+        with conexion.cursor() as cursor:
+            restricciones = conexion.introspection.get_constraints(cursor, model._meta.db_table)
+        return self.index.name in restricciones
+
+    def _crear_mysql(self, model, schema_editor, informar, inicio):
+        sql = f'{self.index.create_sql(model, schema_editor)} ALGORITHM=INPLACE LOCK=NONE'
+        if not informar:
+            schema_editor.execute(sql)
+            return
+
+        conexion = schema_editor.connection
+        thread_id = None
+        anteriores = []
+        try:
+            with conexion.cursor() as cursor:
+                for consulta, activar, restaurar in _INSTRUMENTOS_MYSQL:
+                    cursor.execute(consulta, [])
+                    anteriores.append((restaurar, cursor.fetchall()))
+                    cursor.execute(activar, [])
+                cursor.execute(
+                    'SELECT THREAD_ID FROM performance_schema.threads '
+                    'WHERE PROCESSLIST_ID = CONNECTION_ID()', []
+                )
+                fila = cursor.fetchone()
+                thread_id = fila[0] if fila else None
+        except DatabaseError:
+            # Sin performance_schema o sin privilegios: solo tiempo transcurrido
+            pass
+
+        fin = threading.Event()
+        vigilante = threading.Thread(
+            target=self._vigilar_mysql, args=(conexion.alias, thread_id, inicio, fin),
+            name=f'avance-{self.index.name}', daemon=True,
+        )
+        vigilante.start()
+        try:
+            schema_editor.execute(sql)
+        finally:
+            fin.set()
+            vigilante.join()
+            self._restaurar_mysql(conexion, anteriores)
+
+    def _restaurar_mysql(self, conexion, anteriores):
+        """Deja los instrumentos y consumidores de performance_schema como estaban."""
+        try:
+            with conexion.cursor() as cursor:
+                for restaurar, filas in anteriores:
+                    if filas:
+                        cursor.executemany(restaurar, filas)
+        except DatabaseError as error:
+            self.progreso(f'Índice {self.index.name}: no se ha podido restaurar performance_schema ({error}).')
+
+    def _vigilar_mysql(self, alias, thread_id, inicio, fin):
+        """Hilo que informa del avance con su propia conexión."""
+        conexion = connections[alias]
+        try:
+            while not fin.wait(self.intervalo):
+                transcurrido = time.monotonic() - inicio
+                avance = None
+                if thread_id is not None:
+                    try:
+                        with conexion.cursor() as cursor:
+                            cursor.execute(_AVANCE_MYSQL, [thread_id])
+                            avance = cursor.fetchone()
+                    except DatabaseError:
+                        thread_id = None
+                if avance and avance[2]:
+                    etapa, hecho, estimado = avance
+                    self.progreso(
+                        f'Índice {self.index.name}: {100 * hecho / estimado:.0f}% '
+                        f'({etapa.rsplit("/", 1)[-1]}), {transcurrido:.0f} s'
+                    )
+                else:
+                    self.progreso(f'Índice {self.index.name}: {transcurrido:.0f} s')
+        finally:
+            conexion.close()
+
+    def _crear_sqlite(self, model, schema_editor, informar, inicio):
+        sql = self.index.create_sql(model, schema_editor)
+        if not informar:
+            schema_editor.execute(sql)
+            return
+
+        conexion = schema_editor.connection
+        conexion.ensure_connection()
+        siguiente = inicio + self.intervalo
+
+        def avance():
+            nonlocal siguiente
+            ahora = time.monotonic()
+            if ahora >= siguiente:
+                self.progreso(f'Índice {self.index.name}: {ahora - inicio:.0f} s')
+                siguiente = ahora + self.intervalo
+            return 0  # distinto de 0 interrumpiría la sentencia
+
+        conexion.connection.set_progress_handler(avance, 100_000)
+        try:
+            schema_editor.execute(sql)
+        finally:
+            conexion.connection.set_progress_handler(None, 0)
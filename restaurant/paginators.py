@@ -0,0 +1,62 @@
+"""
+Paginadores para tablas grandes.
+"""
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+def filas_estimadas(modelo, alias):
+    """
+    Número aproximado de filas de la tabla según las estadísticas del motor
+    (sin recorrerla). Retorna None si el motor no lo ofrece.
+    """
+    connection = connections[alias]
+    tabla = modelo._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT TABLE_ROWS FROM information_schema.TABLES '
+                'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+                [tabla]
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [tabla])
+        else:
+            return None
+        fila = cursor.fetchone()
+    return int(fila[0]) if fila and fila[0] is not None and fila[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginador que evita el COUNT(*) completo:
+    - sin filtros usa la estimación de filas del motor cuando supera
+      `umbral_estimacion` (por debajo, el COUNT exacto es barato);
+    - con filtros cuenta como mucho `limite_conteo` filas
+      (SELECT COUNT(*) FROM (... LIMIT n)); más allá se muestran ese número de resultados.
+    """
+    umbral_estimacion = 100000
+    limite_conteo = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        if not queryset.query.where:
+            estimadas = filas_estimadas(queryset.model, queryset.db)
+            if estimadas is not None and estimadas > self.umbral_estimacion:
+                return estimadas
+            return super().count
+        return queryset.order_by()[:self.limite_conteo].count()
+
+
+class BusquedaPagination(PageNumberPagination):
+    """Paginación de resultados de búsqueda con el conteo acotado de EstimatedCountPaginator."""
+    django_paginator_class = EstimatedCountPaginator
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
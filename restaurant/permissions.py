@@ -1,74 +1,77 @@
 """
 Permisos personalizados para la API del restaurante.
-Implementa control de acceso basado en grupos de usuarios.
+Implementa control de acceso con los permisos de modelo de Django que tiene
+el grupo del usuario en la sucursal de la petición (ver restaurant.tenancy y
+restaurant.policy): los mismos que se asignan y se ven en el admin.
 """
 
 from rest_framework import permissions
 
+from monitoring import metrics
+from .policy import permiso_modelo, tiene_permiso
 
-class IsAdminGroup(permissions.BasePermission):
-    """
-    Permiso que verifica si el usuario pertenece al grupo 'Administradores'.
-    """
-    def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        return (
-            request.user.is_superuser or
-            request.user.groups.filter(name='Administradores').exists()
-        )
+# Permiso de los administradores de una sucursal (gestión de usuarios)
+ADMINISTRAR_SUCURSAL = 'restaurant.administrar_sucursal'
 
 
-class IsAdminOrReadOnly(permissions.BasePermission):
+def _resultado(permisos, permitido):
     """
-    Permiso que permite acceso de solo lectura a todos los usuarios autenticados,
-    pero solo los administradores pueden realizar acciones de escritura.
+    Registra el resultado de la comprobación en las métricas y lo retorna.
+    La etiqueta es el permiso exigido ('restaurant.view_pedido'), los
+    exigidos separados por comas, o el motivo si no se exige ninguno.
     """
-    def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-
-        if request.method in permissions.SAFE_METHODS:
-            return True
+    etiqueta = permisos if isinstance(permisos, str) else ','.join(permisos) or 'ninguno'
+    metrics.permission_checks_total.inc(etiqueta, 'permitido' if permitido else 'denegado')
+    return permitido
 
-        return (
-            request.user.is_superuser or
-            request.user.groups.filter(name='Administradores').exists()
-        )
 
-
-class CanDeletePermission(permissions.BasePermission):
+class HasModelPermission(permissions.BasePermission):
     """
-    Permiso que solo permite eliminar registros a los administradores.
-    Los empleados pueden crear, leer y actualizar, pero no eliminar.
+    Permiso único para todas las vistas. Exige el permiso de modelo que
+    corresponde al método sobre el modelo del queryset de la vista
+    (GET/HEAD: view, POST: add, PUT/PATCH: change, DELETE: delete).
+
+    - `permisos` fija los permisos exigidos, sea cual sea el método: para
+      vistas sin queryset o acciones que no son CRUD (ver requiere()).
+    - Si la vista define `propietario` (el campo del objeto con el id del
+      usuario), el propio usuario puede leer y modificar el objeto sin
+      permisos de modelo; borrarlo sigue exigiendo el permiso.
     """
+    message = 'No tiene permisos para realizar esta acción.'
+    permisos = None
+    metodos_propietario = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH')
+
+    def permisos_requeridos(self, request, view):
+        if self.permisos is not None:
+            return self.permisos
+        queryset = getattr(view, 'queryset', None)
+        if queryset is None:
+            queryset = view.get_queryset()
+        permiso = permiso_modelo(queryset.model, request.method)
+        return () if permiso is None else (permiso,)
+
     def has_permission(self, request, view):
         if not request.user or not request.user.is_authenticated:
-            return False
-        
-        if request.method != 'DELETE':
+            return _resultado('anonimo', False)
+        if getattr(view, 'propietario', None) and request.method in self.metodos_propietario:
+            # Se decide por objeto en has_object_permission
             return True
+        permisos = self.permisos_requeridos(request, view)
+        return _resultado(permisos, tiene_permiso(request, *permisos))
 
-        return (
-            request.user.is_superuser or
-            request.user.groups.filter(name='Administradores').exists()
-        )
-
-
-class IsOwnerOrAdmin(permissions.BasePermission):
-    """
-    Permiso para vistas de usuario: permite acceso si es el propio usuario o un admin.
-    """
     def has_object_permission(self, request, view, obj):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-
-        if hasattr(obj, 'id') and obj.id == request.user.id:
+        campo = getattr(view, 'propietario', None)
+        if not campo or request.method not in self.metodos_propietario:
             return True
+        if getattr(obj, campo, None) == request.user.pk:
+            return _resultado('propietario', True)
+        permisos = self.permisos_requeridos(request, view)
+        return _resultado(permisos, tiene_permiso(request, *permisos))
 
-        return (
-            request.user.is_superuser or
-            request.user.groups.filter(name='Administradores').exists()
-        )
 
+def requiere(*permisos):
+    """
+    HasModelPermission con permisos fijos, para vistas de función:
+    @permission_classes([IsAuthenticated, requiere('restaurant.view_pedido')])
+    """
+    return type('HasModelPermission', (HasModelPermission,), {'permisos': permisos})
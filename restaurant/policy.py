@@ -0,0 +1,140 @@
+"""
+Tabla de permisos en memoria: grupo o usuario -> {'app_label.codename'}.
+
+Los permisos de modelo de Django (los que asigna restaurant.groups y los que
+se editan en el admin, de grupos y de usuarios) se cargan con dos consultas y
+se guardan por proceso. Comprobar un permiso es buscar en un frozenset: O(1)
+y sin consultas por petición. Cuentan, como en user.has_perm():
+
+- los permisos del grupo del usuario en la sucursal de la petición (su
+  membresía, ver restaurant.tenancy), que ya se resuelve una vez por
+  petición para filtrar los datos;
+- los permisos asignados directamente al usuario (user_permissions).
+
+Los grupos de Django del usuario (user.groups) no cuentan por sí mismos: son
+el reflejo de sus membresías en todas las sucursales (los sincroniza
+restaurant/signals.py y el admin los muestra de solo lectura), y contarlos
+daría a un usuario en todas sus sucursales el rol que tiene en una.
+
+Las señales de restaurant/signals.py invalidan la tabla al cambiar los
+permisos de un grupo o de un usuario, un grupo o un permiso, y post_migrate
+la invalida tras sembrar los grupos. Los demás procesos se enteran por una
+versión en la caché compartida (restaurant.versions), que consultan como
+mucho cada POLICY['CHECK_INTERVAL'] segundos.
+"""
+
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import router, transaction
+
+from .tenancy import membresia_actual
+from .versions import VersionCompartida
+
+DEFAULT_POLICY = {
+    # Segundos entre comprobaciones de la versión compartida
+    'CHECK_INTERVAL': 5,
+}
+
+CLAVE_VERSION = 'restaurant:politica:version'
+
+# Acción del permiso de modelo según el método HTTP (como DjangoModelPermissions)
+ACCIONES = {
+    'GET': 'view',
+    'HEAD': 'view',
+    'POST': 'add',
+    'PUT': 'change',
+    'PATCH': 'change',
+    'DELETE': 'delete',
+}
+
+
+def get_policy_settings():
+    return {**DEFAULT_POLICY, **getattr(settings, 'POLICY', {})}
+
+
+class TablaPermisos:
+    """Permisos de cada grupo y usuario, cargados una vez y recargados al invalidarse."""
+
+    def __init__(self):
+        self._tabla = None
+        self._lock = threading.Lock()
+        self.version = VersionCompartida(
+            CLAVE_VERSION, lambda: get_policy_settings()['CHECK_INTERVAL']
+        )
+
+    def permisos(self, group_id):
+        """frozenset de 'app_label.codename' del grupo."""
+        return self._actual()[0].get(group_id, frozenset())
+
+    def permisos_usuario(self, user_id):
+        """frozenset de 'app_label.codename' asignados directamente al usuario."""
+        return self._actual()[1].get(user_id, frozenset())
+
+    def _actual(self):
+        cambiada = self.version.cambiada()
+        tabla = self._tabla
+        if tabla is not None and not cambiada:
+            return tabla
+        with self._lock:
+            if cambiada or self._tabla is None:
+                self._tabla = self._cargar()
+            return self._tabla
+
+    def _cargar(self):
+        # Siempre del primario: una réplica con retraso dejaría la tabla obsoleta
+        using = router.db_for_write(Group)
+        return (
+            self._agrupar(Group.permissions.through, 'group_id', using),
+            self._agrupar(User.user_permissions.through, 'user_id', using),
+        )
+
+    @staticmethod
+    def _agrupar(modelo, campo, using):
+        filas = modelo.objects.using(using).values_list(
+            campo, 'permission__content_type__app_label', 'permission__codename',
+        )
+        tabla = {}
+        for clave, app_label, codename in filas:
+            tabla.setdefault(clave, set()).add(f'{app_label}.{codename}')
+        return {clave: frozenset(permisos) for clave, permisos in tabla.items()}
+
+    def invalidar(self):
+        """Descarta la tabla de este proceso y avisa a los demás."""
+        self._tabla = None
+        self.version.invalidar()
+
+
+tabla = TablaPermisos()
+
+
+def invalidar():
+    """Invalida la tabla al confirmarse la transacción en curso."""
+    transaction.on_commit(tabla.invalidar)
+
+
+def permiso_modelo(model, metodo):
+    """'app_label.accion_modelo' para `metodo`, o None si no exige permiso (OPTIONS)."""
+    accion = ACCIONES.get(metodo)
+    if accion is None:
+        return None
+    return f'{model._meta.app_label}.{accion}_{model._meta.model_name}'
+
+
+def tiene_permiso(request, *permisos):
+    """
+    Indica si el usuario tiene todos los `permisos` en la sucursal de la
+    petición, por su grupo en ella o asignados a él. Los superusuarios
+    tienen todos.
+    """
+    user = request.user
+    if not user or not user.is_authenticated or not user.is_active:
+        return False
+    if user.is_superuser:
+        return True
+    membresia = membresia_actual(request)
+    concedidos = tabla.permisos_usuario(user.pk)
+    if membresia is not None:
+        concedidos = concedidos | tabla.permisos(membresia.group_id)
+    return all(permiso in concedidos for permiso in permisos)
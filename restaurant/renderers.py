@@ -0,0 +1,75 @@
+"""
+Renderer y parser JSON de alto rendimiento para la API.
+
+Usan orjson cuando está instalado y, si no, se comportan exactamente como
+JSONRenderer y JSONParser de DRF (json de la librería estándar).
+Los tipos que orjson no serializa igual que DRF (Decimal, fechas, cadenas
+perezosas...) se delegan en rest_framework.utils.encoders.JSONEncoder, de
+modo que la salida coincide con la del renderer por defecto.
+"""
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import json
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+else:
+    # Las fechas pasan por JSONEncoder.default para formatearlas como DRF
+    OPCIONES_ORJSON = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer que serializa con orjson si está disponible.
+    Las respuestas con indentación (p. ej. la API navegable) o con una
+    configuración no compatible (UNICODE_JSON/COMPACT_JSON desactivados)
+    usan el camino estándar de DRF.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact or
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self._encoder.default, option=OPCIONES_ORJSON)
+        except (orjson.JSONEncodeError, TypeError):
+            # Enteros de más de 64 bits, NaN con strict=False, etc.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Igual que DRF: \u2028 y \u2029 siempre escapados
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser que decodifica con orjson si está disponible.
+    Ante un error reintenta con json para devolver el mismo mensaje que DRF.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        contenido = stream.read()
+        try:
+            return orjson.loads(contenido)
+        except orjson.JSONDecodeError:
+            pass
+        try:
+            parse_constant = json.strict_constant if self.strict else None
+            return json.loads(contenido.decode(encoding), parse_constant=parse_constant)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,91 @@
+"""
+Líneas de pedido y agregados de ventas.
+
+Las líneas (PedidoItem) se insertan con un único bulk_create para todos los
+pedidos de una petición y el total de cada pedido se recalcula en SQL con un
+UPDATE ... SET total = (SELECT SUM(cantidad * precio_unitario) ...), de modo
+que el total siempre coincide con sus líneas sin confiar en el cliente.
+"""
+
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Pedido, PedidoItem
+
+IMPORTE = ExpressionWrapper(
+    F('cantidad') * F('precio_unitario'),
+    output_field=DecimalField(max_digits=12, decimal_places=2),
+)
+
+
+def describir(items):
+    """Descripción legible de las líneas: '2 Pizza margarita, 1 Café'."""
+    return ', '.join(f"{item['cantidad']} {item['producto'].nombre}" for item in items)
+
+
+def recalcular_totales(pedido_ids):
+    """
+    Recalcula en SQL el total de los pedidos indicados como la suma de sus
+    líneas. Retorna {pedido_id: total}.
+    """
+    if not pedido_ids:
+        return {}
+    subtotal = (
+        PedidoItem.objects
+        .filter(pedido=OuterRef('pk'))
+        .order_by()
+        .values('pedido')
+        .annotate(total=Sum(IMPORTE))
+        .values('total')
+    )
+    pedidos = Pedido.objects.filter(pk__in=pedido_ids)
+    pedidos.update(total=Coalesce(
+        Subquery(subtotal), Value(Decimal('0.00')),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    ))
+    return dict(pedidos.values_list('pk', 'total'))
+
+
+def guardar_items(lineas_por_pedido):
+    """
+    Inserta las líneas de varios pedidos con un único bulk_create y actualiza
+    el total de cada pedido (en la base de datos y en la instancia).
+    `lineas_por_pedido` es una lista de (pedido, items) con items validados:
+    [{'producto': Producto, 'cantidad': int}, ...]. El precio unitario es el
+    precio del producto en ese momento.
+    """
+    if not lineas_por_pedido:
+        return
+    PedidoItem.objects.bulk_create([
+        PedidoItem(
+            pedido=pedido,
+            producto=item['producto'],
+            cantidad=item['cantidad'],
+            precio_unitario=item['producto'].precio,
+        )
+        for pedido, items in lineas_por_pedido
+        for item in items
+    ])
+    totales = recalcular_totales([pedido.pk for pedido, _ in lineas_por_pedido])
+    for pedido, _ in lineas_por_pedido:
+        pedido.total = totales[pedido.pk]
+
+
+def productos_mas_vendidos(pedidos, limite=10):
+    """
+    Productos más vendidos en `pedidos` (un queryset ya filtrado por sucursal
+    y fechas): [{'producto', 'nombre', 'importe', 'unidades'}], de mayor a
+    menor número de unidades. Las líneas históricas (sin precio, de productos
+    inactivos creados por la migración 0011) no cuentan. Una sola consulta
+    agrupada: el rango se resuelve con el índice (sucursal, -created_at) de
+    Pedido y las líneas con el índice pedidoitem_ventas_hist_idx.
+    """
+    return list(
+        PedidoItem.objects
+        .filter(pedido__in=pedidos.order_by().values('pk'), historico=False)
+        .values('producto', nombre=F('producto__nombre'))
+        .annotate(importe=Sum(IMPORTE), unidades=Sum('cantidad'))
+        .order_by('-unidades', 'producto')[:limite]
+    )
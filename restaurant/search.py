@@ -0,0 +1,237 @@
+"""
+Búsqueda de texto sobre la descripción de los pedidos.
+
+Dos motores, elegidos con SEARCH['BACKEND'] ('auto' por defecto):
+- 'fulltext': índice FULLTEXT de MySQL (MATCH ... AGAINST en modo booleano),
+  con la relevancia que calcula MySQL.
+- 'indice': índice invertido propio (TerminoPedido) que se mantiene al
+  guardar cada pedido; funciona en cualquier motor, p. ej. SQLite en tests.
+  Los pedidos insertados con bulk_create se indexan con el comando
+  reindexar_pedidos.
+'auto' usa 'fulltext' en MySQL e 'indice' en el resto.
+
+En ambos casos se exigen todas las palabras, por prefijo ('marg' encuentra
+'margarita'), sin distinguir mayúsculas ni tildes, y con la misma
+normalización (palabras_indice): las palabras vacías y las de una letra no se
+exigen. El lookup `fulltext` solo existe en Pedido.descripcion.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+
+from django.conf import settings
+from django.db import NotSupportedError, connections
+from django.db.models import F, FloatField, Func, Lookup, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Pedido, TerminoPedido
+
+DEFAULT_SEARCH = {
+    'BACKEND': 'auto',
+}
+
+# Caracteres con significado en el modo booleano de MySQL
+_OPERADORES = re.compile(r'[+\-><()~*"@]+')
+_PALABRA = re.compile(r'\w+')
+
+# Palabras demasiado frecuentes para aportar nada a la búsqueda
+STOPWORDS = frozenset({
+    'a', 'al', 'con', 'de', 'del', 'el', 'en', 'la', 'las', 'lo', 'los',
+    'o', 'para', 'por', 'sin', 'su', 'un', 'una', 'y',
+})
+
+
+def get_search_settings():
+    return {**DEFAULT_SEARCH, **getattr(settings, 'SEARCH', {})}
+
+
+class BusquedaTexto(Lookup):
+    """Lookup `__fulltext`: MATCH(columna) AGAINST(%s IN BOOLEAN MODE), solo MySQL."""
+    lookup_name = 'fulltext'
+
+    def as_mysql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'MATCH ({lhs}) AGAINST ({rhs} IN BOOLEAN MODE)', lhs_params + rhs_params
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError('La búsqueda FULLTEXT solo está disponible en MySQL.')
+
+
+# Solo la columna con índice FULLTEXT (migración 0008), no todos los TextField
+Pedido._meta.get_field('descripcion').register_lookup(BusquedaTexto)
+
+
+class Relevancia(Func):
+    """Relevancia de MATCH(campo) AGAINST(termino IN BOOLEAN MODE), solo MySQL."""
+    output_field = FloatField()
+
+    def __init__(self, campo, termino):
+        super().__init__(F(campo), Value(termino))
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        campo, termino = self.get_source_expressions()
+        campo_sql, campo_params = compiler.compile(campo)
+        termino_sql, termino_params = compiler.compile(termino)
+        return (
+            f'MATCH ({campo_sql}) AGAINST ({termino_sql} IN BOOLEAN MODE)',
+            (*campo_params, *termino_params),
+        )
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError('La relevancia FULLTEXT solo está disponible en MySQL.')
+
+
+def palabras(termino):
+    """Palabras del término de búsqueda, sin operadores."""
+    return _OPERADORES.sub(' ', termino).split()
+
+
+def termino_booleano(termino):
+    """
+    'Pizza de marg' -> '+pizza* +marg*': todas las palabras, por prefijo,
+    normalizadas como en el índice invertido. '' si no queda ninguna.
+    """
+    return ' '.join(f'+{palabra}*' for palabra in dict.fromkeys(palabras_indice(termino)))
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Lasaña' -> 'lasana'."""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def palabras_indice(texto):
+    """Palabras de `texto` tal como se guardan en el índice invertido."""
+    return [
+        palabra[:64] for palabra in _PALABRA.findall(normalizar(texto))
+        if len(palabra) > 1 and palabra not in STOPWORDS
+    ]
+
+
+def terminos(texto):
+    """Términos del índice invertido de `texto` con su frecuencia."""
+    return Counter(palabras_indice(texto))
+
+
+def motor(alias):
+    """Motor de búsqueda efectivo ('fulltext' o 'indice') para la base `alias`."""
+    backend = get_search_settings()['BACKEND']
+    if backend == 'auto':
+        return 'fulltext' if connections[alias].vendor == 'mysql' else 'indice'
+    return backend
+
+
+def soporta_fulltext(queryset):
+    return connections[queryset.db].vendor == 'mysql'
+
+
+def buscar_texto(queryset, termino, campo='descripcion'):
+    """Filtra `queryset` a las filas cuyo `campo` contiene todas las palabras de `termino`."""
+    lista = palabras(termino)
+    if not lista:
+        return queryset
+    booleano = termino_booleano(termino)
+    if booleano and soporta_fulltext(queryset):
+        return queryset.filter(**{f'{campo}__fulltext': booleano})
+    for palabra in lista:
+        queryset = queryset.filter(**{f'{campo}__icontains': palabra})
+    return queryset
+
+
+# Índice invertido
+
+def indexar_pedido(pedido, nuevo=False):
+    """
+    Actualiza los términos de `pedido`. Si no han cambiado solo cuesta la
+    consulta de los actuales; si el pedido es `nuevo` ni siquiera eso.
+    """
+    nuevos = terminos(pedido.descripcion)
+    if not nuevo:
+        actuales = dict(
+            TerminoPedido.objects.filter(pedido=pedido).values_list('termino', 'frecuencia')
+        )
+        if actuales == dict(nuevos):
+            return
+        TerminoPedido.objects.filter(pedido=pedido).delete()
+    TerminoPedido.objects.bulk_create([
+        TerminoPedido(pedido=pedido, sucursal_id=pedido.sucursal_id, termino=termino, frecuencia=frecuencia)
+        for termino, frecuencia in nuevos.items()
+    ])
+
+
+def reindexar_pedidos(queryset=None, batch_size=1000, callback=None):
+    """
+    Reconstruye el índice invertido de los pedidos de `queryset` (todos por
+    defecto) por lotes ordenados por id. Retorna el número de pedidos indexados.
+    """
+    queryset = Pedido.objects.all() if queryset is None else queryset
+    total = 0
+    ultimo_id = 0
+    while True:
+        lote = list(
+            queryset.filter(pk__gt=ultimo_id).order_by('pk')
+            .values_list('pk', 'sucursal_id', 'descripcion')[:batch_size]
+        )
+        if not lote:
+            break
+        ids = [pk for pk, _, _ in lote]
+        TerminoPedido.objects.filter(pedido_id__in=ids).delete()
+        TerminoPedido.objects.bulk_create([
+            TerminoPedido(pedido_id=pk, sucursal_id=sucursal_id, termino=termino, frecuencia=frecuencia)
+            for pk, sucursal_id, descripcion in lote
+            for termino, frecuencia in terminos(descripcion).items()
+        ], batch_size=batch_size)
+        ultimo_id = ids[-1]
+        total += len(lote)
+        if callback:
+            callback(total)
+    return total
+
+
+def _buscar_indice(queryset, termino, sucursal):
+    # Misma normalización que al indexar: lo que no se indexa no se exige
+    lista = list(dict.fromkeys(palabras_indice(termino)))
+    if not lista:
+        return queryset.none().annotate(relevancia=Value(0, output_field=FloatField()))
+    indice = TerminoPedido.objects.all()
+    if sucursal is not None:
+        # Usa el índice (sucursal, termino)
+        indice = indice.filter(sucursal=sucursal)
+    coincide = Q()
+    for palabra in lista:
+        # Semi-join por palabra: el pedido debe tener algún término con ese prefijo
+        queryset = queryset.filter(
+            pk__in=indice.filter(termino__startswith=palabra).values('pedido_id')
+        )
+        coincide |= Q(termino__startswith=palabra)
+    relevancia = (
+        TerminoPedido.objects
+        .filter(coincide, pedido=OuterRef('pk'))
+        .order_by()
+        .values('pedido')
+        .annotate(total=Sum('frecuencia'))
+        .values('total')
+    )
+    return queryset.annotate(
+        relevancia=Coalesce(Subquery(relevancia), 0, output_field=FloatField())
+    )
+
+
+def buscar_pedidos(queryset, termino, sucursal=None):
+    """
+    Pedidos de `queryset` que contienen todas las palabras de `termino`,
+    anotados con `relevancia` y ordenados por relevancia y fecha.
+    `sucursal` acota el índice invertido a una sucursal.
+    """
+    booleano = termino_booleano(termino)
+    if not booleano:
+        return queryset.none()
+    if motor(queryset.db) == 'fulltext':
+        queryset = queryset.filter(descripcion__fulltext=booleano).annotate(
+            relevancia=Relevancia('descripcion', booleano)
+        )
+    else:
+        queryset = _buscar_indice(queryset, termino, sucursal)
+    return queryset.order_by('-relevancia', '-created_at')
@@ -2,8 +2,80 @@
 Serializadores para los modelos del restaurante.
 """
 
+from contextlib import nullcontext
+
+from django.db import transaction
 from rest_framework import serializers
-from .models import Mesa, Pedido
+from rest_framework.permissions import SAFE_METHODS
+
+from monitoring import metrics
+from .models import Mesa, Pedido, PedidoArchivado, PedidoItem, Producto
+from .sales import describir, guardar_items
+
+
+def campos_solicitados(request, disponibles):
+    """
+    Retorna los campos a incluir según ?fields=a,b y ?exclude=c, en el
+    orden de `disponibles`. Retorna None si la petición no los limita.
+    """
+    if request is None:
+        return None
+    params = getattr(request, 'query_params', request.GET)
+    incluir = params.get('fields')
+    excluir = params.get('exclude')
+    if not incluir and not excluir:
+        return None
+
+    nombres = list(disponibles)
+    if incluir:
+        pedidos = {nombre.strip() for nombre in incluir.split(',')}
+        nombres = [nombre for nombre in nombres if nombre in pedidos]
+    if excluir:
+        excluidos = {nombre.strip() for nombre in excluir.split(',')}
+        nombres = [nombre for nombre in nombres if nombre not in excluidos]
+    return nombres
+
+
+class DynamicFieldsMixin:
+    """
+    Mixin para serializadores que admite selección de campos (?fields=/?exclude=).
+    Los campos no pedidos se eliminan al construir el serializador, por lo que
+    sus SerializerMethodField y serializadores anidados no llegan a ejecutarse.
+    Solo en lecturas (GET/HEAD/OPTIONS): al escribir se validan todos los campos.
+
+    Meta.columnas_por_campo indica qué columnas del modelo necesita cada campo
+    que no corresponde directamente a una columna ([] si no necesita ninguna);
+    se usa en optimizar_queryset() para cargar solo esas columnas.
+    Meta.prefetch_por_campo indica las relaciones a precargar con
+    prefetch_related() para los campos anidados de varios objetos.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        nombres = campos_solicitados(request, self.fields)
+        if nombres is not None:
+            for nombre in set(self.fields) - set(nombres):
+                self.fields.pop(nombre)
+
+    @classmethod
+    def optimizar_queryset(cls, queryset, nombres):
+        """Aplica only()/select_related()/prefetch_related() con lo que necesitan los campos `nombres`."""
+        columnas_por_campo = getattr(cls.Meta, 'columnas_por_campo', {})
+        prefetch_por_campo = getattr(cls.Meta, 'prefetch_por_campo', {})
+        columnas = set()
+        prefetch = []
+        for nombre in nombres:
+            columnas.update(columnas_por_campo.get(nombre, [nombre]))
+            prefetch.extend(prefetch_por_campo.get(nombre, []))
+        relaciones = {columna.split('__')[0] for columna in columnas if '__' in columna}
+        queryset = queryset.only(*columnas)
+        if relaciones:
+            queryset = queryset.select_related(*relaciones)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
 
 
 class BaseSerializer(serializers.ModelSerializer):
@@ -15,7 +87,7 @@ class BaseSerializer(serializers.ModelSerializer):
     updated_at = serializers.DateTimeField(read_only=True)
 
 
-class MesaSerializer(BaseSerializer):
+class MesaSerializer(DynamicFieldsMixin, BaseSerializer):
     """
     Serializador para el modelo Mesa.
     """
@@ -28,11 +100,40 @@ class MesaSerializer(BaseSerializer):
             'id', 'numero', 'capacidad', 'estado', 'estado_display',
             'total_pedidos', 'created_at', 'updated_at'
         ]
+        columnas_por_campo = {
+            'estado_display': ['estado'],
+            'total_pedidos': [],
+        }
 
     def get_total_pedidos(self, obj):
         """Retorna el número total de pedidos de la mesa."""
         return obj.pedidos.count()
 
+    def _sucursal(self):
+        if self.instance is not None:
+            return self.instance.sucursal
+        return self.context.get('sucursal')
+
+    def validate_numero(self, value):
+        """Valida que el número no esté repetido en la sucursal."""
+        sucursal = self._sucursal()
+        if sucursal is None:
+            return value
+        mesas = Mesa.objects.filter(sucursal=sucursal, numero=value)
+        if self.instance is not None:
+            mesas = mesas.exclude(pk=self.instance.pk)
+        if mesas.exists():
+            raise serializers.ValidationError('Ya existe una mesa con este número en la sucursal.')
+        return value
+
+    def validate(self, attrs):
+        """Una mesa nueva necesita una sucursal (superusuarios: cabecera X-Sucursal)."""
+        if self._sucursal() is None:
+            raise serializers.ValidationError({
+                'sucursal': 'Indique la sucursal con la cabecera X-Sucursal.'
+            })
+        return attrs
+
 
 class MesaSimpleSerializer(serializers.ModelSerializer):
     """
@@ -43,28 +144,140 @@ class MesaSimpleSerializer(serializers.ModelSerializer):
         fields = ['id', 'numero', 'estado']
 
 
-class PedidoSerializer(BaseSerializer):
+class ProductoSerializer(serializers.ModelSerializer):
+    """
+    Serializador para el modelo Producto.
+    """
+    class Meta:
+        model = Producto
+        fields = ['id', 'nombre', 'precio', 'activo']
+
+
+class PedidoItemSerializer(serializers.ModelSerializer):
+    """
+    Serializador de lectura de las líneas de un pedido.
+    """
+    producto_nombre = serializers.CharField(source='producto.nombre', read_only=True)
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
+    class Meta:
+        model = PedidoItem
+        fields = ['id', 'producto', 'producto_nombre', 'cantidad', 'precio_unitario', 'subtotal']
+
+
+class PedidoItemWriteSerializer(serializers.Serializer):
+    """
+    Línea de un pedido al crearlo o actualizarlo: producto y cantidad.
+    El precio lo fija el servidor.
+    """
+    producto = serializers.IntegerField(min_value=1)
+    cantidad = serializers.IntegerField(min_value=1, max_value=32767, default=1)
+
+
+class PedidoSerializer(DynamicFieldsMixin, BaseSerializer):
     """
     Serializador para el modelo Pedido.
     """
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
     mesa_info = MesaSimpleSerializer(source='mesa', read_only=True)
+    items = PedidoItemSerializer(many=True, read_only=True)
 
     class Meta:
         model = Pedido
         fields = [
-            'id', 'mesa', 'mesa_info', 'descripcion', 'total',
+            'id', 'mesa', 'mesa_info', 'descripcion', 'items', 'total',
             'estado', 'estado_display', 'created_at', 'updated_at'
         ]
+        columnas_por_campo = {
+            'estado_display': ['estado'],
+            'mesa_info': ['mesa__numero', 'mesa__estado'],
+            'items': [],
+        }
+        prefetch_por_campo = {
+            'items': ['items__producto'],
+        }
+
+
+class ProductoVendidoSerializer(serializers.Serializer):
+    """
+    Fila de productos_mas_vendidos (ver restaurant/sales.py).
+    """
+    producto = serializers.IntegerField()
+    nombre = serializers.CharField()
+    unidades = serializers.IntegerField()
+    importe = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class PedidoBusquedaSerializer(PedidoSerializer):
+    """
+    Resultado de búsqueda de pedidos: el pedido más su relevancia.
+    """
+    relevancia = serializers.FloatField(read_only=True)
+
+    class Meta(PedidoSerializer.Meta):
+        fields = PedidoSerializer.Meta.fields + ['relevancia']
+
+
+class PedidoArchivadoSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializador para pedidos del histórico.
+    Produce la misma forma que PedidoSerializer, usando el id original.
+    """
+    id = serializers.IntegerField(source='pedido_id', read_only=True)
+    estado_display = serializers.CharField(source='get_estado_display', read_only=True)
+    mesa_info = MesaSimpleSerializer(source='mesa', read_only=True)
+
+    class Meta:
+        model = PedidoArchivado
+        fields = [
+            'id', 'mesa', 'mesa_info', 'descripcion', 'items', 'total',
+            'estado', 'estado_display', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+        columnas_por_campo = {
+            'id': ['pedido_id'],
+            'estado_display': ['estado'],
+            'mesa_info': ['mesa__numero', 'mesa__estado'],
+        }
+
+
+class PedidoCreateListSerializer(serializers.ListSerializer):
+    """
+    Creación de varios pedidos en una petición: los pedidos se insertan uno a
+    uno (MySQL no devuelve los ids de bulk_create) y las líneas de todos
+    ellos con un único INSERT.
+    """
+    def create(self, validated_data):
+        return self.child.crear_pedidos(validated_data)
 
 
 class PedidoCreateSerializer(serializers.ModelSerializer):
     """
     Serializador para crear/actualizar pedidos.
+    Con `items` el total lo calcula el servidor a partir del precio de los
+    productos y, si no se envía, la descripción se genera a partir de las
+    líneas. Sin `items` se mantiene el pedido de texto libre con su total.
+    Al actualizar un pedido con líneas, un total distinto del calculado es un
+    error, salvo si tiene líneas históricas (migración 0011).
     """
+    items = PedidoItemWriteSerializer(many=True, required=False, allow_empty=False, write_only=True)
+
     class Meta:
         model = Pedido
-        fields = ['id', 'mesa', 'descripcion', 'total', 'estado']
+        fields = ['id', 'mesa', 'descripcion', 'items', 'total', 'estado']
+        extra_kwargs = {
+            'descripcion': {'required': False},
+        }
+        list_serializer_class = PedidoCreateListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Solo se aceptan mesas de la sucursal de la petición
+        sucursal = self.context.get('sucursal')
+        if sucursal is not None:
+            self.fields['mesa'].queryset = Mesa.objects.filter(sucursal=sucursal)
+        # Productos ya validados, por id
+        self._productos = {}
 
     def validate_total(self, value):
         """Valida que el total no sea negativo."""
@@ -72,6 +285,76 @@ class PedidoCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("El total no puede ser negativo.")
         return value
 
+    def validate_items(self, value):
+        """
+        Resuelve los productos de las líneas con una sola consulta. En una
+        creación múltiple el serializador es el mismo para todos los pedidos,
+        así que cada producto se consulta una sola vez.
+        """
+        productos = self._productos
+        ids = {item['producto'] for item in value}
+        nuevos = ids - set(productos)
+        if nuevos:
+            productos.update(Producto.objects.filter(pk__in=nuevos, activo=True).in_bulk())
+        faltan = sorted(ids - set(productos))
+        if faltan:
+            raise serializers.ValidationError(
+                f"Productos inexistentes o inactivos: {', '.join(map(str, faltan))}."
+            )
+        return [{**item, 'producto': productos[item['producto']]} for item in value]
+
+    def validate(self, attrs):
+        if 'items' in attrs:
+            # El total de un pedido con líneas siempre se calcula en el servidor
+            attrs.pop('total', None)
+            if not attrs.get('descripcion'):
+                attrs['descripcion'] = describir(attrs['items'])
+        elif self.instance is None and not attrs.get('descripcion'):
+            raise serializers.ValidationError({
+                'descripcion': 'Indique la descripción o los items del pedido.'
+            })
+        elif self.instance is not None and 'total' in attrs:
+            historicas = set(self.instance.items.values_list('historico', flat=True).distinct())
+            # Con líneas históricas (sin precio) vale el total guardado, que se puede corregir
+            if historicas and True not in historicas:
+                if attrs['total'] != self.instance.total:
+                    raise serializers.ValidationError({
+                        'total': 'El total de un pedido con items lo calcula el servidor; modifique sus items.'
+                    })
+                attrs.pop('total')
+        return attrs
+
+    def crear_pedidos(self, lista_datos):
+        """Crea los pedidos de `lista_datos` y las líneas de todos ellos en bloque."""
+        pedidos = []
+        lineas_por_pedido = []
+        with transaction.atomic():
+            for datos in lista_datos:
+                items = datos.pop('items', None)
+                pedido = super().create(datos)
+                metrics.pedido_transiciones_total.inc('', pedido.estado)
+                pedidos.append(pedido)
+                if items:
+                    lineas_por_pedido.append((pedido, items))
+            guardar_items(lineas_por_pedido)
+        return pedidos
+
+    def create(self, validated_data):
+        return self.crear_pedidos([validated_data])[0]
+
+    def update(self, instance, validated_data):
+        estado_anterior = instance.estado
+        items = validated_data.pop('items', None)
+        with transaction.atomic() if items is not None else nullcontext():
+            pedido = super().update(instance, validated_data)
+            if items is not None:
+                # Las líneas enviadas sustituyen a las anteriores
+                PedidoItem.objects.filter(pedido=pedido).delete()
+                guardar_items([(pedido, items)])
+        if pedido.estado != estado_anterior:
+            metrics.pedido_transiciones_total.inc(estado_anterior, pedido.estado)
+        return pedido
+
 
 class MesaPedidosSerializer(serializers.ModelSerializer):
     """
@@ -0,0 +1,63 @@
+"""
+Señales de la app: mantenimiento del índice invertido de búsqueda, de la
+caché de ids de grupos, de la tabla de permisos (restaurant.policy) y de los
+grupos de Django de cada usuario, que reflejan sus membresías.
+"""
+
+from django.contrib.auth.models import Group, Permission, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import groups, policy
+from .models import Membresia, Pedido
+from .search import indexar_pedido, motor
+
+
+@receiver(post_save, sender=Pedido, dispatch_uid='restaurant.indexar_pedido')
+def indexar_pedido_guardado(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Reindexa la descripción del pedido si el motor usa el índice invertido."""
+    if raw:
+        return
+    if update_fields is not None and 'descripcion' not in update_fields:
+        return
+    if motor(instance._state.db) != 'indice':
+        return
+    indexar_pedido(instance, nuevo=created)
+
+
+@receiver([post_save, post_delete], sender=Group, dispatch_uid='restaurant.limpiar_cache_grupos')
+def limpiar_cache_grupos(sender, **kwargs):
+    """Un grupo creado, renombrado o borrado invalida los ids cacheados y los permisos."""
+    groups.invalidar()
+    policy.invalidar()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through, dispatch_uid='restaurant.permisos_grupo')
+def permisos_grupo_cambiados(sender, action, **kwargs):
+    """Permisos añadidos o quitados a un grupo (admin o código)."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        policy.invalidar()
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through, dispatch_uid='restaurant.permisos_usuario')
+def permisos_usuario_cambiados(sender, action, **kwargs):
+    """Permisos asignados o quitados directamente a un usuario."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        policy.invalidar()
+
+
+@receiver([post_save, post_delete], sender=Membresia, dispatch_uid='restaurant.sincronizar_grupos')
+def sincronizar_grupos(sender, instance, raw=False, **kwargs):
+    """
+    Los grupos de Django del usuario son los de sus membresías en todas sus
+    sucursales; los permisos se comprueban con el de la sucursal de la
+    petición (ver restaurant.policy).
+    """
+    if raw:
+        return
+    instance.user.groups.set(Group.objects.filter(membresias__user_id=instance.user_id).distinct())
+
+
+@receiver(post_delete, sender=Permission, dispatch_uid='restaurant.permiso_borrado')
+def permiso_borrado(sender, **kwargs):
+    policy.invalidar()
@@ -0,0 +1,25 @@
+"""
+Tareas en segundo plano del restaurante (ver tasks.registry).
+"""
+
+import logging
+
+from tasks.registry import task
+from .models import Pedido
+
+logger = logging.getLogger('restaurant.eventos')
+
+
+@task
+def notificar_pedido(pedido_id, evento):
+    """
+    Publica un evento de pedido ('creado', 'actualizado') para cocina y sala.
+    Si el pedido ya no existe (borrado o archivado) no hace nada.
+    """
+    pedido = Pedido.objects.select_related('mesa').filter(pk=pedido_id).first()
+    if pedido is None:
+        return
+    logger.info(
+        'Pedido #%s %s: mesa %s, estado %s, total %s',
+        pedido.pk, evento, pedido.mesa.numero, pedido.estado, pedido.total
+    )
@@ -0,0 +1,95 @@
+"""
+Sucursal (tenant) de cada petición.
+
+La sucursal sale de las membresías del usuario autenticado. Si pertenece a
+varias, la cabecera X-Sucursal (código o id) elige una; sin ella se usa la
+primera membresía. Los superusuarios sin membresía ven todas las sucursales
+salvo que indiquen una con X-Sucursal.
+
+La membresía resuelta se guarda en la petición, así que los permisos
+(restaurant.policy) y los filtros de las vistas comparten una sola consulta.
+"""
+
+from django.db.models import Q
+from rest_framework.exceptions import PermissionDenied
+
+from .models import Membresia, Sucursal
+
+HEADER = 'HTTP_X_SUCURSAL'
+
+
+def _filtro_sucursal(valor, prefijo=''):
+    """Filtro por código o, si es numérico, también por id."""
+    filtro = Q(**{f'{prefijo}codigo': valor})
+    if valor.isdigit():
+        filtro |= Q(**{f'{prefijo}pk': int(valor)})
+    return filtro
+
+
+def _resolver(request):
+    user = request.user
+    valor = request.META.get(HEADER, '').strip()
+
+    membresias = (
+        Membresia.objects
+        .filter(user=user, sucursal__activa=True)
+        .select_related('sucursal', 'group')
+        .order_by('pk')
+    )
+    if valor:
+        membresias = membresias.filter(_filtro_sucursal(valor, 'sucursal__'))
+    membresia = membresias.first()
+    if membresia is not None:
+        return membresia.sucursal, membresia
+
+    if user.is_superuser:
+        if not valor:
+            return None, None
+        sucursal = Sucursal.objects.filter(_filtro_sucursal(valor), activa=True).first()
+        if sucursal is None:
+            raise PermissionDenied(f"La sucursal '{valor}' no existe.")
+        return sucursal, None
+
+    if valor:
+        raise PermissionDenied(f"No pertenece a la sucursal '{valor}'.")
+    raise PermissionDenied('No pertenece a ninguna sucursal.')
+
+
+def _resuelta(request):
+    if not hasattr(request, '_sucursal_resuelta'):
+        request._sucursal_resuelta = _resolver(request)
+    return request._sucursal_resuelta
+
+
+def sucursal_actual(request):
+    """
+    Retorna la Sucursal de la petición, o None si es un superusuario sin
+    sucursal (sin filtro). Lanza PermissionDenied si el usuario no
+    pertenece a la sucursal indicada o a ninguna.
+    """
+    return _resuelta(request)[0]
+
+
+def membresia_actual(request):
+    """Retorna la Membresia del usuario en la sucursal de la petición, o None."""
+    return _resuelta(request)[1]
+
+
+def filtrar_sucursal(queryset, sucursal, campo='sucursal'):
+    """Limita `queryset` a `sucursal` (sin filtro si es None)."""
+    if sucursal is None:
+        return queryset
+    return queryset.filter(**{campo: sucursal})
+
+
+def sucursal_registro(request):
+    """
+    Sucursal en la que se da de alta un usuario que se registra: la de la
+    cabecera X-Sucursal o, si solo hay una sucursal activa, esa.
+    """
+    valor = request.META.get(HEADER, '').strip()
+    activas = Sucursal.objects.filter(activa=True)
+    if valor:
+        return activas.filter(_filtro_sucursal(valor)).first()
+    sucursales = list(activas[:2])
+    return sucursales[0] if len(sucursales) == 1 else None
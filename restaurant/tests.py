@@ -0,0 +1,444 @@
+"""
+Tests de la API del restaurante.
+
+    DB_ENGINE=sqlite python manage.py test
+"""
+
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import Group, Permission, User
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import TextField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from tasks.models import Tarea
+from users.serializers import UserSerializer
+from .archive import archivar_lote
+from .fast import FastMesaSerializer, FastPedidoSerializer, FastUserSerializer
+from .models import Membresia, Mesa, Pedido, PedidoArchivado, PedidoItem, Producto, Sucursal, TerminoPedido
+from .search import termino_booleano
+from .serializers import MesaSerializer, PedidoSerializer, campos_solicitados
+
+
+class SalaSinceTests(APITestCase):
+    """?since= de /api/sala/ con y sin zona horaria."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        cls.mesa = Mesa.objects.create(sucursal=sucursal, numero=1, capacidad=4)
+        Pedido.objects.create(sucursal=sucursal, mesa=cls.mesa, descripcion='2 pizzas', total=20)
+        cls.user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=sucursal, group=Group.objects.get(name='Empleados'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_since_con_zona_horaria(self):
+        for since in ('2000-01-01T10:00:00Z', '2000-01-01T10:00:00+02:00'):
+            with self.subTest(since=since):
+                response = self.client.get('/api/sala/', {'since': since})
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.data['delta'])
+                self.assertEqual(len(response.data['pedidos']), 1)
+
+    def test_since_sin_zona_horaria(self):
+        response = self.client.get('/api/sala/', {'since': '2000-01-01T10:00:00'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['pedidos']), 1)
+
+    def test_since_invalido(self):
+        response = self.client.get('/api/sala/', {'since': 'ayer'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_estadisticas_de_pedidos_abiertos(self):
+        Pedido.objects.create(sucursal=self.mesa.sucursal, mesa=self.mesa, descripcion='1 café', total=2, estado='pagado')
+        response = self.client.get('/api/sala/')
+        self.assertEqual([fila['estado'] for fila in response.data['estadisticas_por_estado']], ['pendiente'])
+        self.assertEqual(response.data['mesas'][0]['total_pedidos'], 1)
+
+
+class BusquedaTests(APITestCase):
+    """Las palabras de la búsqueda se normalizan igual que el índice invertido."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        mesa = Mesa.objects.create(sucursal=sucursal, numero=1, capacidad=4)
+        Pedido.objects.create(sucursal=sucursal, mesa=mesa, descripcion='2 pizza margarita', total=20)
+        cls.user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=sucursal, group=Group.objects.get(name='Empleados'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def buscar(self, q):
+        response = self.client.get('/api/pedidos/buscar/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+    def test_palabras_no_indexadas(self):
+        self.assertEqual(self.buscar('pizza'), 1)
+        self.assertEqual(self.buscar('2 pizza'), 1)
+        self.assertEqual(self.buscar('x pizza de Márg'), 1)
+
+    def test_sin_palabras_indexables(self):
+        self.assertEqual(self.buscar('de la'), 0)
+
+    def test_termino_fulltext(self):
+        # El camino FULLTEXT de MySQL usa la misma normalización
+        self.assertEqual(termino_booleano('x Pizza de "Marg*" pizza'), '+pizza* +marg*')
+        self.assertEqual(termino_booleano('de la'), '')
+        self.assertIsNotNone(Pedido._meta.get_field('descripcion').get_lookup('fulltext'))
+        self.assertIsNone(PedidoArchivado._meta.get_field('descripcion').get_lookup('fulltext'))
+        self.assertNotIn('fulltext', TextField.get_lookups())
+
+    def test_migracion_carga_el_indice(self):
+        TerminoPedido.objects.all().delete()
+        self.assertEqual(self.buscar('pizza'), 0)
+        migracion = import_module('restaurant.migrations.0009_termino_pedido')
+        migracion.indexar_pedidos(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(self.buscar('márg'), 1)
+
+
+class PermisosTests(APITestCase):
+    """Permisos de la API: grupo de la sucursal y permisos del propio usuario."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        cls.grupo = Group.objects.create(name='Camareros')
+        cls.user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=cls.sucursal, group=cls.grupo)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_grupos_reflejan_membresias(self):
+        self.assertEqual(list(self.user.groups.all()), [self.grupo])
+
+    def test_permisos_de_usuario(self):
+        self.assertEqual(self.client.get('/api/mesas/').status_code, 403)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(Permission.objects.get(codename='view_mesa'))
+        self.assertEqual(self.client.get('/api/mesas/').status_code, 200)
+
+
+class HistorialTests(APITestCase):
+    """?historial=1 devuelve un número acotado de pedidos archivados, por páginas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        cls.mesa = Mesa.objects.create(sucursal=sucursal, numero=1, capacidad=4)
+        ids = [
+            Pedido.objects.create(sucursal=sucursal, mesa=cls.mesa, descripcion=f'pedido {i}', total=10, estado='pagado').pk
+            for i in range(5)
+        ]
+        archivar_lote(ids[:4])
+        cls.user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=sucursal, group=Group.objects.get(name='Empleados'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_lista_paginada(self):
+        response = self.client.get('/api/pedidos/', {'historial': 1, 'historial_limite': 3})
+        self.assertEqual(len(response.data), 4)
+        fechas = [pedido['created_at'] for pedido in response.data]
+        self.assertEqual(fechas, sorted(fechas, reverse=True))
+
+        response = self.client.get('/api/pedidos/', {
+            'historial': 1, 'historial_limite': 3, 'historial_antes': response['X-Historial-Siguiente'],
+        })
+        self.assertEqual(len(response.data), 2)
+        self.assertNotIn('X-Historial-Siguiente', response)
+
+    def test_mesa(self):
+        response = self.client.get(f'/api/mesas/{self.mesa.pk}/pedidos/', {'historial': 1, 'historial_limite': 2})
+        self.assertEqual(len(response.data['pedidos']), 3)
+        self.assertIsNotNone(response.data['historial_siguiente'])
+        self.assertEqual(response.data['total_pedidos'], 5)
+
+    def test_limite_invalido(self):
+        response = self.client.get('/api/pedidos/', {'historial': 1, 'historial_limite': 10000})
+        self.assertEqual(response.status_code, 400)
+
+
+class IdempotencyTests(APITestCase):
+    """Reintentos con Idempotency-Key en la creación de pedidos."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        cls.mesa = Mesa.objects.create(sucursal=sucursal, numero=1, capacidad=4)
+        cls.user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=sucursal, group=Group.objects.get(name='Empleados'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def crear(self):
+        return self.client.post(
+            '/api/pedidos/create/', {'mesa': self.mesa.pk, 'descripcion': '1 café', 'total': '2.00'},
+            format='json', HTTP_IDEMPOTENCY_KEY='clave-1',
+        )
+
+    def test_reintento(self):
+        self.assertEqual(self.crear().status_code, 201)
+        response = self.crear()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    def test_otra_sucursal(self):
+        otra = Sucursal.objects.create(nombre='Norte', codigo='norte')
+        Mesa.objects.create(sucursal=otra, numero=1, capacidad=4)
+        Membresia.objects.create(user=self.user, sucursal=otra, group=Group.objects.get(name='Empleados'))
+        self.assertEqual(self.crear().status_code, 201)
+        response = self.client.post(
+            '/api/pedidos/create/', {'mesa': self.mesa.pk, 'descripcion': '1 café', 'total': '2.00'},
+            format='json', HTTP_IDEMPOTENCY_KEY='clave-1', HTTP_X_SUCURSAL='norte',
+        )
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Pedido.objects.count(), 1)
+
+    def test_reserva_acotada(self):
+        # La clave existe al insertar pero desaparece al leerla, una y otra vez
+        with mock.patch('restaurant.idempotency.IdempotencyKey') as modelo:
+            modelo.objects.create.side_effect = IntegrityError
+            modelo.objects.filter.return_value.first.return_value = None
+            response = self.crear()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(modelo.objects.create.call_count, 3)
+
+
+class CamposDinamicosTests(APITestCase):
+    """?fields= limita la respuesta de las lecturas y no afecta a las escrituras."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        cls.mesa = Mesa.objects.create(sucursal=cls.sucursal, numero=1, capacidad=4)
+        cls.user = User.objects.create_user('encargado', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=cls.sucursal, group=Group.objects.get(name='Administradores'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_lectura(self):
+        response = self.client.get(f'/api/mesas/{self.mesa.pk}/?fields=id,numero')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'id': self.mesa.pk, 'numero': 1})
+
+    def test_escritura(self):
+        response = self.client.post('/api/mesas/create/?fields=id', {'numero': 2, 'capacidad': 6}, format='json')
+        self.assertEqual(response.status_code, 201)
+        mesa = Mesa.objects.get(pk=response.data['id'])
+        self.assertEqual((mesa.sucursal, mesa.numero, mesa.capacidad), (self.sucursal, 2, 6))
+        self.assertEqual(response.data['capacidad'], 6)
+
+        response = self.client.patch(
+            f'/api/mesas/{mesa.pk}/update/?fields=id', {'capacidad': 8}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        mesa.refresh_from_db()
+        self.assertEqual(mesa.capacidad, 8)
+
+
+class LineasHistoricasTests(APITestCase):
+    """Pedidos con líneas históricas (migración 0011): total guardado y fuera de las ventas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        mesa = Mesa.objects.create(sucursal=sucursal, numero=1, capacidad=4)
+        pizza = Producto.objects.create(nombre='Pizza', precio=10)
+        antigua = Producto.objects.create(nombre='Pizza antigua', precio=0, activo=False)
+        cls.historico = Pedido.objects.create(sucursal=sucursal, mesa=mesa, descripcion='5 pizza antigua', total=30)
+        PedidoItem.objects.create(pedido=cls.historico, producto=antigua, cantidad=5, precio_unitario=0, historico=True)
+        cls.nuevo = Pedido.objects.create(sucursal=sucursal, mesa=mesa, descripcion='2 Pizza', total=20)
+        PedidoItem.objects.create(pedido=cls.nuevo, producto=pizza, cantidad=2, precio_unitario=10)
+        cls.user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=sucursal, group=Group.objects.get(name='Empleados'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_corregir_total_historico(self):
+        response = self.client.patch(f'/api/pedidos/{self.historico.pk}/', {'total': '32.50'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.historico.refresh_from_db()
+        self.assertEqual(str(self.historico.total), '32.50')
+
+    def test_total_calculado(self):
+        response = self.client.patch(f'/api/pedidos/{self.nuevo.pk}/', {'total': '99.00'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch(f'/api/pedidos/{self.nuevo.pk}/', {'total': '20.00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_mas_vendidos(self):
+        response = self.client.get('/api/productos/mas-vendidos/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([fila['nombre'] for fila in response.data], ['Pizza'])
+
+
+class PedidoItemsTests(APITestCase):
+    """Pedidos con líneas: el servidor fija precios y recalcula el total."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        cls.mesa = Mesa.objects.create(sucursal=sucursal, numero=1, capacidad=4)
+        cls.pizza = Producto.objects.create(nombre='Pizza', precio='10.50')
+        cls.cafe = Producto.objects.create(nombre='Café', precio='1.20')
+        cls.inactivo = Producto.objects.create(nombre='Pizza antigua', precio=5, activo=False)
+        cls.user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=sucursal, group=Group.objects.get(name='Empleados'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def crear(self, datos, url='/api/pedidos/create/'):
+        return self.client.post(url, datos, format='json')
+
+    def test_crear(self):
+        response = self.crear({
+            'mesa': self.mesa.pk, 'total': '1.00',
+            'items': [{'producto': self.pizza.pk, 'cantidad': 2}, {'producto': self.cafe.pk, 'cantidad': 3}],
+        })
+        self.assertEqual(response.status_code, 201)
+        pedido = Pedido.objects.get(pk=response.data['id'])
+        # El total del cliente se ignora: 2 * 10.50 + 3 * 1.20
+        self.assertEqual(str(pedido.total), '24.60')
+        self.assertEqual(response.data['total'], '24.60')
+        self.assertEqual(pedido.descripcion, '2 Pizza, 3 Café')
+        self.assertEqual(
+            sorted(pedido.items.values_list('producto__nombre', 'cantidad', 'precio_unitario')),
+            [('Café', 3, Decimal('1.20')), ('Pizza', 2, Decimal('10.50'))],
+        )
+
+    def test_crear_varios(self):
+        response = self.crear([
+            {'mesa': self.mesa.pk, 'items': [{'producto': self.pizza.pk}]},
+            {'mesa': self.mesa.pk, 'items': [{'producto': self.cafe.pk, 'cantidad': 5}]},
+            {'mesa': self.mesa.pk, 'descripcion': 'Menú del día', 'total': '12.00'},
+        ], url='/api/pedidos-viewset/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([fila['total'] for fila in response.data], ['10.50', '6.00', '12.00'])
+        self.assertEqual(
+            [str(Pedido.objects.get(pk=fila['id']).total) for fila in response.data], ['10.50', '6.00', '12.00'],
+        )
+
+    def test_actualizar_items(self):
+        pedido_id = self.crear({'mesa': self.mesa.pk, 'items': [{'producto': self.pizza.pk, 'cantidad': 2}]}).data['id']
+        # Un cambio de precio no altera las líneas ya guardadas
+        Producto.objects.filter(pk=self.pizza.pk).update(precio=11)
+        response = self.client.patch(
+            f'/api/pedidos/{pedido_id}/', {'items': [{'producto': self.cafe.pk, 'cantidad': 4}]}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        pedido = Pedido.objects.get(pk=pedido_id)
+        self.assertEqual(str(pedido.total), '4.80')
+        self.assertEqual(list(pedido.items.values_list('producto', 'cantidad')), [(self.cafe.pk, 4)])
+
+        response = self.client.patch(f'/api/pedidos/{pedido_id}/', {'estado': 'servido'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        pedido.refresh_from_db()
+        self.assertEqual((pedido.estado, str(pedido.total)), ('servido', '4.80'))
+
+    def test_producto_inactivo(self):
+        response = self.crear([
+            {'mesa': self.mesa.pk, 'items': [{'producto': self.pizza.pk}]},
+            {'mesa': self.mesa.pk, 'items': [{'producto': self.inactivo.pk}]},
+        ], url='/api/pedidos-viewset/')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Pedido.objects.exists())
+        self.assertFalse(PedidoItem.objects.exists())
+
+
+class NotificacionesTests(APITestCase):
+    """Las rutas que crean o modifican pedidos encolan su notificación (outbox)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        cls.mesa = Mesa.objects.create(sucursal=sucursal, numero=1, capacidad=4)
+        cls.user = User.objects.create_user('camarero', password='x')
+        Membresia.objects.create(user=cls.user, sucursal=sucursal, group=Group.objects.get(name='Empleados'))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_rutas(self):
+        response = self.client.post(
+            '/api/pedidos/create/', {'mesa': self.mesa.pk, 'descripcion': '1 café', 'total': '2.00'}, format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        pedido_id = response.data['id']
+        response = self.client.patch(f'/api/pedidos/{pedido_id}/', {'estado': 'servido'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(
+            '/api/pedidos-viewset/', {'mesa': self.mesa.pk, 'descripcion': '1 té', 'total': '2.00'}, format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(
+            sorted(Tarea.objects.values_list('argumentos__args', flat=True), key=str),
+            sorted([[pedido_id, 'creado'], [pedido_id, 'actualizado'], [response.data['id'], 'creado']], key=str),
+        )
+        call_command('procesar_tareas', '--una-vez', stdout=StringIO())
+        call_command('procesar_tareas', '--una-vez', stdout=StringIO())
+        self.assertEqual(
+            list(Tarea.objects.order_by().values_list('estado', 'intentos').distinct()), [('completada', 1)]
+        )
+
+
+class FastSerializerTests(APITestCase):
+    """Los FastSerializer producen el mismo JSON, byte a byte, que los de DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        mesa = Mesa.objects.create(sucursal=sucursal, numero=1, capacidad=4, estado='ocupada')
+        Mesa.objects.create(sucursal=sucursal, numero=2, capacidad=2)
+        pizza = Producto.objects.create(nombre='Pizza «margarita»', precio='9.95')
+        pedido = Pedido.objects.create(
+            sucursal=sucursal, mesa=mesa, descripcion='2 pizzas\u2028sin gluten', total='19.90', estado='servido',
+        )
+        PedidoItem.objects.create(pedido=pedido, producto=pizza, cantidad=2, precio_unitario='9.95')
+        Pedido.objects.create(sucursal=sucursal, mesa=mesa, descripcion='1 café', total=2)
+        usuario = User.objects.create_user('camarero', email='c@test.com', first_name='José')
+        # Grupos añadidos en orden distinto al de sus ids
+        usuario.groups.add(Group.objects.get(name='Empleados'))
+        usuario.groups.add(Group.objects.get(name='Administradores'))
+        User.objects.create_user('sin_grupo')
+
+    def comparar(self, fast_class, drf_class, queryset, params=None):
+        request = Request(APIRequestFactory().get('/', params or {}))
+        nombres = campos_solicitados(request, drf_class.Meta.fields)
+        fast = fast_class(nombres).serializar(queryset)
+        drf = drf_class(
+            drf_class.optimizar_queryset(queryset, nombres or drf_class.Meta.fields),
+            many=True, context={'request': request},
+        ).data
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(drf))
+
+    def test_identicos(self):
+        casos = [
+            (FastMesaSerializer, MesaSerializer, Mesa.objects.order_by('numero')),
+            (FastPedidoSerializer, PedidoSerializer, Pedido.objects.order_by('pk')),
+            (FastUserSerializer, UserSerializer, User.objects.order_by('pk')),
+        ]
+        for params in (None, {'fields': 'id,estado_display,total,items,groups'}, {'exclude': 'created_at,mesa_info'}):
+            for fast_class, drf_class, queryset in casos:
+                with self.subTest(serializador=drf_class.__name__, params=params):
+                    self.comparar(fast_class, drf_class, queryset, params)
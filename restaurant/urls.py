@@ -11,11 +11,13 @@ from .views import (
     MesaUpdateView, MesaDestroyView,
     #Vistas genéricas de Pedido
     PedidoListView, PedidoCreateView, PedidoRetrieveUpdateView,
-    PedidoDestroyView,
+    PedidoDestroyView, PedidoBusquedaView,
     #ViewSet de Pedido
     PedidoViewSet,
+    #Vistas de Producto
+    ProductoListView, productos_mas_vendidos_view,
     #API View personalizada
-    mesa_pedidos_view,
+    mesa_pedidos_view, sala_view,
 )
 
 router = DefaultRouter()
@@ -28,7 +30,11 @@ urlpatterns = [
     path('mesas/<int:pk>/update/', MesaUpdateView.as_view(), name='mesa-update'),
     path('mesas/<int:pk>/delete/', MesaDestroyView.as_view(), name='mesa-delete'),
     path('mesas/<int:mesa_id>/pedidos/', mesa_pedidos_view, name='mesa-pedidos'),
+    path('sala/', sala_view, name='sala'),
+    path('productos/', ProductoListView.as_view(), name='producto-list'),
+    path('productos/mas-vendidos/', productos_mas_vendidos_view, name='producto-mas-vendidos'),
     path('pedidos/', PedidoListView.as_view(), name='pedido-list'),
+    path('pedidos/buscar/', PedidoBusquedaView.as_view(), name='pedido-buscar'),
     path('pedidos/create/', PedidoCreateView.as_view(), name='pedido-create'),
     path('pedidos/<int:pk>/', PedidoRetrieveUpdateView.as_view(), name='pedido-detail'),
     path('pedidos/<int:pk>/delete/', PedidoDestroyView.as_view(), name='pedido-delete'),
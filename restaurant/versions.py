@@ -0,0 +1,59 @@
+"""
+Versiones compartidas de datos cacheados en cada proceso.
+
+La tabla de permisos (restaurant.policy) y los ids de grupos
+(restaurant.groups) se guardan en memoria de cada proceso. Al cambiar, el
+proceso que hace el cambio guarda una versión nueva en la caché de Django
+(CACHES, compartida por todos los workers; ver restaurant/checks.py) y los
+demás la comparan con la suya como mucho cada `intervalo` segundos.
+
+La versión es un valor único y no un contador: si la caché pierde la clave
+(expulsión, reinicio), el valor leído deja de coincidir y los procesos
+recargan, en lugar de volver a una versión que ya habían visto.
+"""
+
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+
+class VersionCompartida:
+    """Versión de unos datos en la caché compartida, vista desde un proceso."""
+
+    def __init__(self, clave, intervalo):
+        self.clave = clave
+        # Segundos entre lecturas de la caché, o callable que los retorna
+        self.intervalo = intervalo
+        self._vista = None
+        self._comprobada = None
+        self._lock = threading.Lock()
+
+    def _segundos(self):
+        return self.intervalo() if callable(self.intervalo) else self.intervalo
+
+    def cambiada(self):
+        """
+        Indica si la versión ha cambiado desde la última llamada que retornó
+        True (la primera llamada siempre lo hace). Lee la caché como mucho
+        una vez por intervalo.
+        """
+        ahora = time.monotonic()
+        if self._comprobada is not None and ahora - self._comprobada < self._segundos():
+            return False
+        with self._lock:
+            if self._comprobada is not None and ahora - self._comprobada < self._segundos():
+                return False
+            version = cache.get(self.clave)
+            primera = self._comprobada is None
+            self._comprobada = ahora
+            if primera or version != self._vista:
+                self._vista = version
+                return True
+            return False
+
+    def invalidar(self):
+        """Publica una versión nueva; este proceso recarga en la siguiente comprobación."""
+        cache.set(self.clave, uuid.uuid4().hex, timeout=None)
+        self._comprobada = None
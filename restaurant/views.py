@@ -1,95 +1,262 @@
+import heapq
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
 from django.db.models import Sum, Count
-from rest_framework import generics, viewsets, status
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import generics, serializers, status, viewsets
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from .models import Mesa, Pedido
+from .archive import incluir_historial
+from .fast import FastMesaSerializer, FastPedidoSerializer
+from .floor import estado_sala
+from .mixins import (
+    FastListMixin, IdempotentCreateMixin, NotificarPedidoMixin, SparseFieldsMixin, SucursalScopedMixin,
+)
+from .models import Mesa, Pedido, PedidoArchivado, Producto
+from .paginators import BusquedaPagination
+from .sales import productos_mas_vendidos
+from .search import buscar_pedidos
 from .serializers import (
     MesaSerializer, PedidoSerializer, PedidoCreateSerializer,
-    MesaPedidosSerializer
+    MesaPedidosSerializer, PedidoArchivadoSerializer, PedidoBusquedaSerializer,
+    ProductoSerializer, ProductoVendidoSerializer
 )
-from .permissions import CanDeletePermission, IsAdminGroup
+from .permissions import HasModelPermission, requiere
+from .tenancy import filtrar_sucursal, sucursal_actual
+
+
+def _hoy():
+    return timezone.localdate() if settings.USE_TZ else datetime.now().date()
+
+
+def _inicio_dia(fecha):
+    inicio = datetime.combine(fecha, time.min)
+    return timezone.make_aware(inicio) if settings.USE_TZ else inicio
+
+
+def _fecha_param(request, nombre):
+    """Fecha (AAAA-MM-DD) del parámetro `nombre`, o None si no se indica."""
+    valor = request.query_params.get(nombre)
+    if not valor:
+        return None
+    try:
+        fecha = parse_date(valor)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise ValidationError({nombre: 'Formato de fecha inválido, use AAAA-MM-DD.'})
+    return fecha
+
+
+def _instante_param(request, nombre):
+    """Fecha y hora (ISO 8601) del parámetro `nombre`, o None si no se indica."""
+    valor = request.query_params.get(nombre)
+    if not valor:
+        return None
+    try:
+        instante = parse_datetime(valor)
+    except ValueError:
+        instante = None
+    if instante is None:
+        raise ValidationError({nombre: 'Formato inválido, use una fecha y hora ISO 8601.'})
+    if settings.USE_TZ and timezone.is_naive(instante):
+        instante = timezone.make_aware(instante)
+    elif not settings.USE_TZ and timezone.is_aware(instante):
+        # Sin USE_TZ las fechas de la base son locales (TIME_ZONE)
+        instante = timezone.make_naive(instante)
+    return instante
 
-class MesaListView(generics.ListAPIView):
+
+def filtrar_fechas(queryset, request, desde=None):
+    """
+    Limita `queryset` a los pedidos creados entre ?desde= y ?hasta=
+    (inclusivos). `desde` es el valor por defecto de ?desde=.
     """
-    Vista genérica para listar todas las mesas.
+    desde = _fecha_param(request, 'desde') or desde
+    hasta = _fecha_param(request, 'hasta')
+    # Rangos sobre created_at (no created_at__date) para usar sus índices
+    if desde:
+        queryset = queryset.filter(created_at__gte=_inicio_dia(desde))
+    if hasta:
+        queryset = queryset.filter(created_at__lt=_inicio_dia(hasta + timedelta(days=1)))
+    return queryset
+
+
+# Pedidos archivados por respuesta con ?historial=1 (?historial_limite=)
+HISTORIAL_LIMITE = 100
+HISTORIAL_LIMITE_MAXIMO = 500
+
+_fecha = serializers.DateTimeField()
+
+
+def _historial(request, archivados, context=None):
+    """
+    Pedidos archivados de `archivados` para ?historial=1, del más reciente al
+    más antiguo y como mucho ?historial_limite= (HISTORIAL_LIMITE por
+    defecto). Admite ?desde=/?hasta= y el cursor ?historial_antes=.
+    Retorna (datos, siguiente): `siguiente` es el ?historial_antes= de la
+    página siguiente, o None si no hay más.
+    """
+    valor = request.query_params.get('historial_limite') or str(HISTORIAL_LIMITE)
+    if not valor.isdigit() or not 0 < int(valor) <= HISTORIAL_LIMITE_MAXIMO:
+        raise ValidationError({'historial_limite': f'Debe ser un número entre 1 y {HISTORIAL_LIMITE_MAXIMO}.'})
+    limite = int(valor)
+
+    archivados = filtrar_fechas(archivados, request)
+    antes = _instante_param(request, 'historial_antes')
+    if antes is not None:
+        archivados = archivados.filter(created_at__lt=antes)
+    # ORDER BY created_at DESC LIMIT n sobre los índices (sucursal|mesa, -created_at)
+    filas = list(archivados.select_related('mesa').order_by('-created_at')[:limite + 1])
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        siguiente = _fecha.to_representation(filas[-1].created_at)
+    return PedidoArchivadoSerializer(filas, many=True, context=context or {}).data, siguiente
+
+
+def _mezclar(pedidos, archivados):
+    """Une dos listas ya ordenadas por created_at descendente sin reordenarlas."""
+    if not pedidos or not archivados or 'created_at' not in pedidos[0]:
+        return list(pedidos) + list(archivados)
+    return list(heapq.merge(
+        pedidos, archivados, key=lambda pedido: parse_datetime(pedido['created_at']), reverse=True,
+    ))
+
+
+class MesaListView(FastListMixin, SucursalScopedMixin, SparseFieldsMixin, generics.ListAPIView):
+    """
+    Vista genérica para listar las mesas de la sucursal.
     GET /api/mesas/
     """
     queryset = Mesa.objects.all()
     serializer_class = MesaSerializer
-    permission_classes = [IsAuthenticated]
+    fast_serializer_class = FastMesaSerializer
+    permission_classes = [IsAuthenticated, HasModelPermission]
 
 
-class MesaCreateView(generics.CreateAPIView):
+class MesaCreateView(SucursalScopedMixin, generics.CreateAPIView):
     """
     Vista genérica para crear una nueva mesa.
     POST /api/mesas/create/
     """
     queryset = Mesa.objects.all()
     serializer_class = MesaSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasModelPermission]
 
 
-class MesaRetrieveView(generics.RetrieveAPIView):
+class MesaRetrieveView(SucursalScopedMixin, SparseFieldsMixin, generics.RetrieveAPIView):
     """
     Vista genérica para obtener el detalle de una mesa.
     GET /api/mesas/<id>/
     """
     queryset = Mesa.objects.all()
     serializer_class = MesaSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasModelPermission]
 
 
-class MesaUpdateView(generics.UpdateAPIView):
+class MesaUpdateView(SucursalScopedMixin, generics.UpdateAPIView):
     """
     Vista genérica para actualizar una mesa.
     PUT/PATCH /api/mesas/<id>/update/
     """
     queryset = Mesa.objects.all()
     serializer_class = MesaSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasModelPermission]
 
 
-class MesaDestroyView(generics.DestroyAPIView):
+class MesaDestroyView(SucursalScopedMixin, generics.DestroyAPIView):
     """
     Vista genérica para eliminar una mesa.
-    Solo administradores pueden eliminar.
+    Requiere el permiso de borrado del modelo (solo administradores por defecto).
     DELETE /api/mesas/<id>/delete/
     """
     queryset = Mesa.objects.all()
     serializer_class = MesaSerializer
-    permission_classes = [IsAuthenticated, IsAdminGroup]
+    permission_classes = [IsAuthenticated, HasModelPermission]
+
+#Vistas Producto
+
+class ProductoListView(generics.ListAPIView):
+    """
+    Vista genérica para listar los productos que se pueden pedir.
+    GET /api/productos/
+    """
+    queryset = Producto.objects.filter(activo=True)
+    serializer_class = ProductoSerializer
+    permission_classes = [IsAuthenticated, HasModelPermission]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, requiere('restaurant.view_pedido', 'restaurant.view_producto')])
+def productos_mas_vendidos_view(request):
+    """
+    Productos más vendidos en la sucursal, por cantidad.
+    GET /api/productos/mas-vendidos/
+    Por defecto los de hoy; ?desde= y ?hasta= (AAAA-MM-DD) amplían el rango
+    y ?limite= (hasta 100) el número de productos.
+    """
+    limite = request.query_params.get('limite', '10')
+    if not limite.isdigit() or not 1 <= int(limite) <= 100:
+        raise ValidationError({'limite': 'Debe ser un número entre 1 y 100.'})
+    pedidos = filtrar_sucursal(Pedido.objects.all(), sucursal_actual(request))
+    pedidos = filtrar_fechas(pedidos, request, desde=_hoy())
+    return Response(ProductoVendidoSerializer(productos_mas_vendidos(pedidos, int(limite)), many=True).data)
+
 
 #Vistas Pedido
 
-class PedidoListView(generics.ListAPIView):
+class PedidoListView(FastListMixin, SucursalScopedMixin, SparseFieldsMixin, generics.ListAPIView):
     """
-    Vista genérica para listar todos los pedidos.
+    Vista genérica para listar los pedidos de la sucursal.
     GET /api/pedidos/
+    Con ?historial=1 incluye también los pedidos archivados más recientes
+    (ver _historial); si hay más, la cabecera X-Historial-Siguiente trae el
+    valor de ?historial_antes= para pedirlos.
     """
     queryset = Pedido.objects.all()
     serializer_class = PedidoSerializer
-    permission_classes = [IsAuthenticated]
+    fast_serializer_class = FastPedidoSerializer
+    permission_classes = [IsAuthenticated, HasModelPermission]
 
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if incluir_historial(request):
+            historial, siguiente = _historial(
+                request,
+                filtrar_sucursal(PedidoArchivado.objects.all(), sucursal_actual(request)),
+                context=self.get_serializer_context(),
+            )
+            response.data = _mezclar(response.data, historial)
+            if siguiente is not None:
+                response['X-Historial-Siguiente'] = siguiente
+        return response
 
-class PedidoCreateView(generics.CreateAPIView):
+
+class PedidoCreateView(IdempotentCreateMixin, NotificarPedidoMixin, SucursalScopedMixin, generics.CreateAPIView):
     """
     Vista genérica para crear un nuevo pedido.
     POST /api/pedidos/create/
+    Admite la cabecera Idempotency-Key para absorber reintentos.
     """
     queryset = Pedido.objects.all()
     serializer_class = PedidoCreateSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasModelPermission]
 
 
-class PedidoRetrieveUpdateView(generics.RetrieveUpdateAPIView):
+class PedidoRetrieveUpdateView(NotificarPedidoMixin, SucursalScopedMixin, SparseFieldsMixin,
+                               generics.RetrieveUpdateAPIView):
     """
     Vista genérica para obtener y actualizar un pedido.
     GET/PUT/PATCH /api/pedidos/<id>/
     """
     queryset = Pedido.objects.all()
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, HasModelPermission]
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
@@ -97,33 +264,64 @@ class PedidoRetrieveUpdateView(generics.RetrieveUpdateAPIView):
         return PedidoSerializer
 
 
-class PedidoDestroyView(generics.DestroyAPIView):
+class PedidoDestroyView(SucursalScopedMixin, generics.DestroyAPIView):
     """
     Vista genérica para eliminar un pedido.
-    Solo administradores pueden eliminar.
+    Requiere el permiso de borrado del modelo (solo administradores por defecto).
     DELETE /api/pedidos/<id>/delete/
     """
     queryset = Pedido.objects.all()
     serializer_class = PedidoSerializer
-    permission_classes = [IsAuthenticated, IsAdminGroup]
+    permission_classes = [IsAuthenticated, HasModelPermission]
+
+
+class PedidoBusquedaView(SucursalScopedMixin, generics.ListAPIView):
+    """
+    Búsqueda de texto en la descripción de los pedidos de la sucursal.
+    GET /api/pedidos/buscar/?q=pizza marg
+    Filtros opcionales: mesa (id), estado, desde y hasta (AAAA-MM-DD, inclusivos).
+    Resultados ordenados por relevancia y paginados (page, page_size).
+    """
+    queryset = Pedido.objects.select_related('mesa').prefetch_related('items__producto')
+    serializer_class = PedidoBusquedaSerializer
+    pagination_class = BusquedaPagination
+    permission_classes = [IsAuthenticated, HasModelPermission]
+
+    def get_queryset(self):
+        params = self.request.query_params
+        termino = params.get('q', '').strip()
+        if not termino:
+            raise ValidationError({'q': 'Este parámetro es obligatorio.'})
+
+        queryset = super().get_queryset()
+        if params.get('mesa'):
+            if not params['mesa'].isdigit():
+                raise ValidationError({'mesa': 'Debe ser un id numérico.'})
+            queryset = queryset.filter(mesa_id=params['mesa'])
+        if params.get('estado'):
+            queryset = queryset.filter(estado=params['estado'])
+        queryset = filtrar_fechas(queryset, self.request)
+        return buscar_pedidos(queryset, termino, sucursal_actual(self.request))
 
 
 # Viewset Pedido
 
-class PedidoViewSet(viewsets.ModelViewSet):
+class PedidoViewSet(IdempotentCreateMixin, NotificarPedidoMixin, SucursalScopedMixin, SparseFieldsMixin,
+                    viewsets.ModelViewSet):
     """
     ViewSet completo para el modelo Pedido.
     Proporciona acciones CRUD con permisos por acción.
     
     - list: GET /api/pedidos-viewset/
-    - create: POST /api/pedidos-viewset/
+    - create: POST /api/pedidos-viewset/ (un pedido o una lista de pedidos;
+      admite la cabecera Idempotency-Key)
     - retrieve: GET /api/pedidos-viewset/<id>/
     - update: PUT /api/pedidos-viewset/<id>/
     - partial_update: PATCH /api/pedidos-viewset/<id>/
     - destroy: DELETE /api/pedidos-viewset/<id>/
     """
     queryset = Pedido.objects.all()
-    permission_classes = [IsAuthenticated, CanDeletePermission]
+    permission_classes = [IsAuthenticated, HasModelPermission]
 
     def get_serializer_class(self):
         """Retorna el serializador según la acción."""
@@ -131,29 +329,31 @@ class PedidoViewSet(viewsets.ModelViewSet):
             return PedidoCreateSerializer
         return PedidoSerializer
 
-    def get_permissions(self):
-        """
-        Personaliza permisos por acción.
-        Solo administradores pueden eliminar.
-        """
-        if self.action == 'destroy':
-            return [IsAuthenticated(), IsAdminGroup()]
-        return [IsAuthenticated(), CanDeletePermission()]
+    def get_serializer(self, *args, **kwargs):
+        """Si el cuerpo de un create es una lista, se crean varios pedidos."""
+        if self.action == 'create' and isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        return super().get_serializer(*args, **kwargs)
+
 
 
 #api view personalizada
 
 @api_view(['GET'])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsAuthenticated, requiere('restaurant.view_mesa', 'restaurant.view_pedido')])
 def mesa_pedidos_view(request, mesa_id):
     """
     API View personalizada que obtiene todos los pedidos de una mesa específica
     con estadísticas adicionales.
     
     GET /api/mesas/<mesa_id>/pedidos/
+    Con ?historial=1 incluye también los pedidos archivados más recientes de
+    la mesa (ver _historial) y en historial_siguiente el ?historial_antes= de
+    los siguientes.
  """
+    mesas = filtrar_sucursal(Mesa.objects.all(), sucursal_actual(request))
     try:
-        mesa = Mesa.objects.get(pk=mesa_id)
+        mesa = mesas.prefetch_related('pedidos__items__producto').get(pk=mesa_id)
     except Mesa.DoesNotExist:
         return Response(
             {'error': f'Mesa con id {mesa_id} no encontrada.'},
@@ -175,5 +375,54 @@ def mesa_pedidos_view(request, mesa_id):
     response_data = serializer.data
     response_data['estadisticas_por_estado'] = list(estadisticas_estado)
 
+    if incluir_historial(request):
+        _agregar_historial(request, mesa, response_data)
+
     return Response(response_data, status=status.HTTP_200_OK)
 
+
+
+def _agregar_historial(request, mesa, response_data):
+    """
+    Suma los pedidos archivados de la mesa a la respuesta de mesa_pedidos_view:
+    los más recientes en `pedidos` (ver _historial) y todos en las estadísticas.
+    """
+    archivados = mesa.pedidos_archivados.all()
+    historial, siguiente = _historial(request, archivados)
+    response_data['pedidos'] = _mezclar(response_data['pedidos'], historial)
+    response_data['historial_siguiente'] = siguiente
+
+    estadisticas = {e['estado']: e for e in response_data['estadisticas_por_estado']}
+    for fila in (
+        archivados
+        .values('estado')
+        .annotate(cantidad=Count('id'), total=Sum('total'))
+        .order_by('estado')
+    ):
+        actual = estadisticas.get(fila['estado'])
+        if actual is None:
+            estadisticas[fila['estado']] = fila
+        else:
+            actual['cantidad'] += fila['cantidad']
+            actual['total'] = (actual['total'] or 0) + (fila['total'] or 0)
+        response_data['total_pedidos'] += fila['cantidad']
+        response_data['total_facturado'] += fila['total'] or 0
+
+    response_data['estadisticas_por_estado'] = [
+        estadisticas[estado] for estado in sorted(estadisticas)
+    ]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, requiere('restaurant.view_mesa', 'restaurant.view_pedido')])
+def sala_view(request):
+    """
+    Estado de la sala en una sola petición: todas las mesas de la sucursal,
+    sus pedidos abiertos y las estadísticas por estado (ver restaurant.floor).
+
+    GET /api/sala/
+    Con ?since=<server_time de la respuesta anterior> solo devuelve lo que ha
+    cambiado desde entonces, más los ids vigentes para descartar los borrados.
+    """
+    datos = estado_sala(sucursal_actual(request), desde=_instante_param(request, 'since'))
+    return Response(datos, status=status.HTTP_200_OK)
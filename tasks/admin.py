@@ -0,0 +1,23 @@
+#Configuración del panel de administración para la cola de tareas.
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Tarea
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    """Configuración del admin para el modelo Tarea."""
+    list_display = ('id', 'nombre', 'estado', 'intentos', 'disponible_at', 'created_at', 'completada_at')
+    list_filter = ('estado', 'nombre')
+    search_fields = ('nombre',)
+    ordering = ('-created_at',)
+    readonly_fields = ('bloqueada_por', 'bloqueada_at', 'created_at', 'completada_at', 'ultimo_error')
+    actions = ['reintentar']
+
+    @admin.action(description='Reintentar las tareas seleccionadas')
+    def reintentar(self, request, queryset):
+        actualizadas = queryset.exclude(estado='en_curso').update(
+            estado='pendiente', intentos=0, disponible_at=timezone.now(), bloqueada_por=''
+        )
+        self.message_user(request, f'{actualizadas} tareas programadas de nuevo.')
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'tasks'
+    verbose_name = 'Tareas en segundo plano'
+
+    def ready(self):
+        # Registra las tareas declaradas en los módulos tasks.py de las apps
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tasks')
@@ -0,0 +1,78 @@
+"""
+Comando para ejecutar los workers de la cola de tareas.
+
+Uso:
+    python manage.py procesar_tareas --workers 4
+    python manage.py procesar_tareas --una-vez
+"""
+
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.registry import get_tasks_settings
+from tasks.worker import Worker
+
+
+def _ejecutar_worker(intervalo):
+    parar = []
+    signal.signal(signal.SIGTERM, lambda *_: parar.append(True))
+    signal.signal(signal.SIGINT, lambda *_: parar.append(True))
+    Worker().ejecutar_continuamente(lambda: bool(parar), intervalo)
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta workers que procesan las tareas en segundo plano.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Número de procesos worker.'
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=None,
+            help='Segundos de espera cuando no hay tareas (por defecto TASKS["POLL_INTERVAL"]).'
+        )
+        parser.add_argument(
+            '--una-vez', action='store_true',
+            help='Procesa las tareas listas y termina.'
+        )
+
+    def handle(self, *args, **options):
+        if options['una_vez']:
+            worker = Worker()
+            total = 0
+            while True:
+                procesadas = worker.procesar_lote()
+                if not procesadas:
+                    break
+                total += procesadas
+            self.stdout.write(self.style.SUCCESS(f'{total} tareas procesadas.'))
+            return
+
+        intervalo = options['intervalo']
+        if intervalo is None:
+            intervalo = get_tasks_settings()['POLL_INTERVAL']
+        # Los procesos hijos no deben heredar las conexiones abiertas del padre
+        connections.close_all()
+        contexto = multiprocessing.get_context('fork')
+        procesos = [
+            contexto.Process(target=_ejecutar_worker, args=(intervalo,), daemon=False)
+            for _ in range(options['workers'])
+        ]
+        for proceso in procesos:
+            proceso.start()
+        self.stdout.write(f'{len(procesos)} workers en marcha.')
+
+        def detener(*_):
+            for proceso in procesos:
+                if proceso.is_alive():
+                    proceso.terminate()
+
+        signal.signal(signal.SIGTERM, detener)
+        signal.signal(signal.SIGINT, detener)
+        for proceso in procesos:
+            proceso.join()
+        self.stdout.write(self.style.SUCCESS('Workers detenidos.'))
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=200, verbose_name='Tarea')),
+                ('argumentos', models.JSONField(default=dict, verbose_name='Argumentos')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=20, verbose_name='Estado')),
+                ('intentos', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('max_intentos', models.PositiveIntegerField(default=5, verbose_name='Máximo de intentos')),
+                ('disponible_at', models.DateTimeField(verbose_name='Disponible desde')),
+                ('bloqueada_por', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('bloqueada_at', models.DateTimeField(blank=True, null=True, verbose_name='Reclamada en')),
+                ('ultimo_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+                ('completada_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de finalización')),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['estado', 'disponible_at'], name='tarea_estado_disponible_idx')],
+            },
+        ),
+    ]
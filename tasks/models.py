@@ -0,0 +1,48 @@
+"""
+Modelos de la cola de tareas en segundo plano.
+"""
+
+from django.db import models
+
+
+class Tarea(models.Model):
+    """
+    Tarea pendiente de ejecutar por un worker (outbox transaccional).
+    Se inserta en la misma transacción que el cambio que la origina, de modo
+    que solo existe si ese cambio se confirmó, y se ejecuta al menos una vez.
+    """
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En curso'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    ]
+
+    nombre = models.CharField(max_length=200, verbose_name='Tarea')
+    argumentos = models.JSONField(default=dict, verbose_name='Argumentos')
+    estado = models.CharField(
+        max_length=20,
+        choices=ESTADO_CHOICES,
+        default='pendiente',
+        verbose_name='Estado'
+    )
+    intentos = models.PositiveIntegerField(default=0, verbose_name='Intentos')
+    max_intentos = models.PositiveIntegerField(default=5, verbose_name='Máximo de intentos')
+    disponible_at = models.DateTimeField(verbose_name='Disponible desde')
+    bloqueada_por = models.CharField(max_length=100, blank=True, verbose_name='Worker')
+    bloqueada_at = models.DateTimeField(null=True, blank=True, verbose_name='Reclamada en')
+    ultimo_error = models.TextField(blank=True, verbose_name='Último error')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
+    completada_at = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de finalización')
+
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        ordering = ['-created_at']
+        indexes = [
+            # Búsqueda de tareas listas para ejecutar por los workers
+            models.Index(fields=['estado', 'disponible_at'], name='tarea_estado_disponible_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.nombre} #{self.pk} ({self.get_estado_display()})'
@@ -0,0 +1,112 @@
+"""
+Registro de tareas y encolado.
+
+    from tasks.registry import task
+
+    @task(max_intentos=3)
+    def enviar_bienvenida(user_id):
+        ...
+
+    enviar_bienvenida.encolar(user.id)
+
+encolar() inserta una fila Tarea en la transacción en curso: si la
+transacción se revierte, la tarea tampoco existe (outbox transaccional).
+Los argumentos deben ser serializables a JSON (ids, no instancias).
+"""
+
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Tarea
+
+DEFAULT_TASKS = {
+    # Ejecuta las tareas en el propio proceso al confirmar la transacción (desarrollo)
+    'EAGER': False,
+    # Segundos tras los que una tarea 'en_curso' se considera abandonada y se reintenta
+    'LOCK_TIMEOUT': 300,
+    # Espera máxima entre reintentos, en segundos
+    'BACKOFF_MAX': 3600,
+    # Segundos entre consultas cuando no hay tareas listas
+    'POLL_INTERVAL': 1.0,
+    # Tareas reclamadas por consulta
+    'BATCH_SIZE': 10,
+    # Días que se conservan las tareas completadas
+    'RETENTION_DAYS': 7,
+}
+
+# nombre -> TareaRegistrada
+REGISTRO = {}
+
+
+def get_tasks_settings():
+    return {**DEFAULT_TASKS, **getattr(settings, 'TASKS', {})}
+
+
+class TareaRegistrada:
+    """Función registrada como tarea; se puede llamar directamente o encolar."""
+
+    def __init__(self, funcion, nombre, max_intentos, backoff):
+        self.funcion = funcion
+        self.nombre = nombre
+        self.max_intentos = max_intentos
+        self.backoff = backoff
+        self.__doc__ = funcion.__doc__
+
+    def __call__(self, *args, **kwargs):
+        return self.funcion(*args, **kwargs)
+
+    def __repr__(self):
+        return f'<Tarea {self.nombre}>'
+
+    def encolar(self, *args, **kwargs):
+        """Programa la tarea. Retorna la Tarea creada (None en modo EAGER)."""
+        if get_tasks_settings()['EAGER']:
+            transaction.on_commit(lambda: self.funcion(*args, **kwargs))
+            return None
+        return Tarea.objects.create(
+            nombre=self.nombre,
+            argumentos={'args': list(args), 'kwargs': kwargs},
+            max_intentos=self.max_intentos,
+            disponible_at=timezone.now(),
+        )
+
+    def encolar_lote(self, lista_args):
+        """Programa una ejecución por cada tupla de argumentos con un solo INSERT."""
+        if get_tasks_settings()['EAGER']:
+            for args in lista_args:
+                transaction.on_commit(lambda args=args: self.funcion(*args))
+            return []
+        ahora = timezone.now()
+        return Tarea.objects.bulk_create([
+            Tarea(
+                nombre=self.nombre, argumentos={'args': list(args), 'kwargs': {}},
+                max_intentos=self.max_intentos, disponible_at=ahora,
+            )
+            for args in lista_args
+        ])
+
+    def espera_reintento(self, intentos, config=None):
+        """Segundos hasta el siguiente intento: exponencial con jitter y acotado."""
+        config = config or get_tasks_settings()
+        espera = min(config['BACKOFF_MAX'], self.backoff * 2 ** max(intentos - 1, 0))
+        return espera * random.uniform(0.5, 1.0)
+
+
+def task(funcion=None, *, nombre=None, max_intentos=5, backoff=2.0):
+    """
+    Decorador que registra una función como tarea en segundo plano.
+    `backoff` es la espera base (segundos) antes del primer reintento;
+    se duplica en cada intento fallido.
+    """
+    def registrar(funcion):
+        nombre_tarea = nombre or f'{funcion.__module__}.{funcion.__qualname__}'
+        registrada = TareaRegistrada(funcion, nombre_tarea, max_intentos, backoff)
+        REGISTRO[nombre_tarea] = registrada
+        return registrada
+
+    if funcion is not None:
+        return registrar(funcion)
+    return registrar
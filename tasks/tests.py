@@ -0,0 +1,128 @@
+"""
+Tests del worker de la cola de tareas.
+
+    DB_ENGINE=sqlite python manage.py test tasks
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Tarea
+from .registry import REGISTRO, task
+from .worker import Worker
+
+CONFIG = {'LOCK_TIMEOUT': 300, 'BACKOFF_MAX': 60, 'BATCH_SIZE': 10}
+
+ejecutadas = []
+
+
+@task(nombre='tests.anotar')
+def anotar(valor):
+    ejecutadas.append(valor)
+
+
+@task(nombre='tests.fallar', max_intentos=2, backoff=10.0)
+def fallar():
+    raise RuntimeError('fallo de prueba')
+
+
+class WorkerTests(TestCase):
+
+    def setUp(self):
+        ejecutadas.clear()
+        self.addCleanup(ejecutadas.clear)
+        parche = mock.patch('tasks.worker.logger')
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def worker(self, nombre):
+        return Worker(nombre, CONFIG)
+
+    def test_reclamar_una_vez(self):
+        tareas = anotar.encolar_lote([(i,) for i in range(3)])
+        a, b = self.worker('a'), self.worker('b')
+        filtrar = Tarea.objects.filter
+        de_b = []
+
+        def filtrar_con_carrera(*args, **kwargs):
+            # b reclama entre la lectura de candidatas de a y su UPDATE condicional
+            if 'intentos' in kwargs and not de_b:
+                de_b.append(None)
+                de_b.extend(b.reclamar(2))
+            return filtrar(*args, **kwargs)
+
+        with mock.patch.object(Tarea.objects, 'filter', side_effect=filtrar_con_carrera):
+            de_a = a.reclamar(10)
+        de_b = de_b[1:]
+
+        self.assertEqual(len(de_b), 2)
+        self.assertEqual(len(de_a), 1)
+        self.assertEqual({t.pk for t in de_a + de_b}, {t.pk for t in tareas})
+        self.assertEqual(a.reclamar(10) + b.reclamar(10), [])
+        for worker, reclamadas in ((a, de_a), (b, de_b)):
+            for tarea in reclamadas:
+                self.assertTrue(worker.ejecutar(tarea))
+        self.assertEqual(sorted(ejecutadas), [0, 1, 2])
+        self.assertEqual(
+            set(Tarea.objects.values_list('estado', 'intentos')), {('completada', 1)}
+        )
+
+    def test_tarea_abandonada(self):
+        anotar.encolar('x')
+        caido, otro = self.worker('caido'), self.worker('otro')
+        [tarea] = caido.reclamar(10)
+        self.assertEqual(otro.reclamar(10), [])
+
+        Tarea.objects.filter(pk=tarea.pk).update(bloqueada_at=timezone.now() - timedelta(seconds=301))
+        [reclamada] = otro.reclamar(10)
+        self.assertEqual((reclamada.bloqueada_por, reclamada.intentos), ('otro', 2))
+        # El worker original ya no puede cerrar la tarea
+        caido.ejecutar(tarea)
+        self.assertEqual(Tarea.objects.get(pk=tarea.pk).estado, 'en_curso')
+        otro.ejecutar(reclamada)
+        self.assertEqual(Tarea.objects.get(pk=tarea.pk).estado, 'completada')
+
+    def test_reintento_con_espera(self):
+        fallar.encolar()
+        worker = self.worker('w')
+        antes = timezone.now()
+        with mock.patch('tasks.registry.random.uniform', return_value=1.0):
+            [tarea] = worker.reclamar(10)
+            self.assertFalse(worker.ejecutar(tarea))
+
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('pendiente', 1))
+        self.assertIn('fallo de prueba', tarea.ultimo_error)
+        self.assertGreaterEqual(tarea.disponible_at, antes + timedelta(seconds=10))
+        # No se reintenta antes de tiempo
+        self.assertEqual(worker.reclamar(10), [])
+
+        with mock.patch('tasks.registry.random.uniform', side_effect=lambda a, b: b):
+            self.assertEqual(fallar.espera_reintento(1, CONFIG), 10)
+            self.assertEqual(fallar.espera_reintento(2, CONFIG), 20)
+            self.assertEqual(fallar.espera_reintento(10, CONFIG), CONFIG['BACKOFF_MAX'])
+
+    def test_intentos_agotados(self):
+        fallar.encolar()
+        worker = self.worker('w')
+        for _ in range(2):
+            Tarea.objects.update(disponible_at=timezone.now())
+            [tarea] = worker.reclamar(10)
+            self.assertFalse(worker.ejecutar(tarea))
+
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('fallida', 2))
+        Tarea.objects.update(disponible_at=timezone.now())
+        self.assertEqual(worker.reclamar(10), [])
+
+    def test_no_registrada(self):
+        Tarea.objects.create(nombre='tests.desconocida', disponible_at=timezone.now())
+        worker = self.worker('w')
+        [tarea] = worker.reclamar(10)
+        self.assertNotIn(tarea.nombre, REGISTRO)
+        self.assertFalse(worker.ejecutar(tarea))
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.ultimo_error), ('fallida', 'Tarea no registrada.'))
@@ -0,0 +1,130 @@
+"""
+Worker de la cola de tareas.
+
+Cada worker reclama tareas con un UPDATE condicional (solo gana quien
+encuentra la fila en el estado que leyó), de modo que varios procesos
+pueden consultar la misma tabla sin ejecutar dos veces la misma tarea.
+Una tarea cuyo worker muere queda 'en_curso' y se vuelve a reclamar pasado
+LOCK_TIMEOUT: la entrega es al menos una vez, así que las tareas deben ser
+idempotentes.
+"""
+
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from monitoring import metrics
+from .models import Tarea
+from .registry import REGISTRO, get_tasks_settings
+
+logger = logging.getLogger('tasks')
+
+
+def purgar_completadas(dias):
+    """Borra las tareas completadas hace más de `dias` días. Retorna cuántas."""
+    limite = timezone.now() - timedelta(days=dias)
+    return Tarea.objects.filter(estado='completada', completada_at__lt=limite).delete()[0]
+
+
+class Worker:
+    """Reclama y ejecuta tareas listas de la tabla Tarea."""
+
+    def __init__(self, nombre=None, config=None):
+        self.nombre = nombre or f'{socket.gethostname()}:{os.getpid()}'
+        self.config = config or get_tasks_settings()
+
+    def reclamar(self, limite):
+        """Reclama hasta `limite` tareas listas. Retorna las tareas reclamadas."""
+        ahora = timezone.now()
+        abandonadas = ahora - timedelta(seconds=self.config['LOCK_TIMEOUT'])
+        candidatas = list(
+            Tarea.objects
+            .filter(
+                Q(estado='pendiente', disponible_at__lte=ahora) |
+                Q(estado='en_curso', bloqueada_at__lt=abandonadas)
+            )
+            .order_by('disponible_at')
+            .values_list('pk', 'estado', 'intentos')[:limite]
+        )
+        reclamadas = []
+        for pk, estado, intentos in candidatas:
+            # Otro worker puede haberla reclamado entre la lectura y el UPDATE
+            if Tarea.objects.filter(pk=pk, estado=estado, intentos=intentos).update(
+                estado='en_curso', bloqueada_por=self.nombre, bloqueada_at=ahora,
+                intentos=F('intentos') + 1,
+            ):
+                reclamadas.append(pk)
+        return list(Tarea.objects.filter(pk__in=reclamadas).order_by('disponible_at'))
+
+    def _finalizar(self, tarea, **campos):
+        """Actualiza la tarea solo si sigue reclamada por este worker en este intento."""
+        return Tarea.objects.filter(
+            pk=tarea.pk, estado='en_curso', bloqueada_por=self.nombre, intentos=tarea.intentos
+        ).update(**campos)
+
+    def ejecutar(self, tarea):
+        """Ejecuta una tarea reclamada y registra el resultado."""
+        registrada = REGISTRO.get(tarea.nombre)
+        if registrada is None or tarea.intentos > tarea.max_intentos:
+            motivo = 'Tarea no registrada.' if registrada is None else 'Máximo de intentos superado.'
+            self._finalizar(tarea, estado='fallida', ultimo_error=motivo, bloqueada_por='')
+            metrics.tasks_total.inc(tarea.nombre, 'fallida')
+            logger.error('Tarea %s #%s descartada: %s', tarea.nombre, tarea.pk, motivo)
+            return False
+
+        inicio = time.perf_counter()
+        try:
+            registrada.funcion(*tarea.argumentos.get('args', []), **tarea.argumentos.get('kwargs', {}))
+        except Exception:
+            metrics.task_duration_seconds.observe(time.perf_counter() - inicio, tarea.nombre)
+            self._fallo(tarea, registrada, traceback.format_exc())
+            return False
+        metrics.task_duration_seconds.observe(time.perf_counter() - inicio, tarea.nombre)
+        self._finalizar(tarea, estado='completada', completada_at=timezone.now(), bloqueada_por='')
+        metrics.tasks_total.inc(tarea.nombre, 'completada')
+        return True
+
+    def _fallo(self, tarea, registrada, error):
+        if tarea.intentos >= tarea.max_intentos:
+            self._finalizar(tarea, estado='fallida', ultimo_error=error[-5000:], bloqueada_por='')
+            metrics.tasks_total.inc(tarea.nombre, 'fallida')
+            logger.error('Tarea %s #%s fallida tras %s intentos:\n%s',
+                         tarea.nombre, tarea.pk, tarea.intentos, error)
+            return
+        espera = registrada.espera_reintento(tarea.intentos, self.config)
+        self._finalizar(
+            tarea, estado='pendiente', ultimo_error=error[-5000:], bloqueada_por='',
+            disponible_at=timezone.now() + timedelta(seconds=espera),
+        )
+        metrics.tasks_total.inc(tarea.nombre, 'reintento')
+        logger.warning('Tarea %s #%s falló (intento %s), se reintenta en %.1fs',
+                       tarea.nombre, tarea.pk, tarea.intentos, espera)
+
+    def procesar_lote(self):
+        """Reclama y ejecuta un lote. Retorna el número de tareas ejecutadas."""
+        tareas = self.reclamar(self.config['BATCH_SIZE'])
+        for tarea in tareas:
+            self.ejecutar(tarea)
+        return len(tareas)
+
+    def ejecutar_continuamente(self, debe_parar, intervalo=None):
+        """
+        Procesa lotes hasta que `debe_parar()` sea cierto; si no hay tareas
+        listas espera `intervalo` segundos. Purga las completadas cada hora.
+        """
+        intervalo = self.config['POLL_INTERVAL'] if intervalo is None else intervalo
+        proxima_purga = 0
+        while not debe_parar():
+            close_old_connections()
+            if time.monotonic() >= proxima_purga:
+                purgar_completadas(self.config['RETENTION_DAYS'])
+                proxima_purga = time.monotonic() + 3600
+            if not self.procesar_lote():
+                time.sleep(intervalo)
@@ -0,0 +1,120 @@
+"""
+Comando para dar de alta una plantilla completa desde un CSV.
+
+Uso:
+    python manage.py importar_usuarios empleados.csv --sucursal centro
+
+El CSV lleva cabecera con las columnas username (obligatoria), email,
+first_name, last_name y password. Sin password, el usuario queda con una
+contraseña inutilizable y debe restablecerla. Se valida el fichero entero
+antes de crear nada; con errores no se importa ninguna fila salvo que se
+indique --omitir-errores.
+"""
+
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from restaurant.groups import GRUPO_EMPLEADOS, grupo_id
+from restaurant.models import Sucursal
+from users.registration import crear_usuarios, validar_filas
+from users.tasks import enviar_bienvenida
+
+COLUMNAS = ('username', 'email', 'first_name', 'last_name', 'password')
+
+
+class Command(BaseCommand):
+    help = 'Importa usuarios desde un CSV en una sucursal y un grupo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichero', help="Ruta del CSV ('-' para leer de la entrada estándar).")
+        parser.add_argument(
+            '--sucursal', default=None,
+            help='Código de la sucursal (opcional si solo hay una activa).'
+        )
+        parser.add_argument(
+            '--grupo', default=GRUPO_EMPLEADOS,
+            help=f'Grupo de los usuarios (por defecto {GRUPO_EMPLEADOS}).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Usuarios creados por transacción.'
+        )
+        parser.add_argument(
+            '--omitir-errores', action='store_true',
+            help='Importa las filas válidas aunque otras tengan errores.'
+        )
+        parser.add_argument(
+            '--bienvenida', action='store_true',
+            help='Encola el correo de bienvenida de cada usuario.'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Solo valida el fichero.'
+        )
+
+    def handle(self, *args, **options):
+        sucursal = self._sucursal(options['sucursal'])
+        if grupo_id(options['grupo']) is None:
+            raise CommandError(f"El grupo '{options['grupo']}' no existe.")
+
+        filas = self._leer(options['fichero'])
+        validas, errores = validar_filas(filas)
+        for linea, mensaje in errores:
+            self.stderr.write(f'Línea {linea}: {mensaje}')
+        if errores and not options['omitir_errores']:
+            raise CommandError(
+                f'{len(errores)} filas con errores; no se ha importado nada '
+                '(use --omitir-errores para importar las válidas).'
+            )
+        if options['dry_run']:
+            self.stdout.write(f'{len(validas)} usuarios se importarían.')
+            return
+
+        total = 0
+        batch_size = options['batch_size']
+        for inicio in range(0, len(validas), batch_size):
+            with transaction.atomic():
+                usuarios = crear_usuarios(
+                    validas[inicio:inicio + batch_size], sucursal=sucursal, grupo=options['grupo'],
+                )
+                if options['bienvenida']:
+                    enviar_bienvenida.encolar_lote([(usuario.pk,) for usuario in usuarios])
+            total += len(usuarios)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {total} usuarios importados...')
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} usuarios importados en {sucursal.nombre} ({options["grupo"]}).'
+        ))
+
+    def _sucursal(self, codigo):
+        activas = Sucursal.objects.filter(activa=True)
+        if codigo:
+            sucursal = activas.filter(codigo=codigo).first()
+            if sucursal is None:
+                raise CommandError(f"La sucursal '{codigo}' no existe o no está activa.")
+            return sucursal
+        sucursales = list(activas[:2])
+        if len(sucursales) != 1:
+            raise CommandError('Indique la sucursal con --sucursal.')
+        return sucursales[0]
+
+    def _leer(self, ruta):
+        """Retorna [(línea, {columna: valor})] del CSV."""
+        try:
+            fichero = sys.stdin if ruta == '-' else open(ruta, newline='', encoding='utf-8-sig')
+        except OSError as error:
+            raise CommandError(f'No se puede leer {ruta}: {error}')
+        with fichero:
+            lector = csv.DictReader(fichero)
+            if not lector.fieldnames or 'username' not in lector.fieldnames:
+                raise CommandError('El CSV debe tener cabecera con la columna username.')
+            desconocidas = set(lector.fieldnames) - set(COLUMNAS)
+            if desconocidas:
+                raise CommandError(f'Columnas desconocidas: {", ".join(sorted(desconocidas))}.')
+            return [
+                (lector.line_num, {columna: fila.get(columna) for columna in COLUMNAS})
+                for fila in lector
+            ]
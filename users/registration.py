@@ -0,0 +1,136 @@
+"""
+Alta de usuarios: registro desde la API e importación masiva (CSV).
+
+crear_usuarios() da de alta uno o muchos usuarios en una transacción con un
+INSERT por tabla (usuarios, grupos y membresías), sea cual sea el tamaño del
+lote. El id del grupo sale de la caché de restaurant.groups.grupo_id() y los
+validadores de contraseña están precargados (users.passwords.precargar).
+
+Lo más caro del alta es el hash de la contraseña (PBKDF2). hashear()
+calcula los de un lote en un pool de hilos: hashlib libera el GIL mientras
+calcula, así que se reparten entre los núcleos.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from restaurant.groups import GRUPO_EMPLEADOS, grupo_id
+from restaurant.models import Membresia
+
+
+def _nucleos():
+    """Núcleos que puede usar este proceso (no los de la máquina si está limitado)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def hashear(contrasenas):
+    """Hashes de `contrasenas` en el mismo orden; None da una contraseña inutilizable."""
+    hilos = min(len(contrasenas), _nucleos())
+    if hilos < 2:
+        return [make_password(contrasena) for contrasena in contrasenas]
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='hash') as pool:
+        return list(pool.map(make_password, contrasenas))
+
+
+def nuevo_usuario(datos, password_hash):
+    """User sin guardar con los datos de alta normalizados como en create_user()."""
+    return User(
+        username=User.normalize_username(datos['username']),
+        email=User.objects.normalize_email(datos.get('email') or ''),
+        first_name=datos.get('first_name') or '',
+        last_name=datos.get('last_name') or '',
+        password=password_hash,
+    )
+
+
+def crear_usuarios(lista_datos, sucursal=None, grupo=GRUPO_EMPLEADOS):
+    """
+    Da de alta los usuarios de `lista_datos` (dicts validados con username,
+    email, first_name, last_name y password en claro, o None para una
+    contraseña inutilizable) en `grupo` y, si se indica, como miembros de
+    `sucursal`. Retorna los User creados.
+    """
+    hashes = hashear([datos.get('password') for datos in lista_datos])
+    usuarios = [nuevo_usuario(datos, password_hash) for datos, password_hash in zip(lista_datos, hashes)]
+    if not usuarios:
+        return usuarios
+    group_id = grupo_id(grupo)
+
+    # Sin savepoint: dentro de otra transacción (RegisterView), un fallo la deshace entera
+    with transaction.atomic(savepoint=False):
+        if len(usuarios) == 1:
+            usuarios[0].save()
+        else:
+            User.objects.bulk_create(usuarios)
+            if usuarios[0].pk is None:
+                # MySQL no retorna los ids de un INSERT múltiple
+                ids = dict(
+                    User.objects
+                    .filter(username__in=[usuario.username for usuario in usuarios])
+                    .values_list('username', 'pk')
+                )
+                for usuario in usuarios:
+                    usuario.pk = ids[usuario.username]
+
+        if group_id is not None:
+            UserGroup = User.groups.through
+            UserGroup.objects.bulk_create([
+                UserGroup(user_id=usuario.pk, group_id=group_id) for usuario in usuarios
+            ])
+            if sucursal is not None:
+                Membresia.objects.bulk_create([
+                    Membresia(user_id=usuario.pk, sucursal=sucursal, group_id=group_id)
+                    for usuario in usuarios
+                ])
+    return usuarios
+
+
+def validar_filas(filas):
+    """
+    Valida filas de importación [(linea, {'username', 'email', 'first_name',
+    'last_name', 'password'})]. Retorna (validas, errores): las filas válidas
+    como dicts listos para crear_usuarios() y los errores como
+    [(linea, mensaje)]. Comprueba formato, duplicados dentro del fichero y
+    usuarios ya existentes (una consulta por cada 1000 nombres).
+    """
+    username_field = User._meta.get_field('username')
+    email_field = User._meta.get_field('email')
+    validas, errores, vistos = [], [], {}
+    for linea, datos in filas:
+        datos = {campo: (valor or '').strip() for campo, valor in datos.items()}
+        datos['username'] = User.normalize_username(datos.get('username', ''))
+        datos['password'] = datos.get('password') or None
+        try:
+            username_field.clean(datos['username'], None)
+            if datos.get('email'):
+                email_field.clean(datos['email'], None)
+            if datos['password'] is not None:
+                validate_password(datos['password'], nuevo_usuario(datos, None))
+        except ValidationError as error:
+            errores.append((linea, '; '.join(error.messages)))
+            continue
+        if datos['username'] in vistos:
+            errores.append((linea, f"Usuario '{datos['username']}' repetido (línea {vistos[datos['username']]})."))
+            continue
+        vistos[datos['username']] = linea
+        validas.append((linea, datos))
+
+    nombres = list(vistos)
+    existentes = set()
+    for inicio in range(0, len(nombres), 1000):
+        existentes.update(
+            User.objects.filter(username__in=nombres[inicio:inicio + 1000]).values_list('username', flat=True)
+        )
+    for linea, datos in validas:
+        if datos['username'] in existentes:
+            errores.append((linea, f"El usuario '{datos['username']}' ya existe."))
+    errores.sort()
+    return [datos for _, datos in validas if datos['username'] not in existentes], errores
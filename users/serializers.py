@@ -6,6 +6,9 @@ from django.contrib.auth.models import User, Group
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 
+from restaurant.serializers import DynamicFieldsMixin
+from .registration import crear_usuarios
+
 
 class GroupSerializer(serializers.ModelSerializer):
     """
@@ -16,7 +19,7 @@ class GroupSerializer(serializers.ModelSerializer):
         fields = ['id', 'name']
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializador para el modelo User.
     Incluye información de grupos.
@@ -32,10 +35,18 @@ class UserSerializer(serializers.ModelSerializer):
             'date_joined', 'last_login'
         ]
         read_only_fields = ['date_joined', 'last_login', 'is_staff']
+        columnas_por_campo = {
+            'groups': [],
+            'group_names': [],
+        }
+        prefetch_por_campo = {
+            'groups': ['groups'],
+            'group_names': ['groups'],
+        }
 
     def get_group_names(self, obj):
         """Retorna los nombres de los grupos del usuario."""
-        return list(obj.groups.values_list('name', flat=True))
+        return [group.name for group in obj.groups.all()]
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -70,14 +81,13 @@ class UserCreateSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        """Crea un nuevo usuario con la contraseña encriptada."""
+        """
+        Crea un nuevo usuario con la contraseña encriptada, en el grupo de
+        empleados y como miembro de la sucursal del registro (ver
+        users.registration).
+        """
         validated_data.pop('password_confirm')
-        user = User.objects.create_user(**validated_data)
-        #Asignar al grupo de empleados por defecto
-        empleados_group = Group.objects.filter(name='Empleados').first()
-        if empleados_group:
-            user.groups.add(empleados_group)
-        return user
+        return crear_usuarios([validated_data], sucursal=self.context.get('sucursal'))[0]
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
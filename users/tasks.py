@@ -0,0 +1,22 @@
+"""
+Tareas en segundo plano de la gestión de usuarios (ver tasks.registry).
+"""
+
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+
+from tasks.registry import task
+
+
+@task(max_intentos=8, backoff=30)
+def enviar_bienvenida(user_id):
+    """Envía el correo de bienvenida a un usuario recién registrado."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or not user.email:
+        return
+    send_mail(
+        'Bienvenido al restaurante',
+        f'Hola {user.first_name or user.username}, tu cuenta se ha creado correctamente.',
+        None,
+        [user.email],
+    )
@@ -0,0 +1,95 @@
+"""
+Tests del alta masiva de usuarios (importar_usuarios).
+
+    DB_ENGINE=sqlite python manage.py test users
+"""
+
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from restaurant.models import Membresia, Sucursal
+
+CSV = """username,email,first_name,last_name,password
+ana,ana@example.com,Ana,García,Camarera-2024!
+luis,,Luis,,
+ana,otra@example.com,Ana,Otra,Camarera-2024!
+mal usuario,,,,
+pedro,pedro@,Pedro,,
+marta,,,,123
+existente,,,,
+"""
+
+
+class ImportarUsuariosTests(TestCase):
+    """El CSV se valida entero: duplicados, formato y usuarios existentes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sucursal = Sucursal.objects.create(nombre='Centro', codigo='centro')
+        Sucursal.objects.create(nombre='Norte', codigo='norte')
+        User.objects.create_user('existente')
+
+    def importar(self, *opciones, contenido=CSV):
+        descriptor, ruta = tempfile.mkstemp(suffix='.csv')
+        self.addCleanup(os.remove, ruta)
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as fichero:
+            fichero.write(contenido)
+        errores = StringIO()
+        call_command(
+            'importar_usuarios', ruta, '--sucursal', 'centro', *opciones,
+            stdout=StringIO(), stderr=errores,
+        )
+        return errores.getvalue()
+
+    def test_errores_sin_importar(self):
+        with self.assertRaisesMessage(CommandError, '5 filas con errores'):
+            self.importar()
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['existente'])
+        self.assertFalse(Membresia.objects.exists())
+
+    def test_omitir_errores(self):
+        errores = self.importar('--omitir-errores')
+        for linea, texto in ((4, "'ana' repetido (línea 2)"), (5, 'Línea 5'), (6, 'Línea 6'),
+                             (7, 'Línea 7'), (8, "'existente' ya existe")):
+            self.assertIn(texto, errores, linea)
+
+        self.assertEqual(
+            sorted(User.objects.values_list('username', flat=True)), ['ana', 'existente', 'luis'],
+        )
+        ana, luis = User.objects.get(username='ana'), User.objects.get(username='luis')
+        self.assertEqual((ana.email, ana.first_name, ana.last_name), ('ana@example.com', 'Ana', 'García'))
+        self.assertTrue(ana.check_password('Camarera-2024!'))
+        self.assertFalse(ana.check_password('otra'))
+        self.assertFalse(luis.has_usable_password())
+
+        empleados = Group.objects.get(name='Empleados')
+        for usuario in (ana, luis):
+            self.assertEqual(list(usuario.groups.all()), [empleados])
+            self.assertEqual(
+                list(Membresia.objects.filter(user=usuario).values_list('sucursal', 'group')),
+                [(self.sucursal.pk, empleados.pk)],
+            )
+        self.assertFalse(User.objects.get(username='existente').groups.exists())
+
+    def test_grupo_y_lotes(self):
+        contenido = 'username,password\n' + ''.join(f'admin{i},Clave-segura-{i}!\n' for i in range(5))
+        self.importar('--grupo', 'Administradores', '--batch-size', '2', contenido=contenido)
+
+        administradores = Group.objects.get(name='Administradores')
+        usuarios = User.objects.filter(username__startswith='admin').order_by('username')
+        self.assertEqual(len(usuarios), 5)
+        for i, usuario in enumerate(usuarios):
+            self.assertTrue(usuario.check_password(f'Clave-segura-{i}!'))
+            self.assertEqual(list(usuario.groups.all()), [administradores])
+        self.assertEqual(
+            Membresia.objects.filter(user__in=usuarios, sucursal=self.sucursal, group=administradores).count(), 5,
+        )
+
+    def test_dry_run(self):
+        self.importar('--dry-run', contenido='username\nsolo\n')
+        self.assertFalse(User.objects.filter(username='solo').exists())
@@ -5,14 +5,23 @@ Incluye autenticación, registro y administración de usuarios.
 
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User, Group
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import generics, status
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.throttling import SimpleRateThrottle
 from rest_framework.views import APIView
 
-from restaurant.permissions import IsAdminGroup, IsOwnerOrAdmin
+from monitoring import metrics
+from restaurant.fast import FastUserSerializer
+from restaurant.mixins import FastListMixin, SparseFieldsMixin, SucursalScopedMixin
+from restaurant.models import Membresia
+from restaurant.permissions import ADMINISTRAR_SUCURSAL, HasModelPermission, requiere
+from restaurant.tenancy import sucursal_actual, sucursal_registro
+from .tasks import enviar_bienvenida
 from .serializers import (
     UserSerializer, UserCreateSerializer, UserUpdateSerializer,
     LoginSerializer, AssignGroupSerializer, PasswordChangeSerializer
@@ -27,22 +36,43 @@ class RegisterView(generics.CreateAPIView):
     """
     Vista para registro de nuevos usuarios.
     POST /api/users/register/
-    Acceso público.
+    Acceso público. El usuario queda como empleado de la sucursal indicada
+    con la cabecera X-Sucursal (o de la única sucursal, si solo hay una).
     """
     queryset = User.objects.all()
     serializer_class = UserCreateSerializer
     permission_classes = [AllowAny]
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sucursal'] = sucursal_registro(self.request)
+        return context
+
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save()
+        with transaction.atomic():
+            user = serializer.save()
+            # Se envía desde un worker; solo existe si el alta se confirma
+            enviar_bienvenida.encolar(user.id)
+        prefetch_related_objects([user], 'groups')
         return Response({
             'message': 'Usuario registrado exitosamente.',
             'user': UserSerializer(user).data
         }, status=status.HTTP_201_CREATED)
 
 
+class LoginRateThrottle(SimpleRateThrottle):
+    """
+    Intentos de login por IP, autenticado o no
+    (REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']['login']).
+    """
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
 class LoginView(APIView):
     """
     Vista para iniciar sesión.
@@ -53,6 +83,11 @@ class LoginView(APIView):
     Authorization: Token <token>
     """
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle]
+
+    def throttled(self, request, wait):
+        metrics.auth_login_total.inc('throttled')
+        super().throttled(request, wait)
 
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
@@ -65,19 +100,24 @@ class LoginView(APIView):
 
         if user is not None:
             if user.is_active:
-                login(request, user)
+                # Con API_ONLY=1 no hay sesiones: basta con el token
+                if hasattr(request, 'session'):
+                    login(request, user)
                 # Crear o obtener el token para el usuario
                 token, created = Token.objects.get_or_create(user=user)
+                metrics.auth_login_total.inc('exito')
                 return Response({
                     'message': 'Inicio de sesión exitoso.',
                     'token': token.key,
                     'user': UserSerializer(user).data
                 }, status=status.HTTP_200_OK)
             else:
+                metrics.auth_login_total.inc('desactivada')
                 return Response({
                     'error': 'La cuenta está desactivada.'
                 }, status=status.HTTP_403_FORBIDDEN)
         else:
+            metrics.auth_login_total.inc('fallo')
             return Response({
                 'error': 'Credenciales inválidas.'
             }, status=status.HTTP_401_UNAUTHORIZED)
@@ -92,7 +132,8 @@ class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
-        logout(request)
+        if hasattr(request, 'session'):
+            logout(request)
         return Response({
             'message': 'Sesión cerrada exitosamente.'
         }, status=status.HTTP_200_OK)
@@ -100,41 +141,37 @@ class LogoutView(APIView):
 
 #VISTAS DE GESTIÓN DE USUARIOS
 
-class UserListView(generics.ListAPIView):
+class UserListView(FastListMixin, SucursalScopedMixin, SparseFieldsMixin, generics.ListAPIView):
     """
-    Vista para listar todos los usuarios.
+    Vista para listar los usuarios de la sucursal.
     GET /api/users/
     Solo administradores.
     """
     queryset = User.objects.all()
     serializer_class = UserSerializer
-    permission_classes = [IsAuthenticated, IsAdminGroup]
+    fast_serializer_class = FastUserSerializer
+    permission_classes = [IsAuthenticated, HasModelPermission]
+    sucursal_field = 'membresias__sucursal'
 
 
-class UserDetailView(generics.RetrieveUpdateDestroyAPIView):
+class UserDetailView(SucursalScopedMixin, SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Vista para ver, actualizar o eliminar un usuario.
     GET/PUT/PATCH/DELETE /api/users/<id>/
-    - Ver/Actualizar: Admin o el propio usuario
-    - Eliminar: Solo admin
+    - Ver/Actualizar: el propio usuario o con permiso view_user/change_user
+    - Eliminar: con permiso delete_user (solo admin por defecto)
     """
     queryset = User.objects.all()
-    permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
+    permission_classes = [IsAuthenticated, HasModelPermission]
+    sucursal_field = 'membresias__sucursal'
+    # El propio usuario puede ver y editar su cuenta
+    propietario = 'pk'
 
     def get_serializer_class(self):
         if self.request.method in ['PUT', 'PATCH']:
             return UserUpdateSerializer
         return UserSerializer
 
-    def destroy(self, request, *args, **kwargs):
-        # Solo administradores pueden eliminar usuarios
-        if not (request.user.is_superuser or
-                request.user.groups.filter(name='Administradores').exists()):
-            return Response({
-                'error': 'No tiene permisos para eliminar usuarios.'
-            }, status=status.HTTP_403_FORBIDDEN)
-        return super().destroy(request, *args, **kwargs)
-
 
 class CurrentUserView(APIView):
     """
@@ -145,8 +182,14 @@ class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        serializer = UserSerializer(request.user, context={'request': request})
+        data = serializer.data
+        # Sucursales a las que puede dirigir sus peticiones (cabecera X-Sucursal)
+        data['sucursales'] = [
+            {'id': m.sucursal_id, 'codigo': m.sucursal.codigo, 'nombre': m.sucursal.nombre, 'grupo': m.group.name}
+            for m in request.user.membresias.filter(sucursal__activa=True).select_related('sucursal', 'group')
+        ]
+        return Response(data)
 
 
 class PasswordChangeView(APIView):
@@ -172,12 +215,12 @@ class PasswordChangeView(APIView):
         }, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
-@permission_classes([IsAuthenticated, IsAdminGroup])
+@permission_classes([IsAuthenticated, requiere(ADMINISTRAR_SUCURSAL)])
 def assign_group_view(request, user_id):
     """
-    API View para asignar un grupo a un usuario.
+    API View para asignar un grupo a un usuario en la sucursal de la petición.
     POST /api/users/<user_id>/assign-group/
-    Solo administradores.
+    Solo administradores de la sucursal.
     
     Body: { "group_name": "Administradores" | "Empleados" }
     """
@@ -191,14 +234,20 @@ def assign_group_view(request, user_id):
     serializer = AssignGroupSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
+    sucursal = sucursal_actual(request)
+    if sucursal is None:
+        return Response({
+            'error': 'Indique la sucursal con la cabecera X-Sucursal.'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     group_name = serializer.validated_data['group_name']
     group = Group.objects.get(name=group_name)
 
-    user.groups.clear()
-    user.groups.add(group)
+    # user.groups se sincroniza con las membresías (restaurant/signals.py)
+    Membresia.objects.update_or_create(user=user, sucursal=sucursal, defaults={'group': group})
 
     return Response({
-        'message': f'Usuario {user.username} asignado al grupo {group_name}.',
+        'message': f'Usuario {user.username} asignado al grupo {group_name} en {sucursal.nombre}.',
         'user': UserSerializer(user).data
     }, status=status.HTTP_200_OK)
 